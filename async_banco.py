@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Fachada asíncrona (asyncio) sobre codigo_banco, para servicios que atienden muchos clientes
+a la vez desde un solo proceso sin trabar el event loop con las llamadas bloqueantes de sqlite3.
+
+- Las consultas corren en hilos dedicados a la BD (cada uno con su conexión del pool).
+- Un semáforo limita cuántas llamadas hay en vuelo: los demás esperan su turno (contrapresión)
+  y, si se fija max_en_espera, las que no entran reciben BancoOcupado en lugar de acumularse.
+- Los resultados grandes se recorren con async for: un hilo lee de a lotes y se detiene
+  cuando el consumidor no da abasto (solo hay `lotes_en_buffer` lotes leídos por adelantado).
+
+Uso:
+    async with BancoAsync(hilos=4) as banco:
+        cuenta = await banco.buscar_por_numero("12")
+        await banco.depositar(cuenta, 50000)
+        async for fila in banco.iterar_movimientos([cuenta.id_bd]):
+            ...
+
+Prueba de carga: python async_banco.py --clientes 2000 --operaciones 10 --bd prueba.sqlite
+"""
+import sys
+import time
+import random
+import asyncio
+import argparse
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+import codigo_banco as logica
+
+class BancoOcupado(RuntimeError):
+    """Hay más pedidos esperando la BD que los permitidos (max_en_espera)."""
+
+_FIN = object()  # Marca de fin de un recorrido
+
+class BancoAsync:
+    """
+    Versión awaitable de Banco, Cliente y CuentaBase.
+    - hilos: hilos dedicados a las consultas.
+    - max_concurrencia: llamadas a la BD en vuelo (ejecutándose o en la cola de los hilos).
+    - max_en_espera: llamadas esperando turno antes de rechazar con BancoOcupado (None = sin límite).
+    - hilos_recorridos: recorridos (async for) abiertos a la vez; cada uno ocupa un hilo propio.
+    """
+    def __init__(self, banco=None, hilos=4, max_concurrencia=None, max_en_espera=None,
+                 hilos_recorridos=2, lotes_en_buffer=2):
+        self.banco = banco
+        self.max_en_espera = max_en_espera
+        self.lotes_en_buffer = lotes_en_buffer
+        self._hilos = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="bd")
+        self._hilos_recorridos = ThreadPoolExecutor(max_workers=hilos_recorridos, thread_name_prefix="bd-recorrido")
+        self._turnos = asyncio.Semaphore(max_concurrencia or hilos * 4)
+        self._recorridos = asyncio.Semaphore(hilos_recorridos)
+        self.en_espera = 0
+
+    async def abrir(self, nombre="Banco POO"):
+        """Crea el Banco (aplica migraciones si hace falta) sin bloquear el event loop."""
+        if self.banco is None: self.banco = await self._en_bd(logica.Banco, nombre)
+        return self
+
+    async def cerrar(self):
+        """
+        Espera las consultas en curso y libera los hilos de la fachada (sus conexiones se cierran
+        al terminar cada hilo). El pool del proceso no se toca: puede haber otros usuarios.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, partial(self._hilos.shutdown, wait=True))
+        await loop.run_in_executor(None, partial(self._hilos_recorridos.shutdown, wait=True))
+
+    async def __aenter__(self): return await self.abrir()
+    async def __aexit__(self, *error): await self.cerrar()
+
+    async def _en_bd(self, funcion, *args, **kwargs):
+        """Ejecuta una función bloqueante en los hilos de la BD, respetando el límite de concurrencia."""
+        if self._turnos.locked():
+            if self.max_en_espera is not None and self.en_espera >= self.max_en_espera:
+                raise BancoOcupado("Demasiados pedidos esperando la base de datos.")
+            self.en_espera += 1
+            try: await self._turnos.acquire()
+            finally: self.en_espera -= 1
+        else: await self._turnos.acquire()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._hilos, partial(funcion, *args, **kwargs))
+        finally: self._turnos.release()
+
+    # --- CONSULTAS ---
+    async def buscar_por_dni(self, dni):
+        return await self._en_bd(logica.Cliente.buscar_por_dni, dni)
+
+    async def buscar_por_numero(self, numero):
+        return await self._en_bd(logica.CuentaBase.buscar_por_numero, numero)
+
+    async def recuperar_por_cliente(self, id_cliente):
+        return await self._en_bd(logica.CuentaBase.recuperar_por_cliente, id_cliente)
+
+    async def obtener_saldo_total(self):
+        return await self._en_bd(self.banco.obtener_saldo_total)
+
+    async def pagina_movimientos(self, *args, **kwargs):
+        return await self._en_bd(self.banco.pagina_movimientos, *args, **kwargs)
+
+    async def obtener_movimientos_para_analisis(self, filtros, limite=None, desplazamiento=0):
+        return await self._en_bd(self.banco.obtener_movimientos_para_analisis, filtros, limite, desplazamiento)
+
+    async def obtener_totales_analisis(self, filtros, agrupar_por=("clase",)):
+        return await self._en_bd(self.banco.obtener_totales_analisis, filtros, agrupar_por)
+
+    # --- OPERACIONES (montos en centavos, como en CuentaBase) ---
+    async def depositar(self, cuenta, monto):
+        return await self._en_bd(cuenta.depositar, monto)
+
+    async def extraer(self, cuenta, monto):
+        return await self._en_bd(cuenta.extraer, monto)
+
+    async def transferir(self, origen, destino, monto, comision=None):
+        """Como CuentaBase.transferir; sin comisión indicada aplica la del banco (Banco.comision_entre)."""
+        def transferir():  # La comisión lee la configuración de la BD: se calcula en el hilo, no en el loop
+            cargo = self.banco.comision_entre(origen, destino) if comision is None else comision
+            return origen.transferir(monto, destino, cargo)
+        return await self._en_bd(transferir)
+
+    # --- RECORRIDOS (async for) ---
+    def iterar_movimientos(self, ids_cuenta=None, desde=None, hasta=None, tipo="Todos", tamanio_lote=1000):
+        return self._recorrer(partial(self.banco.iterar_movimientos, ids_cuenta, desde, hasta, tipo, tamanio_lote),
+                              tamanio_lote)
+
+    def iterar_movimientos_para_analisis(self, filtros, tamanio_lote=1000):
+        return self._recorrer(partial(self.banco.iterar_movimientos_para_analisis, filtros, tamanio_lote), tamanio_lote)
+
+    def iterar_datos_reporte_global(self, tamanio_lote=1000):
+        return self._recorrer(partial(self.banco.iterar_datos_reporte_global, tamanio_lote), tamanio_lote)
+
+    async def _recorrer(self, crear_generador, tamanio_lote):
+        """
+        Recorre un generador bloqueante de codigo_banco desde un hilo propio (el cursor de sqlite3
+        no puede cambiar de hilo) y entrega las filas al event loop de a lotes.
+        El hilo espera mientras haya `lotes_en_buffer` lotes sin consumir, y si el consumidor
+        deja de iterar (break, excepción) se detiene y cierra el cursor.
+        """
+        loop = asyncio.get_running_loop()
+        cola = asyncio.Queue()
+        lugares = threading.Semaphore(self.lotes_en_buffer)
+        detener = threading.Event()
+
+        def entregar(item):
+            while not lugares.acquire(timeout=0.1):
+                if detener.is_set(): return False
+            if detener.is_set(): return False
+            try: loop.call_soon_threadsafe(cola.put_nowait, item)
+            except RuntimeError: return False  # El event loop ya se cerró
+            return True
+
+        def producir():
+            generador = crear_generador()
+            try:
+                lote = []
+                for fila in generador:
+                    lote.append(fila)
+                    if len(lote) >= tamanio_lote:
+                        if not entregar(lote): return
+                        lote = []
+                if lote and not entregar(lote): return
+                entregar(_FIN)
+            except Exception as e: entregar(e)
+            finally: generador.close()
+
+        async with self._recorridos:
+            tarea = loop.run_in_executor(self._hilos_recorridos, producir)
+            try:
+                while True:
+                    item = await cola.get()
+                    lugares.release()
+                    if item is _FIN: break
+                    if isinstance(item, Exception): raise item
+                    for fila in item: yield fila
+            finally:
+                detener.set()
+                await tarea
+
+# --- PRUEBA DE CARGA ---
+async def _cliente_simulado(banco, numeros, operaciones, tiempos):
+    for _ in range(operaciones):
+        inicio = time.perf_counter()
+        cuenta = await banco.buscar_por_numero(random.choice(numeros))
+        if cuenta: await banco.depositar(cuenta, 100)
+        tiempos.append(time.perf_counter() - inicio)
+
+async def prueba_carga(clientes, operaciones, hilos):
+    """Muchos clientes concurrentes buscando cuentas y depositando; devuelve el resumen en texto."""
+    async with BancoAsync(hilos=hilos) as banco:
+        filas = await banco._en_bd(lambda: [f["numero"] for f in logica.conectar_bd().execute(
+            "SELECT numero FROM cuentas LIMIT 1000")])
+        if not filas: return "La BD no tiene cuentas."
+        tiempos = []
+        inicio = time.perf_counter()
+        await asyncio.gather(*(_cliente_simulado(banco, filas, operaciones, tiempos) for _ in range(clientes)))
+        duracion = time.perf_counter() - inicio
+        movimientos = 0
+        async for _ in banco.iterar_movimientos(tamanio_lote=2000): movimientos += 1
+    tiempos.sort()
+    p = lambda q: tiempos[min(len(tiempos) - 1, int(q * len(tiempos)))] * 1000
+    return (f"{clientes} clientes x {operaciones} operaciones = {len(tiempos)} en {duracion:.2f}s "
+            f"({len(tiempos) / duracion:,.0f} ops/s); latencia p50 {p(0.5):.1f} ms, p99 {p(0.99):.1f} ms\n"
+            f"Recorrido completo de movimientos (async for): {movimientos} filas")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de la fachada asíncrona del Banco POO")
+    parser.add_argument("--clientes", type=int, default=1000, help="Clientes concurrentes (default 1000)")
+    parser.add_argument("--operaciones", type=int, default=10, help="Operaciones por cliente (default 10)")
+    parser.add_argument("--hilos", type=int, default=4, help="Hilos de la BD (default 4)")
+    parser.add_argument("--bd", help="Archivo de base de datos (default: el de la aplicación)")
+    args = parser.parse_args(argv)
+    if args.bd: logica.RUTA_BD = args.bd
+    try: print(asyncio.run(prueba_carga(args.clientes, args.operaciones, args.hilos)))
+    finally: logica.cerrar_conexiones()  # El programa es dueño del proceso: cierra el pool al salir
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
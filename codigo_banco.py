@@ -1,29 +1,341 @@
 # -*- coding: utf-8 -*-
+import os
+import random
+import logging
+import re
+import time
+import unicodedata
 import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
 from abc import ABC, abstractmethod
 from datetime import date, timedelta, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
 # Nombre del archivo donde se guardarán los datos
 RUTA_BD = "banco_poo.sqlite"
 
+# Errores que no se devuelven a quien llama (ej: fallas inesperadas al constituir un PF)
+log = logging.getLogger("banco")
+
+# --- SECCIÓN: DINERO ---
+# Todos los importes (saldos, montos, límites, costos, comisiones) se manejan como
+# int en CENTAVOS, en Python y en la BD. Así las sumas son exactas (sin errores de float)
+# y SUM() en SQL trabaja con enteros. Solo se convierte al entrar (a_centavos) o al mostrar.
+
+def a_centavos(monto):
+    """
+    Convierte un importe en pesos (float, int, Decimal o texto '12,50') a centavos enteros.
+    Si no es un importe válido (texto cualquiera, NaN, infinito) lanza InvalidOperation (ArithmeticError).
+    """
+    if isinstance(monto, str): monto = monto.strip().replace(',', '.')
+    d = Decimal(str(monto))
+    if not d.is_finite(): raise InvalidOperation(f"Importe no finito: {monto}")
+    return int(d.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) * 100)
+
+def centavos_a_texto(centavos, separador_decimal="."):
+    """Centavos a texto sin símbolo, ej: 123456 -> '1234.56' (para campos editables y CSV)."""
+    signo = "-" if centavos < 0 else ""
+    pesos, resto = divmod(abs(centavos), 100)
+    return f"{signo}{pesos}{separador_decimal}{resto:02d}"
+
+def formatear_pesos(centavos, miles=False):
+    """Centavos a texto para mostrar, ej: 123456 -> '$1234.56' (o '$1,234.56' con miles=True)."""
+    signo = "-" if centavos < 0 else ""
+    pesos, resto = divmod(abs(centavos), 100)
+    pesos_txt = f"{pesos:,}" if miles else str(pesos)
+    return f"{signo}${pesos_txt}.{resto:02d}"
+
 # --- SECCIÓN: BASE DE DATOS ---
 
+# Perfiles de almacenamiento (PRAGMAs que aplica el pool a cada conexión).
+# - journal_mode WAL: los lectores (análisis, buscador) no se bloquean mientras alguien escribe.
+# - synchronous: FULL = fsync en cada commit; NORMAL = seguro ante cortes de la app,
+#   puede perder el último commit ante un corte de luz; OFF = solo para cargas masivas repetibles.
+# - cache_size negativo = KiB de caché de páginas; mmap_size en bytes.
+PERFILES_ALMACENAMIENTO = {
+    "durable": {"journal_mode": "WAL", "synchronous": "FULL", "cache_size": -8000,
+                "mmap_size": 0, "temp_store": "DEFAULT", "busy_timeout": 5000},
+    "balanced": {"journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -64000,
+                 "mmap_size": 256 * 1024 * 1024, "temp_store": "MEMORY", "busy_timeout": 5000},
+    "bulk-load": {"journal_mode": "WAL", "synchronous": "OFF", "cache_size": -256000,
+                  "mmap_size": 1024 * 1024 * 1024, "temp_store": "MEMORY", "busy_timeout": 30000},
+}
+# Se puede elegir el perfil sin tocar código: BANCO_PERFIL_BD=durable python interfaz_banco.py
+PERFIL_POR_DEFECTO = os.environ.get("BANCO_PERFIL_BD", "balanced")
+
+# Commits hechos por las conexiones de ESTE proceso (los usa la cache de objetos para distinguir
+# las escrituras propias, que ya actualizan los objetos, de las de otros programas)
+_LOCK_ESCRITURAS = threading.Lock()
+_escrituras_propias = 0
+
+class ConexionBanco(sqlite3.Connection):
+    """Conexión sqlite3 que además recuerda cuántas transacciones anidadas tiene abiertas."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nivel_transaccion = 0
+        self.generacion_perfil = -1  # Qué versión del perfil de PRAGMAs tiene aplicada
+        self.mis_escrituras = 0      # Commits de esta conexión (no cambian su data_version)
+        # Lo que ve la cache de objetos, desde la apertura: así no se pierde una escritura
+        # ajena hecha antes de la primera búsqueda
+        self.version_datos = self.execute("PRAGMA data_version").fetchone()[0]
+        self.escrituras_vistas = self.escrituras_de_otras()
+
+    def escrituras_de_otras(self):
+        """Commits de las OTRAS conexiones de este proceso."""
+        return _escrituras_propias - self.mis_escrituras
+
+    def commit(self):
+        global _escrituras_propias
+        hubo_cambios = self.in_transaction
+        super().commit()
+        if hubo_cambios:
+            with _LOCK_ESCRITURAS:
+                _escrituras_propias += 1
+                self.mis_escrituras += 1
+
+class ConexionPrestada:
+    """
+    Envoltorio de una conexión del pool.
+    Se comporta como una conexión normal, pero close() no la cierra:
+    solo descarta lo que haya quedado sin confirmar (igual que cerrar sin commit)
+    y la deja lista para el siguiente uso en el mismo hilo.
+    Como context manager hace commit al salir bien y rollback si hubo error.
+    """
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb):
+        # Dentro de transaccion() quien confirma o deshace es la transacción externa
+        if self._conexion.nivel_transaccion == 0:
+            if tipo_exc is None: self._conexion.commit()
+            else: self._conexion.rollback()
+        return False
+
+    def close(self):
+        if self._conexion.nivel_transaccion == 0 and self._conexion.in_transaction:
+            self._conexion.rollback()
+
+class _ConexionesHilo(dict):
+    """Conexiones de un hilo (ruta -> conexión). Cuando el hilo termina, threading.local la descarta y las cierra."""
+    def __del__(self):
+        for conn in self.values():
+            try: conn.close()
+            except sqlite3.Error: pass
+
+class PoolConexiones:
+    """
+    Mantiene UNA conexión abierta por hilo y por archivo de BD y la reutiliza.
+    - sqlite3 no permite compartir una conexión entre hilos, así que cada hilo tiene la suya
+      (guardada solo en el threading.local: al terminar el hilo se cierra sola).
+    - Los PRAGMAs se aplican una sola vez, al crear la conexión.
+    """
+    def __init__(self, perfil=PERFIL_POR_DEFECTO):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._abiertas = weakref.WeakSet()  # Conexiones vivas, sin retenerlas (para cerrarlas al salir)
+        self.perfil = None
+        self._generacion = 0
+        self.configurar_perfil(perfil)
+
+    def configurar_perfil(self, nombre):
+        """Cambia el perfil de almacenamiento. Las conexiones abiertas lo toman en su próximo uso."""
+        if nombre not in PERFILES_ALMACENAMIENTO:
+            raise ValueError(f"Perfil de almacenamiento desconocido: {nombre} "
+                             f"(opciones: {', '.join(PERFILES_ALMACENAMIENTO)})")
+        with self._lock:
+            self.perfil = nombre
+            self._generacion += 1
+
+    def _aplicar_perfil(self, conn, nombre=None):
+        """Aplica a UNA conexión el perfil indicado (por defecto, el del pool)."""
+        # Los PRAGMAs de journal no se pueden cambiar en medio de una transacción
+        if conn.in_transaction: return
+        for pragma, valor in PERFILES_ALMACENAMIENTO[nombre or self.perfil].items():
+            conn.execute(f"PRAGMA {pragma} = {valor}")
+        conn.generacion_perfil = self._generacion
+
+    def _crear(self, ruta):
+        # Solo la usa el hilo que la creó; check_same_thread=False es para poder cerrarla
+        # desde el hilo que la descarta (fin del hilo) o desde cerrar_todas()
+        conn = sqlite3.connect(ruta, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+                               factory=ConexionBanco, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        with self._lock:
+            self._abiertas.add(conn)
+        return conn
+
+    def obtener(self, ruta=None):
+        """Devuelve la conexión del hilo actual (la crea la primera vez)."""
+        ruta = ruta or RUTA_BD
+        conexiones = getattr(self._local, "conexiones", None)
+        if conexiones is None:
+            conexiones = self._local.conexiones = _ConexionesHilo()
+        conn = conexiones.get(ruta)
+        if conn is None:
+            conn = conexiones[ruta] = self._crear(ruta)
+        if conn.generacion_perfil != self._generacion:
+            self._aplicar_perfil(conn)
+        return ConexionPrestada(conn)
+
+    def cerrar_todas(self):
+        """Cierra todas las conexiones (de todos los hilos). Usar solo al terminar el programa."""
+        with self._lock:
+            abiertas = list(self._abiertas)
+            self._abiertas = weakref.WeakSet()
+            self._local = threading.local()
+        for conn in abiertas:
+            try: conn.close()
+            except sqlite3.Error: pass
+
+POOL = PoolConexiones()
+
 def conectar_bd():
     """
-    Crea la conexión con la base de datos SQLite.
+    Devuelve la conexión con la base de datos SQLite del hilo actual (reutilizada desde el pool).
     - detect_types: Permite que Python entienda automáticamente las fechas.
     - row_factory: Permite acceder a las columnas por nombre (ej: fila['saldo']).
+    Se puede usar como antes (conexion.close() al final) o con 'with conectar_bd() as conexion:'.
     """
-    conn = sqlite3.connect(RUTA_BD, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return POOL.obtener()
 
-def inicializar_bd():
+def configurar_perfil_bd(nombre):
+    """Elige el perfil de almacenamiento: 'durable', 'balanced' o 'bulk-load'."""
+    POOL.configurar_perfil(nombre)
+
+@contextmanager
+def perfil_temporal(nombre):
+    """
+    Usa otro perfil de almacenamiento SOLO en la conexión del hilo actual mientras dura el bloque
+    (ej: 'bulk-load' en una importación). Las conexiones de los demás hilos no cambian: con
+    synchronous=OFF global, un corte durante la importación podría perder operaciones ya confirmadas.
+    """
+    if nombre not in PERFILES_ALMACENAMIENTO: raise ValueError(f"Perfil de almacenamiento desconocido: {nombre}")
+    conn = conectar_bd()._conexion
+    POOL._aplicar_perfil(conn, nombre)
+    try: yield
+    finally: POOL._aplicar_perfil(conn)  # Vuelve al perfil del pool
+
+def cerrar_conexiones():
+    """Cierra las conexiones del pool (al salir de la aplicación)."""
+    POOL.cerrar_todas()
+
+# Reintentos cuando otro programa tiene la BD bloqueada para escribir más allá del busy_timeout
+INTENTOS_BD_OCUPADA = 5
+
+def _reintentar_si_ocupada(sentencia):
     """
-    Crea las tablas necesarias si no existen.
-    Se ejecuta automáticamente al iniciar el programa.
+    Ejecuta `sentencia` (BEGIN IMMEDIATE o COMMIT) y, si la BD está ocupada, la repite con una
+    espera creciente y al azar (para que los que compiten no vuelvan a chocar a la vez).
+    Es seguro repetirlas: si fallan por bloqueo no se aplicó nada.
+    """
+    for intento in range(INTENTOS_BD_OCUPADA):
+        try: return sentencia()
+        except sqlite3.OperationalError as e:
+            mensaje = str(e)
+            if intento == INTENTOS_BD_OCUPADA - 1 or ("locked" not in mensaje and "busy" not in mensaje): raise
+            time.sleep(random.uniform(0, 0.05 * 2 ** intento))
+
+@contextmanager
+def transaccion():
+    """
+    Ejecuta un bloque dentro de UNA transacción (BEGIN IMMEDIATE ... COMMIT).
+    - Si el bloque lanza una excepción se hace ROLLBACK y se relanza.
+    - Se puede anidar: las transacciones internas usan SAVEPOINT, así que un error
+      interno solo deshace su parte y la externa decide el COMMIT final.
+    - Si otro programa tiene la BD ocupada, BEGIN y COMMIT se reintentan solos.
+    Uso: with transaccion() as conexion: conexion.execute(...)
     """
     conexion = conectar_bd()
+    conn = conexion._conexion
+    nivel = conn.nivel_transaccion
+    if nivel == 0: _reintentar_si_ocupada(lambda: conn.execute("BEGIN IMMEDIATE"))
+    else: conn.execute(f"SAVEPOINT sp_{nivel}")
+    conn.nivel_transaccion += 1
+    try:
+        yield conexion
+    except BaseException:
+        conn.nivel_transaccion -= 1
+        if nivel == 0: conn.rollback()
+        else:
+            conn.execute(f"ROLLBACK TO sp_{nivel}")
+            conn.execute(f"RELEASE sp_{nivel}")
+        raise
+    conn.nivel_transaccion -= 1
+    if nivel == 0: _reintentar_si_ocupada(conn.commit)
+    else: conn.execute(f"RELEASE sp_{nivel}")
+
+class CommitAgrupado:
+    """
+    Modo "group commit": junta muchas operaciones y las confirma con UN solo COMMIT
+    (un solo fsync), en lugar de uno por operación.
+    Cada operación corre en su propio SAVEPOINT: si una falla, solo se deshace esa
+    y el error queda registrado en self.errores.
+    Uso:
+        with CommitAgrupado(tamanio_lote=500) as lote:
+            lote.encolar(cuenta.depositar, 100)
+            lote.encolar(origen.transferir, 50, destino)
+    """
+    def __init__(self, tamanio_lote=500):
+        self.tamanio_lote = tamanio_lote
+        self._pendientes = []
+        self.resultados = []
+        self.errores = []
+
+    def encolar(self, funcion, *args, **kwargs):
+        """Agrega una operación a la cola. Al llenarse el lote se confirma solo."""
+        self._pendientes.append((funcion, args, kwargs))
+        if len(self._pendientes) >= self.tamanio_lote:
+            self.confirmar()
+
+    def confirmar(self):
+        """Ejecuta todas las operaciones pendientes dentro de una única transacción."""
+        pendientes, self._pendientes = self._pendientes, []
+        if not pendientes: return
+        with transaccion():
+            for funcion, args, kwargs in pendientes:
+                try:
+                    with transaccion():
+                        self.resultados.append(funcion(*args, **kwargs))
+                except Exception as e:
+                    self.resultados.append(None)
+                    self.errores.append((funcion, args, e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb):
+        if tipo_exc is None: self.confirmar()
+        else: self._pendientes.clear()
+        return False
+
+# --- SECCIÓN: MIGRACIONES DE ESQUEMA ---
+# Cada cambio de esquema es un paso numerado. La tabla 'version_esquema' guarda qué pasos
+# ya se aplicaron, así una BD vieja se actualiza sola (en orden) y una nueva se crea completa.
+# Para cambiar el esquema: agregar una función nueva con @migracion(N+1, "descripción").
+# NUNCA modificar una migración ya publicada.
+
+MIGRACIONES = []  # Lista ordenada de (version, descripcion, funcion)
+
+def migracion(version, descripcion):
+    """Decorador que registra un paso de migración."""
+    def registrar(funcion):
+        MIGRACIONES.append((version, descripcion, funcion))
+        MIGRACIONES.sort(key=lambda m: m[0])
+        return funcion
+    return registrar
+
+@migracion(1, "Esquema inicial: clientes, cuentas, plazos fijos, movimientos y parámetros")
+def _migracion_esquema_inicial(conexion):
     cursor = conexion.cursor()
 
     # Tabla Clientes: Ahora incluye estado 'activo' para bajas lógicas (Soft Delete)
@@ -103,9 +415,429 @@ def inicializar_bd():
     VALUES (1, 50.0, 0.45, 100.0, 10000, 0)
     ON CONFLICT(id) DO NOTHING;
     """)
-    
+
+@migracion(2, "Índices secundarios para historial, análisis y plazos fijos")
+def _migracion_indices(conexion):
+    # Historial de una cuenta (ver movimientos) ordenado por fecha
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_movimientos_cuenta_fecha ON movimientos(id_cuenta, fecha)")
+    # Panel de análisis: filtro por rango de fechas de todo el banco
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_movimientos_fecha ON movimientos(fecha)")
+    # recuperar_por_cliente
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_cuentas_cliente ON cuentas(id_cliente)")
+    # Plazos fijos de una cuenta y búsqueda de vencimientos pendientes
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_plazos_cuenta_vencimiento ON plazos_fijos(id_cuenta, fecha_vencimiento)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_plazos_estado_vencimiento ON plazos_fijos(estado, fecha_vencimiento)")
+
+def _reconstruir_tabla(conexion, tabla, ddl, select_columnas):
+    """
+    Cambia columnas de una tabla existente (SQLite no permite ALTER COLUMN):
+    crea la tabla nueva, copia los datos convertidos y reemplaza la vieja.
+    """
+    conexion.execute(ddl.replace(f"CREATE TABLE {tabla} (", f"CREATE TABLE {tabla}_nueva (", 1))
+    conexion.execute(f"INSERT INTO {tabla}_nueva SELECT {select_columnas} FROM {tabla}")
+    conexion.execute(f"DROP TABLE {tabla}")
+    conexion.execute(f"ALTER TABLE {tabla}_nueva RENAME TO {tabla}")
+
+@migracion(3, "Importes en centavos enteros (INTEGER) en lugar de REAL")
+def _migracion_centavos(conexion):
+    def cent(col): return f"CAST(ROUND({col} * 100) AS INTEGER)"
+    _reconstruir_tabla(conexion, "cuentas", """
+    CREATE TABLE cuentas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        numero TEXT NOT NULL UNIQUE,
+        saldo INTEGER NOT NULL,            -- centavos
+        tipo_cuenta TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        id_cliente INTEGER NOT NULL,
+        limite_descubierto INTEGER,        -- centavos
+        costo_mantenimiento INTEGER,       -- centavos
+        fecha_creacion DATE,
+        FOREIGN KEY (id_cliente) REFERENCES clientes(id)
+    )""", f"id, numero, {cent('saldo')}, tipo_cuenta, categoria, id_cliente, "
+          f"{cent('limite_descubierto')}, {cent('costo_mantenimiento')}, fecha_creacion")
+    _reconstruir_tabla(conexion, "plazos_fijos", """
+    CREATE TABLE plazos_fijos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_cuenta INTEGER NOT NULL,
+        monto_inicial INTEGER NOT NULL,    -- centavos
+        dias INTEGER NOT NULL,
+        tasa_interes REAL NOT NULL,
+        monto_final INTEGER NOT NULL,      -- centavos
+        fecha_creacion DATE NOT NULL,
+        fecha_vencimiento DATE NOT NULL,
+        estado TEXT NOT NULL,
+        FOREIGN KEY (id_cuenta) REFERENCES cuentas(id)
+    )""", f"id, id_cuenta, {cent('monto_inicial')}, dias, tasa_interes, {cent('monto_final')}, "
+          f"fecha_creacion, fecha_vencimiento, estado")
+    _reconstruir_tabla(conexion, "movimientos", """
+    CREATE TABLE movimientos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_cuenta INTEGER NOT NULL,
+        fecha TIMESTAMP NOT NULL,
+        monto INTEGER NOT NULL,            -- centavos
+        tipo TEXT NOT NULL,
+        descripcion TEXT,
+        nro_cuenta_origen TEXT,
+        nro_cuenta_destino TEXT,
+        FOREIGN KEY (id_cuenta) REFERENCES cuentas(id)
+    )""", f"id, id_cuenta, fecha, {cent('monto')}, tipo, descripcion, nro_cuenta_origen, nro_cuenta_destino")
+    _reconstruir_tabla(conexion, "parametros", """
+    CREATE TABLE parametros (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        comision_transferencia INTEGER,    -- centavos
+        tasa_anual_pf REAL,
+        costo_mantenimiento_cc INTEGER,    -- centavos
+        limite_descubierto_cc INTEGER,     -- centavos
+        ultimo_nro_cuenta INTEGER
+    )""", f"id, {cent('comision_transferencia')}, tasa_anual_pf, {cent('costo_mantenimiento_cc')}, "
+          f"{cent('limite_descubierto_cc')}, ultimo_nro_cuenta")
+    # DROP TABLE se lleva los índices: se vuelven a crear
+    _migracion_indices(conexion)
+
+@migracion(4, "Índices de texto completo (FTS5) para el buscador de cuentas y clientes")
+def _migracion_busqueda(conexion):
+    # Tokens sin acentos ni mayúsculas; prefix='2 3' acelera las búsquedas por comienzo de palabra
+    try:
+        conexion.execute("""
+            CREATE VIRTUAL TABLE busqueda_cuentas USING fts5(
+                numero, dni, nombre, apellido, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')
+        """)
+    except sqlite3.OperationalError:
+        return  # SQLite compilado sin FTS5: el buscador sigue usando LIKE
+    conexion.execute("""
+        CREATE VIRTUAL TABLE busqueda_clientes USING fts5(
+            dni, nombre, apellido, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')
+    """)
+    # Carga inicial (rowid = id de la cuenta / del cliente)
+    conexion.execute("""
+        INSERT INTO busqueda_cuentas (rowid, numero, dni, nombre, apellido)
+        SELECT c.id, c.numero, cl.dni, cl.nombre, cl.apellido FROM cuentas c JOIN clientes cl ON c.id_cliente = cl.id
+    """)
+    conexion.execute("INSERT INTO busqueda_clientes (rowid, dni, nombre, apellido) SELECT id, dni, nombre, apellido FROM clientes")
+    # Triggers: mantienen los índices al día con cada alta, baja o cambio
+    for sql in ("""
+        CREATE TRIGGER trg_busqueda_cuentas_alta AFTER INSERT ON cuentas BEGIN
+            INSERT INTO busqueda_cuentas (rowid, numero, dni, nombre, apellido)
+            SELECT NEW.id, NEW.numero, dni, nombre, apellido FROM clientes WHERE id = NEW.id_cliente;
+        END""", """
+        CREATE TRIGGER trg_busqueda_cuentas_baja AFTER DELETE ON cuentas BEGIN
+            DELETE FROM busqueda_cuentas WHERE rowid = OLD.id;
+        END""", """
+        CREATE TRIGGER trg_busqueda_cuentas_cambio AFTER UPDATE OF numero, id_cliente ON cuentas BEGIN
+            DELETE FROM busqueda_cuentas WHERE rowid = OLD.id;
+            INSERT INTO busqueda_cuentas (rowid, numero, dni, nombre, apellido)
+            SELECT NEW.id, NEW.numero, dni, nombre, apellido FROM clientes WHERE id = NEW.id_cliente;
+        END""", """
+        CREATE TRIGGER trg_busqueda_clientes_alta AFTER INSERT ON clientes BEGIN
+            INSERT INTO busqueda_clientes (rowid, dni, nombre, apellido) VALUES (NEW.id, NEW.dni, NEW.nombre, NEW.apellido);
+        END""", """
+        CREATE TRIGGER trg_busqueda_clientes_baja AFTER DELETE ON clientes BEGIN
+            DELETE FROM busqueda_clientes WHERE rowid = OLD.id;
+        END""", """
+        CREATE TRIGGER trg_busqueda_clientes_cambio AFTER UPDATE OF dni, nombre, apellido ON clientes BEGIN
+            UPDATE busqueda_clientes SET dni = NEW.dni, nombre = NEW.nombre, apellido = NEW.apellido WHERE rowid = NEW.id;
+            UPDATE busqueda_cuentas SET dni = NEW.dni, nombre = NEW.nombre, apellido = NEW.apellido
+            WHERE rowid IN (SELECT id FROM cuentas WHERE id_cliente = NEW.id);
+        END"""):
+        conexion.execute(sql)
+
+@migracion(5, "Registro de cobros de mantenimiento por período (evita cobrar dos veces)")
+def _migracion_cobros_mantenimiento(conexion):
+    conexion.execute("""
+    CREATE TABLE IF NOT EXISTS cobros_mantenimiento (
+        id_cuenta INTEGER NOT NULL,
+        periodo TEXT NOT NULL,          -- 'AAAA-MM'
+        monto INTEGER NOT NULL,         -- centavos
+        fecha TIMESTAMP NOT NULL,
+        PRIMARY KEY (id_cuenta, periodo),
+        FOREIGN KEY (id_cuenta) REFERENCES cuentas(id)
+    );
+    """)
+
+@migracion(6, "Índice de cobertura para los totales del Panel de Análisis")
+def _migracion_indice_analisis(conexion):
+    # (fecha, tipo, monto, id_cuenta): los totales por rango de fechas se resuelven solo con el índice
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_movimientos_fecha_tipo_monto ON movimientos(fecha, tipo, monto, id_cuenta)")
+    conexion.execute("DROP INDEX IF EXISTS idx_movimientos_fecha")  # Queda cubierto por el anterior
+
+@migracion(7, "Resumen diario de movimientos para el Panel de Análisis")
+def _migracion_resumen_diario(conexion):
+    # Una fila por día × categoría × tipo: los totales de un año son unos pocos cientos de filas
+    conexion.executescript("""
+    CREATE TABLE IF NOT EXISTS resumen_diario (
+        dia TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        cantidad INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        PRIMARY KEY (dia, categoria, tipo)
+    ) WITHOUT ROWID;
+
+    -- Último id de movimientos ya volcado al resumen (marca de avance)
+    CREATE TABLE IF NOT EXISTS resumen_estado (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        ultimo_id_movimiento INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO resumen_estado (id, ultimo_id_movimiento) VALUES (1, 0);
+    """)
+    _acumular_resumen(conexion)  # Los movimientos existentes se resumen una sola vez acá
+
+@migracion(8, "Catálogo de tipos de movimiento con códigos numéricos")
+def _migracion_tipos_movimiento(conexion):
+    conexion.execute("""
+    CREATE TABLE IF NOT EXISTS tipos_movimiento (
+        codigo INTEGER PRIMARY KEY,
+        nombre TEXT NOT NULL UNIQUE,
+        clase TEXT NOT NULL,
+        sentido INTEGER NOT NULL
+    )""")
+    conexion.executemany("INSERT OR REPLACE INTO tipos_movimiento (codigo, nombre, clase, sentido) VALUES (?, ?, ?, ?)",
+                         [(codigo, *datos) for codigo, datos in CATALOGO_MOVIMIENTOS.items()])
+    # ADD COLUMN no reescribe la tabla; después se completa el código de las filas existentes
+    conexion.execute(f"ALTER TABLE movimientos ADD COLUMN tipo_codigo INTEGER NOT NULL DEFAULT {MOV_OTRO}")
+    conexion.execute(f"""
+        UPDATE movimientos SET tipo_codigo = COALESCE(
+            (SELECT t.codigo FROM tipos_movimiento t WHERE t.nombre = movimientos.tipo), {MOV_OTRO})
+    """)
+    # Historial de una cuenta filtrado por tipo (ver movimientos)
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_movimientos_cuenta_tipo_fecha ON movimientos(id_cuenta, tipo_codigo, fecha)")
+    # El índice de cobertura del análisis pasa a usar el código
+    conexion.execute("DROP INDEX IF EXISTS idx_movimientos_fecha_tipo_monto")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_movimientos_fecha_codigo_monto ON movimientos(fecha, tipo_codigo, monto, id_cuenta)")
+    # El resumen diario se rehace por código y se vuelca desde cero
+    conexion.executescript("""
+    DROP TABLE IF EXISTS resumen_diario;
+    CREATE TABLE resumen_diario (
+        dia TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        tipo_codigo INTEGER NOT NULL,
+        cantidad INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        PRIMARY KEY (dia, categoria, tipo_codigo)
+    ) WITHOUT ROWID;
+    UPDATE resumen_estado SET ultimo_id_movimiento = 0;
+    """)
+    _acumular_resumen(conexion)
+
+@migracion(9, "Versión de la configuración global (parametros)")
+def _migracion_version_parametros(conexion):
+    # Cada cambio de parámetros incrementa la versión: los programas abiertos recargan solo si cambió
+    conexion.execute("ALTER TABLE parametros ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+@migracion(10, "Tabla de secuencias para numerar cuentas por bloques")
+def _migracion_secuencias(conexion):
+    conexion.execute("""
+    CREATE TABLE IF NOT EXISTS secuencias (
+        nombre TEXT PRIMARY KEY,
+        valor INTEGER NOT NULL      -- Último número entregado o reservado
+    )""")
+    # Arranca después del contador viejo y de cualquier número de cuenta numérico ya usado
+    conexion.execute("""
+        INSERT OR IGNORE INTO secuencias (nombre, valor)
+        SELECT 'cuentas', MAX(COALESCE((SELECT ultimo_nro_cuenta FROM parametros WHERE id = 1), 0),
+                              COALESCE((SELECT MAX(CAST(numero AS INTEGER)) FROM cuentas
+                                        WHERE numero <> '' AND numero NOT GLOB '*[^0-9]*'), 0))
+    """)
+
+def version_esquema(conexion):
+    """Última migración aplicada en la BD (0 si es una BD nueva)."""
+    return conexion.execute("SELECT COALESCE(MAX(version), 0) FROM version_esquema").fetchone()[0]
+
+# Índices secundarios del esquema en su última versión (nombre -> tabla, columnas); los crean las
+# migraciones y hay que mantener esta lista al día con ellas. La importación masiva los borra mientras
+# carga: si se corta antes de recrearlos, inicializar_bd los vuelve a crear al iniciar.
+INDICES_SECUNDARIOS = {
+    "idx_movimientos_cuenta_fecha": ("movimientos", "id_cuenta, fecha"),
+    "idx_movimientos_cuenta_tipo_fecha": ("movimientos", "id_cuenta, tipo_codigo, fecha"),
+    "idx_movimientos_fecha_codigo_monto": ("movimientos", "fecha, tipo_codigo, monto, id_cuenta"),
+    "idx_cuentas_cliente": ("cuentas", "id_cliente"),
+    "idx_plazos_cuenta_vencimiento": ("plazos_fijos", "id_cuenta, fecha_vencimiento"),
+    "idx_plazos_estado_vencimiento": ("plazos_fijos", "estado, fecha_vencimiento"),
+}
+
+def indices_faltantes(conexion):
+    """Nombres de INDICES_SECUNDARIOS que no existen en la BD."""
+    existentes = {fila[0] for fila in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    return [nombre for nombre in INDICES_SECUNDARIOS if nombre not in existentes]
+
+def crear_indices(conexion, nombres=None):
+    """Crea (si no existen) los índices secundarios indicados, o todos."""
+    for nombre in nombres or INDICES_SECUNDARIOS:
+        tabla, columnas = INDICES_SECUNDARIOS[nombre]
+        conexion.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {tabla}({columnas})")
+
+def esquema_al_dia(conexion):
+    """True si ya están aplicadas todas las migraciones y existen los índices (dos lecturas chicas)."""
+    try: return version_esquema(conexion) >= MIGRACIONES[-1][0] and not indices_faltantes(conexion)
+    except sqlite3.OperationalError: return False  # BD nueva: todavía no existe version_esquema
+
+def inicializar_bd():
+    """
+    Crea o actualiza el esquema aplicando, en orden, las migraciones pendientes.
+    Cada paso corre en su propia transacción junto con su registro en 'version_esquema':
+    si falla, la BD queda en la versión anterior (nunca a medio migrar).
+    La llama el programa al iniciar o, si no, asegurar_esquema() al crear el Banco.
+    Después recrea los índices secundarios que falten.
+    Si la BD ya está al día solo hace lecturas (no abre transacciones).
+    """
+    conexion = conectar_bd()
+    if esquema_al_dia(conexion):
+        with _LOCK_ESQUEMA: _ESQUEMAS_LISTOS.add(RUTA_BD)
+        return
+    conexion.execute("""
+    CREATE TABLE IF NOT EXISTS version_esquema (
+        version INTEGER PRIMARY KEY,
+        descripcion TEXT NOT NULL,
+        fecha_aplicada TIMESTAMP NOT NULL
+    );
+    """)
     conexion.commit()
-    conexion.close()
+    aplicada = version_esquema(conexion)
+    hubo_cambios = False
+    # Las migraciones que reconstruyen tablas necesitan las claves foráneas desactivadas
+    # (solo se puede cambiar fuera de una transacción); se verifican con foreign_key_check.
+    conexion.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for version, descripcion, funcion in MIGRACIONES:
+            if version <= aplicada: continue
+            with transaccion() as conexion:
+                # Se vuelve a leer dentro de la transacción por si otro proceso migró antes
+                if version <= version_esquema(conexion): continue
+                funcion(conexion)
+                if conexion.execute("PRAGMA foreign_key_check").fetchone():
+                    raise sqlite3.IntegrityError(f"La migración {version} dejó claves foráneas inválidas")
+                conexion.execute("INSERT INTO version_esquema (version, descripcion, fecha_aplicada) VALUES (?, ?, ?)",
+                                 (version, descripcion, datetime.now()))
+                hubo_cambios = True
+    finally:
+        conexion.execute("PRAGMA foreign_keys = ON")
+    faltantes = indices_faltantes(conexion)
+    if faltantes:  # Por ejemplo, una importación masiva que se cortó antes de recrearlos
+        with transaccion() as conexion:
+            crear_indices(conexion, faltantes)
+        hubo_cambios = True
+    if hubo_cambios:
+        # Actualiza las estadísticas que usa el planificador de consultas para elegir índices
+        conexion.execute("PRAGMA optimize")
+    with _LOCK_ESQUEMA: _ESQUEMAS_LISTOS.add(RUTA_BD)
+
+# Bases de datos (rutas) que este proceso ya dejó en la última versión del esquema
+_ESQUEMAS_LISTOS = set()
+_LOCK_ESQUEMA = threading.Lock()
+
+def asegurar_esquema():
+    """
+    Aplica las migraciones pendientes la primera vez que el proceso usa la BD actual (RUTA_BD).
+    Importar el módulo ya no toca la BD: así se puede elegir RUTA_BD antes (scripts, lotes, servidor).
+    """
+    with _LOCK_ESQUEMA:
+        if RUTA_BD in _ESQUEMAS_LISTOS: return
+    inicializar_bd()
+
+# --- SECCIÓN: CACHE DE OBJETOS ---
+
+# Clientes y cuentas que se mantienen en memoria aunque nadie los esté usando
+CAPACIDAD_CACHE_OBJETOS = 1000
+
+class CacheObjetos:
+    """
+    Identity map + cache LRU para Cliente y CuentaBase (una por proceso).
+    - Hay un solo objeto por fila: buscar la misma cuenta dos veces devuelve la misma instancia,
+      así un saldo que cambia en un lado se ve en todos (lo escribe el propio objeto en la BD).
+    - Los últimos `capacidad` objetos usados quedan en memoria (LRU); los demás viven
+      mientras alguien los use (referencias débiles).
+    - invalidar() marca todo como desactualizado: la próxima búsqueda relee la fila y actualiza
+      el MISMO objeto. La llaman las operaciones masivas en SQL y se dispara sola si OTRO
+      programa escribió en la BD (PRAGMA data_version sin commits propios en el medio).
+    - Las claves (dni, número) y las listas de cuentas también son LRU de `capacidad` entradas.
+    - Las instancias se comparten entre hilos: el saldo de una cuenta guardada solo se reemplaza entero con el valor
+      que devuelve la BD (nunca se suma en memoria), y los fondos siempre los controla la BD.
+    """
+    def __init__(self, capacidad=CAPACIDAD_CACHE_OBJETOS):
+        self._lock = threading.RLock()
+        self._vivos = weakref.WeakValueDictionary()  # (clase, id) -> objeto
+        self._recientes = OrderedDict()              # (clase, id) -> objeto (LRU)
+        self._claves = OrderedDict()                 # ("dni", x) / ("numero", x) -> (clase, id) (LRU)
+        self._listas = OrderedDict()                 # ("cuentas", id_cliente) -> [ids de cuentas] (LRU)
+        self.capacidad = capacidad
+        self.epoca = 0
+        self.aciertos = self.fallos = 0
+
+    def invalidar(self):
+        with self._lock:
+            self.epoca += 1
+            self._recientes.clear()
+            self._claves.clear()
+            self._listas.clear()
+
+    def verificar(self, conexion):
+        """
+        Invalida si otro programa escribió en la BD desde la última vez.
+        data_version cambia con el commit de cualquier otra conexión, también las del pool en otros
+        hilos; si hubo commits de esas conexiones en el medio se supone que fueron ellos (sus objetos
+        ya están al día). Un cambio ajeno que coincida con uno de otro hilo puede verse tarde, nunca
+        con dinero: los saldos los controla la BD en cada operación.
+        """
+        conn = conexion._conexion
+        escrituras = conn.escrituras_de_otras()  # Antes del PRAGMA: si cambia en el medio, se invalida de más
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if conn.version_datos != version:
+            if escrituras == conn.escrituras_vistas: self.invalidar()
+            conn.version_datos = version
+        conn.escrituras_vistas = escrituras
+
+    def existente(self, clase, id_bd):
+        """La instancia viva de esa fila (aunque esté desactualizada), o None."""
+        return self._vivos.get((clase, id_bd))
+
+    def obtener(self, clase, id_bd):
+        """La instancia de esa fila si está al día, o None (hay que leerla de la BD)."""
+        with self._lock:
+            obj = self._vivos.get((clase, id_bd))
+            if obj is None or obj._epoca_cache != self.epoca:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            self._usar((clase, id_bd), obj)
+            return obj
+
+    def obtener_por_clave(self, clase, clave):
+        with self._lock:
+            destino = self._claves.get(clave)
+            if destino and destino[0] is clase:
+                self._claves.move_to_end(clave)
+                return self.obtener(*destino)
+            self.fallos += 1
+            return None
+
+    def registrar(self, obj, *claves):
+        """Guarda el objeto (recién leído o escrito) como la versión al día de su fila."""
+        clave_obj = (Cliente if isinstance(obj, Cliente) else CuentaBase, obj.id_bd)
+        with self._lock:
+            obj._epoca_cache = self.epoca
+            self._vivos[clave_obj] = obj
+            for clave in claves: self._recordar(self._claves, clave, clave_obj)
+            self._usar(clave_obj, obj)
+        return obj
+
+    def _recordar(self, mapa, clave, valor):
+        mapa[clave] = valor
+        mapa.move_to_end(clave)
+        while len(mapa) > self.capacidad: mapa.popitem(last=False)
+
+    def _usar(self, clave, obj):
+        self._recordar(self._recientes, clave, obj)
+
+    def lista(self, clave):
+        return self._listas.get(clave)
+
+    def guardar_lista(self, clave, ids):
+        with self._lock: self._recordar(self._listas, clave, ids)
+
+    def olvidar_lista(self, clave):
+        with self._lock: self._listas.pop(clave, None)
+
+CACHE_OBJETOS = CacheObjetos()
 
 # --- SECCIÓN: CLASES DE NEGOCIO (Active Record) ---
 
@@ -118,100 +850,124 @@ class Cliente:
         self.activo = activo
         self.id_bd = id_bd 
 
+    @staticmethod
+    def _desde_datos(id_bd, nombre, apellido, dni, email, activo):
+        """Cliente de una fila de la BD: si ya está en memoria se actualiza esa misma instancia."""
+        c = CACHE_OBJETOS.existente(Cliente, id_bd)
+        if c is None: c = Cliente(nombre, apellido, dni, email, activo, id_bd)
+        else: c.nombre, c.apellido, c.dni, c.email, c.activo = nombre, apellido, dni, email, activo
+        return CACHE_OBJETOS.registrar(c, ("dni", dni))
+
     def guardar(self):
         """Guarda o actualiza al cliente en la BD."""
-        conexion = conectar_bd()
         try:
-            cursor = conexion.execute("""
-                INSERT INTO clientes (nombre, apellido, dni, email, activo) 
-                VALUES (?, ?, ?, ?, ?)""", 
-                (self.nombre, self.apellido, self.dni, self.email, 1))
-            conexion.commit()
+            with transaccion() as conexion:
+                cursor = conexion.execute("""
+                    INSERT INTO clientes (nombre, apellido, dni, email, activo) 
+                    VALUES (?, ?, ?, ?, ?)""", 
+                    (self.nombre, self.apellido, self.dni, self.email, 1))
             self.id_bd = cursor.lastrowid
+            CACHE_OBJETOS.registrar(self, ("dni", self.dni))
             return True
         except sqlite3.IntegrityError:
             # Si el DNI ya existe, no creamos duplicado.
             # Recuperamos el ID existente para trabajar con él.
-            conexion.close()
             existente = Cliente.buscar_por_dni(self.dni)
             if existente:
                 self.id_bd = existente.id_bd
                 self.nombre = existente.nombre
                 self.apellido = existente.apellido
                 self.activo = existente.activo
-            return False 
-        finally:
-            if conexion: conexion.close()
+            return False
 
     def dar_de_baja(self):
         """Baja lógica: Pone activo = 0."""
         if self.id_bd:
-            conexion = conectar_bd()
             try:
-                conexion.execute("UPDATE clientes SET activo = 0 WHERE id = ?", (self.id_bd,))
-                conexion.commit()
+                with transaccion() as conexion:
+                    conexion.execute("UPDATE clientes SET activo = 0 WHERE id = ?", (self.id_bd,))
                 self.activo = 0
                 return True
-            except: return False
-            finally: conexion.close()
+            except sqlite3.Error: return False
         return False
 
     def reactivar(self):
         """Reactiva al cliente y resetea saldos a 0 por seguridad."""
         if self.id_bd:
-            conexion = conectar_bd()
             try:
-                conexion.execute("UPDATE clientes SET activo = 1 WHERE id = ?", (self.id_bd,))
-                conexion.execute("UPDATE cuentas SET saldo = 0 WHERE id_cliente = ?", (self.id_bd,))
-                conexion.commit()
+                with transaccion() as conexion:
+                    conexion.execute("UPDATE clientes SET activo = 1 WHERE id = ?", (self.id_bd,))
+                    conexion.execute("UPDATE cuentas SET saldo = 0 WHERE id_cliente = ?", (self.id_bd,))
                 self.activo = 1
+                CACHE_OBJETOS.invalidar()  # Las cuentas en memoria tienen el saldo viejo
                 return True
-            except: return False
-            finally: conexion.close()
+            except sqlite3.Error: return False
         return False
 
     @staticmethod
     def buscar_por_dni(dni):
-        """Busca un cliente por DNI y devuelve el objeto."""
+        """Busca un cliente por DNI y devuelve el objeto (desde la cache si está al día)."""
         conexion = conectar_bd()
+        CACHE_OBJETOS.verificar(conexion)
+        c = CACHE_OBJETOS.obtener_por_clave(Cliente, ("dni", dni))
+        if c: return c
         fila = conexion.execute("SELECT * FROM clientes WHERE dni = ?", (dni,)).fetchone()
         conexion.close()
-        if fila:
-            c = Cliente(fila['nombre'], fila['apellido'], fila['dni'], fila['email'], fila['activo'])
-            c.id_bd = fila['id']
-            return c
+        if fila: return Cliente._desde_datos(fila['id'], fila['nombre'], fila['apellido'], fila['dni'], fila['email'], fila['activo'])
         return None
 
+# Catálogo de tipos de movimiento (tabla tipos_movimiento): código -> (nombre, clase, sentido)
+# - clase: agrupa los tipos en los totales del Panel de Análisis.
+# - sentido: +1 acredita la cuenta, -1 la debita.
+MOV_OTRO = 0  # Tipos desconocidos de datos viejos
+MOV_DEPOSITO, MOV_EXTRACCION, MOV_TRANSF_ENVIADA, MOV_TRANSF_RECIBIDA, \
+    MOV_DEBITO_PF, MOV_ACREDITACION_PF, MOV_MANTENIMIENTO = range(1, 8)
+CATALOGO_MOVIMIENTOS = {
+    MOV_OTRO: ("Otro", "otro", 0),
+    MOV_DEPOSITO: ("Depósito", "deposito", 1),
+    MOV_EXTRACCION: ("Extracción", "extraccion", -1),
+    MOV_TRANSF_ENVIADA: ("Transferencia Enviada", "transferencia", -1),
+    MOV_TRANSF_RECIBIDA: ("Transferencia Recibida", "transferencia", 1),
+    MOV_DEBITO_PF: ("Débito Plazo Fijo", "plazo_fijo", -1),
+    MOV_ACREDITACION_PF: ("Acreditación Plazo Fijo", "deposito", 1),
+    MOV_MANTENIMIENTO: ("Mantenimiento Cuenta", "otro", -1),
+}
+# Nombre -> código, y los tipos que registra el sistema (sin "Otro")
+CODIGOS_MOVIMIENTO = {nombre: codigo for codigo, (nombre, _, _) in CATALOGO_MOVIMIENTOS.items()}
+TIPOS_MOVIMIENTO = tuple(nombre for codigo, (nombre, _, _) in CATALOGO_MOVIMIENTOS.items() if codigo != MOV_OTRO)
+
+def codigos_movimiento(filtro):
+    """Códigos de los tipos cuyo nombre contiene el filtro ("Transferencia" -> enviadas y recibidas)."""
+    return [codigo for codigo, (nombre, _, _) in CATALOGO_MOVIMIENTOS.items() if filtro in nombre]
+
 class Movimientos:
-    def __init__(self, monto, tipo, id_cuenta_bd, descripcion=None, cta_origen=None, cta_destino=None, fecha=None, id_bd=None):
+    def __init__(self, monto, tipo_codigo, id_cuenta_bd, descripcion=None, cta_origen=None, cta_destino=None, fecha=None, id_bd=None):
         self.id_bd = id_bd
         self.id_cuenta_bd = id_cuenta_bd
         self.fecha = fecha if fecha else datetime.now()
         self.monto = monto
-        self.tipo = tipo
+        self.tipo_codigo = tipo_codigo
+        self.tipo = CATALOGO_MOVIMIENTOS[tipo_codigo][0]
         self.descripcion = descripcion
         self.cuenta_origen = cta_origen
         self.cuenta_destino = cta_destino
 
     def guardar(self):
         """Registra el movimiento en el historial."""
-        conexion = conectar_bd()
-        try:
+        with transaccion() as conexion:
             cursor = conexion.execute("""
-                INSERT INTO movimientos (id_cuenta, fecha, monto, tipo, descripcion, nro_cuenta_origen, nro_cuenta_destino)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (self.id_cuenta_bd, self.fecha, self.monto, self.tipo, self.descripcion, self.cuenta_origen, self.cuenta_destino))
-            conexion.commit()
-            self.id_bd = cursor.lastrowid
-        finally:
-            conexion.close()
+                INSERT INTO movimientos (id_cuenta, fecha, monto, tipo, tipo_codigo, descripcion, nro_cuenta_origen, nro_cuenta_destino)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (self.id_cuenta_bd, self.fecha, self.monto, self.tipo, self.tipo_codigo, self.descripcion,
+                      self.cuenta_origen, self.cuenta_destino))
+        self.id_bd = cursor.lastrowid
 
 class CuentaBase(ABC):
     def __init__(self, numero, titular, categoria, saldo=0, id_bd=None):
         self.numero = numero
         self.titular = titular
         self.categoria = categoria 
-        self._saldo = saldo
+        self._saldo = saldo  # En centavos
         self.id_bd = id_bd
     
     @property
@@ -222,124 +978,151 @@ class CuentaBase(ABC):
 
     def guardar(self):
         """Guarda la cuenta en la BD."""
-        conexion = conectar_bd()
         tipo_str = "CA" if isinstance(self, CajaAhorro) else "CC"
         limite = getattr(self, 'limite_descubierto', None)
         costo = getattr(self, 'costo_mantenimiento', None)
         f_creacion = date.today()
-        try:
+        with transaccion() as conexion:
             cursor = conexion.execute("""
                 INSERT INTO cuentas (numero, saldo, tipo_cuenta, categoria, id_cliente, 
                                   limite_descubierto, costo_mantenimiento, fecha_creacion) 
                                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                                 """, (self.numero, self._saldo, tipo_str, self.categoria, self.titular.id_bd, 
                                       limite, costo, f_creacion))
-            conexion.commit()
-            self.id_bd = cursor.lastrowid
-        finally: conexion.close()
+        self.id_bd = cursor.lastrowid
+        CACHE_OBJETOS.registrar(self, ("numero", self.numero))
+        CACHE_OBJETOS.olvidar_lista(("cuentas", self.titular.id_bd))  # El cliente tiene una cuenta más
         return self
     
-    def _actualizar_saldo_bd(self):
-        """Actualización rápida del saldo."""
-        if self.id_bd:
+    def _aplicar_delta(self, conexion, delta, con_descubierto=True, forzar=False):
+        """
+        Suma `delta` al saldo en la BD (saldo = saldo + ?, no el saldo en memoria), así dos programas
+        que operan la misma cuenta no se pisan. En un débito el WHERE vuelve a verificar los fondos
+        contra el saldo real (con o sin descubierto), salvo con forzar=True (cargos del banco).
+        Deja en memoria el saldo de la BD. Devuelve False si no alcanzaron los fondos.
+        """
+        controlar = delta < 0 and not forzar
+        if not self.id_bd:  # Cuenta todavía sin guardar: solo en memoria
+            if controlar and not (self.puede_extraer(-delta) if con_descubierto else self._saldo + delta >= 0):
+                return False
+            self._saldo += delta
+            return True
+        fila = conexion.execute("""
+            UPDATE cuentas SET saldo = saldo + ?
+            WHERE id = ? AND (NOT ? OR saldo + ? >= CASE WHEN ? THEN -COALESCE(limite_descubierto, 0) ELSE 0 END)
+            RETURNING saldo
+        """, (delta, self.id_bd, controlar, delta, con_descubierto)).fetchone()
+        aplicado = fila is not None
+        if not aplicado:  # Fondos insuficientes: se trae el saldo real para que la instancia no quede vieja
+            fila = conexion.execute("SELECT saldo FROM cuentas WHERE id = ?", (self.id_bd,)).fetchone()
+        if fila: self._saldo = fila['saldo']
+        CACHE_OBJETOS.registrar(self)  # Write-through: la instancia en cache queda al día
+        return aplicado
+
+    @staticmethod
+    @contextmanager
+    def _operacion_atomica(*cuentas):
+        """
+        Transacción para una operación de dinero: saldos y movimientos se graban juntos o nada.
+        Si algo falla, después de deshacer la BD los saldos en memoria se vuelven a leer de la BD
+        (no se restaura una copia anterior: otro hilo pudo haber escrito un saldo más nuevo).
+        """
+        saldos_previos = [(c, c._saldo) for c in cuentas]
+        try:
+            with transaccion() as conexion:
+                yield conexion
+        except BaseException:
+            for c, saldo in saldos_previos:
+                if c.id_bd: c._releer_saldo()
+                else: c._saldo = saldo  # Cuenta sin guardar: solo existe en memoria
+            raise
+
+    def _releer_saldo(self):
+        """Trae el saldo actual de la BD (si no se puede leer, la instancia queda como está)."""
+        try:
             conexion = conectar_bd()
-            try:
-                conexion.execute("UPDATE cuentas SET saldo = ? WHERE id = ?", (self._saldo, self.id_bd))
-                conexion.commit()
-            finally: conexion.close()
+            fila = conexion.execute("SELECT saldo FROM cuentas WHERE id = ?", (self.id_bd,)).fetchone()
+            conexion.close()
+        except sqlite3.Error: return
+        if fila: self._saldo = fila['saldo']
     
     def depositar(self, monto):
         if monto <= 0: return None
-        self._saldo += monto
-        self._actualizar_saldo_bd()
-        mov = Movimientos(monto, "Depósito", self.id_bd)
-        mov.guardar()
+        with self._operacion_atomica(self) as conexion:
+            self._aplicar_delta(conexion, monto)
+            mov = Movimientos(monto, MOV_DEPOSITO, self.id_bd)
+            mov.guardar()
         return mov
     
     def extraer(self, monto):
-        if monto > 0 and self.puede_extraer(monto):
-            self._saldo -= monto
-            self._actualizar_saldo_bd()
-            mov = Movimientos(monto, "Extracción", self.id_bd)
+        # Los fondos los controla la BD (el saldo en memoria puede estar viejo si otro programa depositó)
+        if monto <= 0: return None
+        with self._operacion_atomica(self) as conexion:
+            if not self._aplicar_delta(conexion, -monto): return None
+            mov = Movimientos(monto, MOV_EXTRACCION, self.id_bd)
             mov.guardar()
-            return mov
+        return mov
     
     def transferir(self, monto, destino, comision=0):
         if self.numero == destino.numero: return (None, None)
-        monto_total = monto + comision
-        if monto > 0 and self.puede_extraer(monto_total):
-            self._saldo -= monto_total
-            destino._saldo += monto
-            self._actualizar_saldo_bd()
-            destino._actualizar_saldo_bd()
-            mov_origen = Movimientos(monto, "Transferencia Enviada", self.id_bd, cta_origen=self.numero, cta_destino=destino.numero)
+        if monto <= 0: return (None, None)
+        # Débito, crédito y los dos movimientos en una única transacción; los fondos los controla la BD
+        with self._operacion_atomica(self, destino) as conexion:
+            if not self._aplicar_delta(conexion, -(monto + comision)): return (None, None)
+            destino._aplicar_delta(conexion, monto)
+            mov_origen = Movimientos(monto, MOV_TRANSF_ENVIADA, self.id_bd, cta_origen=self.numero, cta_destino=destino.numero)
             mov_origen.guardar()
-            mov_destino = Movimientos(monto, "Transferencia Recibida", destino.id_bd, cta_origen=self.numero, cta_destino=destino.numero)
+            mov_destino = Movimientos(monto, MOV_TRANSF_RECIBIDA, destino.id_bd, cta_origen=self.numero, cta_destino=destino.numero)
             mov_destino.guardar()
-            return (mov_origen, mov_destino)
-        return (None, None)
+        return (mov_origen, mov_destino)
 
     # --- LÓGICA DE INVERSIONES (PLAZO FIJO) ---
     def constituir_plazo_fijo(self, monto, dias, tasa_anual):
-        """Crea un PF descontando saldo real (no descubierto)."""
-        if monto <= 0 or self._saldo < monto:
+        """Crea un PF descontando saldo real (no descubierto); los fondos los controla la BD."""
+        if monto <= 0 or dias <= 0:
             return False
         
-        interes = (monto * tasa_anual / 365) * dias
+        interes = round(monto * tasa_anual * dias / 365)  # En centavos
         monto_final = monto + interes
         f_creacion = date.today()
         f_vencimiento = f_creacion + timedelta(days=dias)
         
-        conexion = conectar_bd()
         try:
-            # Insertamos el PF
-            conexion.execute("""
-                INSERT INTO plazos_fijos (id_cuenta, monto_inicial, dias, tasa_interes, 
-                                          monto_final, fecha_creacion, fecha_vencimiento, estado)
-                VALUES (?, ?, ?, ?, ?, ?, ?, 'ACTIVO')
-            """, (self.id_bd, monto, dias, tasa_anual, monto_final, f_creacion, f_vencimiento))
-            
-            # Descontamos saldo
-            nuevo_saldo = self._saldo - monto
-            conexion.execute("UPDATE cuentas SET saldo = ? WHERE id = ?", (nuevo_saldo, self.id_bd))
-            
-            # Guardamos movimiento
-            desc = f"Constitución PF {dias} días"
-            conexion.execute("""
-                INSERT INTO movimientos (id_cuenta, fecha, monto, tipo, descripcion, nro_cuenta_origen, nro_cuenta_destino)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (self.id_bd, datetime.now(), monto, "Débito Plazo Fijo", desc, None, None))
-            
-            conexion.commit()
-            self._saldo = nuevo_saldo
+            with self._operacion_atomica(self) as conexion:
+                # Descontamos saldo (sin usar descubierto; la BD verifica el saldo real)
+                if not self._aplicar_delta(conexion, -monto, con_descubierto=False): return False
+
+                # Insertamos el PF
+                conexion.execute("""
+                    INSERT INTO plazos_fijos (id_cuenta, monto_inicial, dias, tasa_interes, 
+                                              monto_final, fecha_creacion, fecha_vencimiento, estado)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 'ACTIVO')
+                """, (self.id_bd, monto, dias, tasa_anual, monto_final, f_creacion, f_vencimiento))
+                
+                # Guardamos movimiento
+                Movimientos(monto, MOV_DEBITO_PF, self.id_bd, f"Constitución PF {dias} días").guardar()
             return True
-        except Exception as e:
-            print(f"Error PF: {e}")
+        except Exception:
+            log.exception("Error al constituir un plazo fijo en la cuenta %s", self.numero)
             return False
-        finally: conexion.close()
 
     def cobrar_plazo_fijo(self, id_pf):
-        """Cobra un PF si ya venció."""
-        conexion = conectar_bd()
-        pf = conexion.execute("SELECT * FROM plazos_fijos WHERE id = ?", (id_pf,)).fetchone()
-        if not pf or pf['estado'] != 'ACTIVO':
-            conexion.close()
-            return "No válido"
-        if date.today() < pf['fecha_vencimiento']:
-            conexion.close()
-            return "Aún no vence"
-        
-        monto_final = pf['monto_final']
-        self._saldo += monto_final
-        self._actualizar_saldo_bd()
-        
-        conexion.execute("UPDATE plazos_fijos SET estado = 'COBRADO' WHERE id = ?", (id_pf,))
-        desc = f"Cobro PF N°{id_pf} (Interés: ${monto_final - pf['monto_inicial']:.2f})"
-        
-        mov = Movimientos(monto_final, "Acreditación Plazo Fijo", self.id_bd, desc)
-        mov.guardar()
-        conexion.commit()
-        conexion.close()
+        """Cobra un PF si ya venció (acreditación, movimiento y estado en una sola transacción)."""
+        with self._operacion_atomica(self) as conexion:
+            pf = conexion.execute("SELECT * FROM plazos_fijos WHERE id = ?", (id_pf,)).fetchone()
+            if not pf or pf['estado'] != 'ACTIVO':
+                return "No válido"
+            if date.today() < pf['fecha_vencimiento']:
+                return "Aún no vence"
+            
+            monto_final = pf['monto_final']
+            self._aplicar_delta(conexion, monto_final)
+            
+            conexion.execute("UPDATE plazos_fijos SET estado = 'COBRADO' WHERE id = ?", (id_pf,))
+            desc = f"Cobro PF N°{id_pf} (Interés: {formatear_pesos(monto_final - pf['monto_inicial'])})"
+            
+            mov = Movimientos(monto_final, MOV_ACREDITACION_PF, self.id_bd, desc)
+            mov.guardar()
         return "OK"
 
     def obtener_mis_plazos_fijos(self):
@@ -352,8 +1135,11 @@ class CuentaBase(ABC):
     # --- MÉTODOS DE RECUPERACIÓN (Active Record) ---
     @staticmethod
     def buscar_por_numero(numero):
-        """Recupera una cuenta por su número único."""
+        """Recupera una cuenta por su número único (desde la cache si está al día)."""
         conexion = conectar_bd()
+        CACHE_OBJETOS.verificar(conexion)
+        c = CACHE_OBJETOS.obtener_por_clave(CuentaBase, ("numero", numero))
+        if c: return c
         fila = conexion.execute("""
             SELECT cuentas.*, clientes.nombre, clientes.apellido, clientes.dni, clientes.email, clientes.activo
             FROM cuentas JOIN clientes ON cuentas.id_cliente = clientes.id
@@ -365,39 +1151,56 @@ class CuentaBase(ABC):
     
     @staticmethod
     def recuperar_por_cliente(id_cliente):
-        """Recupera todas las cuentas de un cliente."""
+        """Recupera todas las cuentas de un cliente (desde la cache si están al día)."""
         conexion = conectar_bd()
+        CACHE_OBJETOS.verificar(conexion)
+        ids = CACHE_OBJETOS.lista(("cuentas", id_cliente))
+        if ids is not None:
+            cuentas = [CACHE_OBJETOS.obtener(CuentaBase, i) for i in ids]
+            if all(cuentas): return cuentas
         fila_cli = conexion.execute("SELECT * FROM clientes WHERE id = ?", (id_cliente,)).fetchone()
         if not fila_cli: 
             conexion.close()
             return []
-        titular = Cliente(fila_cli['nombre'], fila_cli['apellido'], fila_cli['dni'], fila_cli['email'], fila_cli['activo'], fila_cli['id'])
+        titular = Cliente._desde_datos(fila_cli['id'], fila_cli['nombre'], fila_cli['apellido'], fila_cli['dni'],
+                                       fila_cli['email'], fila_cli['activo'])
         filas = conexion.execute("SELECT * FROM cuentas WHERE id_cliente = ?", (id_cliente,)).fetchall()
         conexion.close()
         cuentas = []
         for fila in filas:
             cuentas.append(CuentaBase._reconstruir_desde_fila(fila, titular_ya_cargado=titular))
+        CACHE_OBJETOS.guardar_lista(("cuentas", id_cliente), [c.id_bd for c in cuentas if c])
         return cuentas
     
     @staticmethod
     def _reconstruir_desde_fila(fila, titular_ya_cargado=None):
-        """Helper para convertir fila de BD a Objeto Python."""
+        """
+        Helper para convertir fila de BD a Objeto Python.
+        Si la cuenta ya está en memoria se actualiza esa misma instancia (identity map).
+        """
         if titular_ya_cargado: titular = titular_ya_cargado
         else:
-            titular = Cliente(fila['nombre'], fila['apellido'], fila['dni'], fila['email'], fila['activo'])
-            titular.id_bd = fila['id_cliente']
+            titular = Cliente._desde_datos(fila['id_cliente'], fila['nombre'], fila['apellido'], fila['dni'],
+                                           fila['email'], fila['activo'])
         tipo = fila['tipo_cuenta']
         categoria = fila['categoria']
-        if tipo == 'CA': c = CajaAhorro(fila['numero'], titular, categoria, fila['saldo'])
+        c = CACHE_OBJETOS.existente(CuentaBase, fila['id'])
+        if c is not None:
+            c.titular, c.categoria, c._saldo = titular, categoria, fila['saldo']
+            if tipo == 'CC': c.limite_descubierto, c.costo_mantenimiento = fila['limite_descubierto'], fila['costo_mantenimiento']
+        elif tipo == 'CA': c = CajaAhorro(fila['numero'], titular, categoria, fila['saldo'])
         elif tipo == 'CC': c = CuentaCorriente(fila['numero'], titular, categoria, fila['saldo'], fila['limite_descubierto'], fila['costo_mantenimiento'])
         else: return None
         c.id_bd = fila['id']
-        return c
+        return CACHE_OBJETOS.registrar(c, ("numero", c.numero))
 
 class CajaAhorro(CuentaBase):
     def puede_extraer(self, monto): return monto <= self._saldo
     def aplicar_mantenimiento(self): return 0
 
+# Descuento en el costo de mantenimiento para cuentas de categoría Empresa (en %)
+DESCUENTO_MANTENIMIENTO_EMPRESA = 10
+
 class CuentaCorriente(CuentaBase):
     def __init__(self, numero, titular, categoria, saldo=0, limite_descubierto=0, costo_mantenimiento=0):
         super().__init__(numero, titular, categoria, saldo)
@@ -405,74 +1208,543 @@ class CuentaCorriente(CuentaBase):
         self.costo_mantenimiento = costo_mantenimiento
     def puede_extraer(self, monto): return monto <= (self._saldo + self.limite_descubierto)
     def aplicar_mantenimiento(self):
-        descuento = 0.10 if self.categoria == "Empresa" else 0.0
-        costo_final = self.costo_mantenimiento * (1 - descuento)
-        self._saldo -= costo_final
-        self._actualizar_saldo_bd()
+        descuento = DESCUENTO_MANTENIMIENTO_EMPRESA if self.categoria == "Empresa" else 0
+        costo_final = self.costo_mantenimiento * (100 - descuento) // 100
+        with self._operacion_atomica(self) as conexion:
+            self._aplicar_delta(conexion, -costo_final, forzar=True)  # El cargo se cobra aunque no haya fondos
+            Movimientos(costo_final, MOV_MANTENIMIENTO, self.id_bd).guardar()
         return costo_final
 
+def _iterar_consulta(sql, parametros, tamanio_lote):
+    """Recorre el resultado de una consulta con fetchmany, sin traer todas las filas a memoria."""
+    cursor = conectar_bd().execute(sql, parametros)
+    try:
+        while True:
+            filas = cursor.fetchmany(tamanio_lote)
+            if not filas: break
+            yield from filas
+    finally:
+        cursor.close()
+
+# --- HISTORIAL DE MOVIMIENTOS ---
+
+# Filas por página del historial paginado
+TAMANIO_PAGINA_MOVIMIENTOS = 200
+
+def _filtros_movimientos(ids_cuenta, desde, hasta, tipo):
+    """WHERE y parámetros de los filtros del historial (cuentas, rango de fechas y tipo)."""
+    where = " WHERE 1 = 1"
+    p = []
+    if ids_cuenta is not None:
+        where += f" AND id_cuenta IN ({','.join(['?'] * len(ids_cuenta))})"
+        p.extend(ids_cuenta)
+    if desde:
+        where += " AND fecha >= ?"
+        p.append(datetime.combine(desde, datetime.min.time()))
+    if hasta:
+        where += " AND fecha <= ?"
+        p.append(datetime.combine(hasta, datetime.max.time()))
+    if tipo and tipo != "Todos":
+        codigos = codigos_movimiento(tipo)
+        where += f" AND tipo_codigo IN ({','.join(['?'] * len(codigos))})"
+        p.extend(codigos)
+    return where, p
+
+def _crear_cursor(fila):
+    """Cursor de paginación: fecha (como se guarda en la BD) e id de la última fila de la página."""
+    return f"{fila['fecha'].isoformat(' ')}|{fila['id']}"
+
+def _leer_cursor(cursor):
+    """Devuelve [fecha, id] de un cursor de _crear_cursor. ValueError si es inválido."""
+    fecha, _, id_mov = cursor.rpartition("|")
+    if not fecha: raise ValueError(f"Cursor inválido: {cursor}")
+    datetime.fromisoformat(fecha)  # Valida el formato
+    return [fecha, int(id_mov)]
+
+# --- BUSCADOR ---
+
+# Máximo de resultados que devuelve el buscador en vivo
+LIMITE_BUSQUEDA = 200
+
+def _consulta_fts(termino):
+    """
+    Convierte lo que escribe el usuario en una consulta FTS5 por prefijo:
+    'per 301' -> '"per"* "301"*' (todas las palabras, cada una como comienzo de palabra).
+    Devuelve None si no hay nada buscable.
+    """
+    palabras = [p for p in termino.split() if any(ch.isalnum() for ch in p)]
+    if not palabras: return None
+    return " ".join('"' + p.replace('"', '""') + '"*' for p in palabras)
+
+def _hay_busqueda_fts(conexion):
+    """True si la BD tiene los índices FTS5 (la migración los omite si SQLite no trae FTS5)."""
+    return conexion.execute(
+        "SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE name = 'busqueda_cuentas')").fetchone()[0] == 1
+
+def busqueda_fts_disponible():
+    """True si el buscador usa FTS5 (por comienzo de palabra) y no LIKE."""
+    conexion = conectar_bd()
+    disponible = _hay_busqueda_fts(conexion)
+    conexion.close()
+    return disponible
+
+def _palabras_busqueda(texto):
+    """Palabras en minúsculas y sin acentos, como las separa el tokenizador unicode61 de FTS5."""
+    descompuesto = unicodedata.normalize("NFD", texto.lower())
+    return re.findall(r"[^\W_]+", "".join(ch for ch in descompuesto if not unicodedata.combining(ch)))
+
+def coincide_busqueda(campos, termino, fts=True):
+    """
+    Reproduce en memoria el criterio del buscador sobre los campos de un resultado
+    (ej: número, DNI, nombre, apellido), para filtrar resultados ya traídos sin consultar.
+    - Con FTS5: cada palabra del término debe ser comienzo de alguna palabra de los campos.
+    - Sin FTS5: el término tiene que aparecer en algún campo (como el LIKE '%...%').
+    """
+    if fts and _consulta_fts(termino):
+        palabras = _palabras_busqueda(" ".join(c or "" for c in campos))
+        return all(any(p.startswith(b) for p in palabras) for b in _palabras_busqueda(termino))
+    termino = termino.lower()
+    return any(termino in (c or "").lower() for c in campos)
+
+# --- PANEL DE ANÁLISIS ---
+
+def _sql_clase_movimiento(columna="m.tipo_codigo"):
+    """Expresión SQL que clasifica cada movimiento según la clase de CATALOGO_MOVIMIENTOS."""
+    casos = " ".join(f"WHEN {codigo} THEN '{clase}'" for codigo, (_, clase, _) in CATALOGO_MOVIMIENTOS.items())
+    return f"CASE {columna} {casos} ELSE 'otro' END"
+
+# Agrupaciones disponibles en Banco.obtener_totales_analisis (se calculan sobre resumen_diario)
+AGRUPACIONES_ANALISIS = {
+    "clase": _sql_clase_movimiento("r.tipo_codigo"),
+    "categoria": "r.categoria",
+    "dia": "r.dia",
+    "semana": "strftime('%Y-%W', r.dia)",
+    "mes": "substr(r.dia, 1, 7)",
+}
+
+def _filtros_analisis(filtros, resumen=False):
+    """
+    WHERE y parámetros comunes al detalle y a los totales del Panel de Análisis.
+    - resumen=False: sobre movimientos m JOIN cuentas c (detalle).
+    - resumen=True: sobre resumen_diario r (totales), comparando días enteros.
+    El filtro de tipo ("Transferencia", "Plazo Fijo"...) se traduce a los códigos de los tipos
+    que lo contienen, así se compara por igualdad (usa el índice) en lugar de LIKE '%...%'.
+    """
+    if resumen:
+        where = " WHERE r.dia BETWEEN ? AND ?"
+        params = [filtros['desde'].isoformat(), filtros['hasta'].isoformat()]
+    else:
+        where = " WHERE m.fecha BETWEEN ? AND ?"
+        params = [datetime.combine(filtros['desde'], datetime.min.time()),
+                  datetime.combine(filtros['hasta'], datetime.max.time())]
+    # Filtro Categoria Cliente
+    if filtros['tipo_cliente'] != "Todos":
+        where += " AND r.categoria = ?" if resumen else " AND c.categoria = ?"
+        params.append(filtros['tipo_cliente'])
+    # Filtro Tipo Movimiento
+    if filtros['tipo_movimiento'] != "Todos":
+        codigos = codigos_movimiento(filtros['tipo_movimiento'])
+        where += f" AND {'r' if resumen else 'm'}.tipo_codigo IN ({','.join('?' * len(codigos))})"
+        params.extend(codigos)
+    return where, params
+
+def _acumular_resumen(conexion):
+    """
+    Vuelca a resumen_diario los movimientos con id mayor a la marca de avance y la mueve.
+    Debe llamarse dentro de una transacción. Devuelve la nueva marca (último id resumido).
+    """
+    desde_id = conexion.execute("SELECT ultimo_id_movimiento FROM resumen_estado WHERE id = 1").fetchone()[0]
+    hasta_id = conexion.execute("SELECT COALESCE(MAX(id), 0) FROM movimientos").fetchone()[0]
+    if hasta_id <= desde_id: return desde_id
+    # Si lo llama la migración 7 (BD anterior a la 8) el resumen todavía se agrupa por el texto del tipo
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(resumen_diario)")}
+    tipo = "tipo_codigo" if "tipo_codigo" in columnas else "tipo"
+    # "WHERE true" es obligatorio en SQLite para usar ON CONFLICT con INSERT ... SELECT
+    conexion.execute(f"""
+        INSERT INTO resumen_diario (dia, categoria, {tipo}, cantidad, total)
+        SELECT date(m.fecha), c.categoria, m.{tipo}, COUNT(*), SUM(m.monto)
+        FROM movimientos m JOIN cuentas c ON m.id_cuenta = c.id
+        WHERE true AND m.id > ? AND m.id <= ?
+        GROUP BY 1, 2, 3
+        ON CONFLICT (dia, categoria, {tipo}) DO UPDATE SET
+            cantidad = cantidad + excluded.cantidad, total = total + excluded.total
+    """, (desde_id, hasta_id))
+    conexion.execute("UPDATE resumen_estado SET ultimo_id_movimiento = ? WHERE id = 1", (hasta_id,))
+    return hasta_id
+
+def actualizar_resumen_diario():
+    """
+    Pone al día resumen_diario con los movimientos nuevos (desde la marca de avance).
+    Se llama antes de cada consulta de totales: si el resumen ya está al día solo hace una lectura
+    y no toma el lock de escritura (BEGIN IMMEDIATE), que trabaría a los cajeros.
+    """
+    conexion = conectar_bd()
+    fila = conexion.execute("""
+        SELECT (SELECT ultimo_id_movimiento FROM resumen_estado WHERE id = 1),
+               (SELECT COALESCE(MAX(id), 0) FROM movimientos)
+    """).fetchone()
+    conexion.close()
+    if fila[1] <= fila[0]: return fila[0]
+    with transaccion() as conexion:
+        return _acumular_resumen(conexion)
+
+# --- REGLAS DE ALTA DE CUENTAS ---
+# Las usan tanto la interfaz (Crear Cuenta) como la importación masiva.
+
+TIPOS_CUENTA = {"Caja de Ahorro": "CA", "Cuenta Corriente": "CC"}
+CATEGORIAS = ("Persona", "Empresa")
+
+def validar_datos_alta(datos):
+    """Valida los datos de un alta (sin tocar la BD). Devuelve el mensaje de error o None si está OK."""
+    if not datos.get("nombre") or not datos.get("apellido") or not datos.get("dni"):
+        return "Faltan datos obligatorios."
+    if not str(datos["dni"]).isdigit():
+        return "DNI inválido."
+    if datos.get("tipo_cuenta") not in TIPOS_CUENTA:
+        return f"Tipo de cuenta inválido: {datos.get('tipo_cuenta')}"
+    if datos.get("categoria") not in CATEGORIAS:
+        return f"Categoría inválida: {datos.get('categoria')}"
+    return None
+
+def mensaje_cuenta_duplicada(tipo_cuenta, categoria):
+    return f"Ya posee una {tipo_cuenta} ({categoria})."
+
+# --- NUMERACIÓN DE CUENTAS ---
+
+# Números de cuenta que se reservan de una vez (los que no se lleguen a usar quedan como saltos)
+BLOQUE_NUMEROS_CUENTA = 20
+
+class ReservaSecuencia:
+    """
+    Entrega números de una secuencia (tabla secuencias) reservándolos por bloques:
+    un único UPDATE ... RETURNING aparta `tamanio_bloque` números y luego se reparten desde
+    memoria. Varios objetos Banco, hilos o programas nunca reciben el mismo número y la BD
+    se escribe una vez por bloque, no por cuenta.
+    """
+    def __init__(self, nombre, tamanio_bloque):
+        self.nombre = nombre
+        self.tamanio_bloque = tamanio_bloque
+        self._lock = threading.Lock()
+        self._proximo, self._ultimo = 1, 0  # Bloque en memoria: [_proximo, _ultimo]
+        self._ruta = None
+
+    def reservar(self, cantidad):
+        """Aparta `cantidad` números consecutivos en la BD y devuelve el primero."""
+        with transaccion() as conexion:
+            ultimo = conexion.execute("UPDATE secuencias SET valor = valor + ? WHERE nombre = ? RETURNING valor",
+                                      (cantidad, self.nombre)).fetchone()[0]
+        return ultimo - cantidad + 1
+
+    def siguiente(self):
+        # Dentro de otra transacción no se usa el bloque en memoria: si esa transacción se
+        # deshace, la reserva también, y los números del bloque podrían repetirse.
+        if conectar_bd()._conexion.nivel_transaccion > 0: return self.reservar(1)
+        with self._lock:
+            if self._proximo > self._ultimo or self._ruta != RUTA_BD:  # El bloque es de una BD concreta
+                self._proximo = self.reservar(self.tamanio_bloque)
+                self._ultimo = self._proximo + self.tamanio_bloque - 1
+                self._ruta = RUTA_BD
+            numero = self._proximo
+            self._proximo += 1
+            return numero
+
+SECUENCIA_CUENTAS = ReservaSecuencia("cuentas", BLOQUE_NUMEROS_CUENTA)
+
 # --- CLASE PRINCIPAL: BANCO ---
 
+# Parámetros globales por defecto (importes en centavos), si la tabla parametros está vacía
+CONFIGURACION_POR_DEFECTO = {"comision_transferencia": 5000, "tasa_anual_pf": 0.45,
+                             "costo_mantenimiento_cc": 10000, "limite_descubierto_cc": 1000000}
+
+def _parametro(columna):
+    """
+    Propiedad de Banco para un parámetro global: se lee de la configuración en memoria,
+    que se recarga sola si otro programa la cambió en la BD (ver Banco._configuracion).
+    Asignarla solo cambia el valor en memoria; se graba con guardar_configuracion_db().
+    """
+    def leer(self): return self._configuracion()[columna]
+    def escribir(self, valor): self._config[columna] = valor
+    return property(leer, escribir)
+
 class Banco:
-    def __init__(self, nombre):
+    comision_transferencia = _parametro("comision_transferencia")
+    default_tasa_anual_pf = _parametro("tasa_anual_pf")
+    default_costo_mantenimiento_cc = _parametro("costo_mantenimiento_cc")
+    default_limite_descubierto_cc = _parametro("limite_descubierto_cc")
+    _guardados = 0  # Cambios de configuración hechos en este proceso (data_version no ve los propios)
+
+    def __init__(self, nombre, perfil_bd=None):
         self.nombre = nombre
+        if perfil_bd: configurar_perfil_bd(perfil_bd)
+        asegurar_esquema()
+        self._control_config = None  # (conexión, PRAGMA data_version) de la última verificación
         self.cargar_configuracion_db()
     
     def cargar_configuracion_db(self):
         """Carga parámetros globales (tasas, contadores)."""
         conexion = conectar_bd()
         fila = conexion.execute("SELECT * FROM parametros WHERE id=1").fetchone()
+        secuencia = conexion.execute("SELECT valor FROM secuencias WHERE nombre = 'cuentas'").fetchone()
         conexion.close()
         if fila:
-            self.comision_transferencia = fila['comision_transferencia']
-            self.default_tasa_anual_pf = fila['tasa_anual_pf']
-            self.default_costo_mantenimiento_cc = fila['costo_mantenimiento_cc']
-            self.default_limite_descubierto_cc = fila['limite_descubierto_cc']
-            self.ultimo_nro_cuenta = fila['ultimo_nro_cuenta']
+            self._config = {columna: fila[columna] for columna in CONFIGURACION_POR_DEFECTO}
+            self._version_config = fila['version']
+            self.ultimo_nro_cuenta = secuencia[0] if secuencia else 0
         else:
-            self.comision_transferencia = 50.0
-            self.default_tasa_anual_pf = 0.45
-            self.default_costo_mantenimiento_cc = 100.0
-            self.default_limite_descubierto_cc = 10000.0
+            self._config = dict(CONFIGURACION_POR_DEFECTO)
+            self._version_config = None
             self.ultimo_nro_cuenta = 0
+
+    def _configuracion(self):
+        """
+        Parámetros en memoria, recargados solo si cambiaron en la BD.
+        PRAGMA data_version (no lee tablas) dice si otra conexión escribió algo; recién entonces
+        se compara parametros.version, y solo si la versión cambió se relee la fila completa.
+        Los cambios de otro objeto Banco de este mismo proceso se detectan con Banco._guardados.
+        """
+        conexion = conectar_bd()
+        conn = conexion._conexion
+        control = (id(conn), conn.execute("PRAGMA data_version").fetchone()[0], Banco._guardados)
+        if control != self._control_config:
+            fila = conn.execute("SELECT version FROM parametros WHERE id = 1").fetchone()
+            if fila and fila[0] != self._version_config: self.cargar_configuracion_db()
+            self._control_config = control
+        return self._config
     
     def guardar_configuracion_db(self):
-        conexion = conectar_bd()
-        try:
-            conexion.execute("""
-                UPDATE parametros SET comision_transferencia=?, tasa_anual_pf=?, costo_mantenimiento_cc=?, limite_descubierto_cc=?, ultimo_nro_cuenta = ? 
-                WHERE id = 1
-            """, (self.comision_transferencia, self.default_tasa_anual_pf, self.default_costo_mantenimiento_cc, self.default_limite_descubierto_cc, self.ultimo_nro_cuenta))
-            conexion.commit()
-        finally: conexion.close()
+        """Graba los parámetros (no el contador de cuentas) e incrementa su versión."""
+        c = self._config
+        with transaccion() as conexion:
+            fila = conexion.execute("""
+                UPDATE parametros SET comision_transferencia=?, tasa_anual_pf=?, costo_mantenimiento_cc=?, limite_descubierto_cc=?,
+                                      version = version + 1
+                WHERE id = 1 RETURNING version
+            """, (c['comision_transferencia'], c['tasa_anual_pf'], c['costo_mantenimiento_cc'], c['limite_descubierto_cc'])).fetchone()
+        if fila: self._version_config = fila[0]
+        Banco._guardados += 1
     
     def generar_numero_cuenta(self):
-        self.ultimo_nro_cuenta += 1 
-        self.guardar_configuracion_db() 
+        """Siguiente número de cuenta, del bloque reservado en memoria (ver ReservaSecuencia)."""
+        self.ultimo_nro_cuenta = SECUENCIA_CUENTAS.siguiente()
         return self.ultimo_nro_cuenta
+
+    def cobrar_mantenimiento_mensual(self, periodo=None, simular=False):
+        """
+        Cobra el mantenimiento del mes a TODAS las Cuentas Corrientes de clientes activos
+        (con el descuento de Empresa) en una sola pasada de SQL y una sola transacción.
+        - periodo: 'AAAA-MM' (default: mes actual). Es idempotente: una cuenta ya cobrada
+          en el período no se vuelve a cobrar, aunque se ejecute de nuevo.
+        - simular=True: solo calcula cuántas cuentas y cuánto se cobraría, sin modificar nada.
+        Devuelve un dict con periodo, cuentas, total (centavos), segundos y simulado.
+        """
+        periodo = periodo or date.today().strftime("%Y-%m")
+        inicio = time.perf_counter()
+        pendientes = """
+            SELECT c.id AS id_cuenta,
+                   c.costo_mantenimiento * (100 - CASE WHEN c.categoria = 'Empresa' THEN ? ELSE 0 END) / 100 AS monto
+            FROM cuentas c JOIN clientes cl ON cl.id = c.id_cliente
+            WHERE c.tipo_cuenta = 'CC' AND cl.activo = 1 AND c.costo_mantenimiento > 0
+              AND NOT EXISTS (SELECT 1 FROM cobros_mantenimiento m WHERE m.id_cuenta = c.id AND m.periodo = ?)
+        """
+        parametros = (DESCUENTO_MANTENIMIENTO_EMPRESA, periodo)
+        if simular:
+            # Solo lectura: sin transaccion() (BEGIN IMMEDIATE) no traba a quienes escriben
+            conexion = conectar_bd()
+            cuentas, total = conexion.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(monto), 0) FROM ({pendientes})", parametros).fetchone()
+            conexion.close()
+        else:
+            with transaccion() as conexion:
+                # Las cuentas a cobrar se calculan una vez en una tabla temporal y de ahí salen
+                # el débito de saldos, los movimientos y el registro del período.
+                conexion.execute("CREATE TEMP TABLE IF NOT EXISTS lote_mantenimiento (id_cuenta INTEGER PRIMARY KEY, monto INTEGER NOT NULL)")
+                conexion.execute("DELETE FROM lote_mantenimiento")
+                conexion.execute(f"INSERT INTO lote_mantenimiento (id_cuenta, monto) {pendientes}", parametros)
+                cuentas, total = conexion.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(monto), 0) FROM lote_mantenimiento").fetchone()
+                ahora = datetime.now()
+                conexion.execute("""
+                    UPDATE cuentas SET saldo = saldo - (SELECT monto FROM lote_mantenimiento l WHERE l.id_cuenta = cuentas.id)
+                    WHERE id IN (SELECT id_cuenta FROM lote_mantenimiento)
+                """)
+                conexion.execute("""
+                    INSERT INTO movimientos (id_cuenta, fecha, monto, tipo, tipo_codigo, descripcion)
+                    SELECT id_cuenta, ?, monto, ?, ?, ? FROM lote_mantenimiento
+                """, (ahora, CATALOGO_MOVIMIENTOS[MOV_MANTENIMIENTO][0], MOV_MANTENIMIENTO, f"Mantenimiento {periodo}"))
+                conexion.execute("""
+                    INSERT INTO cobros_mantenimiento (id_cuenta, periodo, monto, fecha)
+                    SELECT id_cuenta, ?, monto, ? FROM lote_mantenimiento
+                """, (periodo, ahora))
+                conexion.execute("DELETE FROM lote_mantenimiento")
+        if cuentas and not simular: CACHE_OBJETOS.invalidar()  # Saldos cambiados por SQL, no por los objetos
+        return {"periodo": periodo, "cuentas": cuentas, "total": total,
+                "segundos": time.perf_counter() - inicio, "simulado": simular}
+
+    def procesar_vencimientos_plazos_fijos(self, fecha=None, tamanio_lote=1000):
+        """
+        Acredita automáticamente TODOS los plazos fijos ACTIVOS vencidos a la fecha (default: hoy).
+        Trabaja por lotes (una transacción por lote): acredita el monto final en la cuenta,
+        registra el movimiento y marca el PF como COBRADO, igual que cobrar_plazo_fijo().
+        Usa el índice (estado, fecha_vencimiento), así que si no hay vencimientos cuesta casi nada.
+        Devuelve un dict con procesados, total (centavos), lotes, segundos y por_segundo.
+        """
+        fecha = fecha or date.today()
+        inicio = time.perf_counter()
+        procesados = total = lotes = 0
+        while True:
+            with transaccion() as conexion:
+                conexion.execute("""CREATE TEMP TABLE IF NOT EXISTS lote_vencimientos (
+                    id_pf INTEGER PRIMARY KEY, id_cuenta INTEGER NOT NULL, monto_final INTEGER NOT NULL, interes INTEGER NOT NULL)""")
+                conexion.execute("CREATE INDEX IF NOT EXISTS temp.idx_lote_vencimientos_cuenta ON lote_vencimientos(id_cuenta)")
+                conexion.execute("DELETE FROM lote_vencimientos")
+                conexion.execute("""
+                    INSERT INTO lote_vencimientos (id_pf, id_cuenta, monto_final, interes)
+                    SELECT id, id_cuenta, monto_final, monto_final - monto_inicial FROM plazos_fijos
+                    WHERE estado = 'ACTIVO' AND fecha_vencimiento <= ?
+                    ORDER BY fecha_vencimiento LIMIT ?
+                """, (fecha, tamanio_lote))
+                cantidad, monto = conexion.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(monto_final), 0) FROM lote_vencimientos").fetchone()
+                if cantidad == 0: break
+                conexion.execute("""
+                    UPDATE cuentas SET saldo = saldo + (SELECT SUM(monto_final) FROM lote_vencimientos l WHERE l.id_cuenta = cuentas.id)
+                    WHERE id IN (SELECT id_cuenta FROM lote_vencimientos)
+                """)
+                conexion.execute("""
+                    INSERT INTO movimientos (id_cuenta, fecha, monto, tipo, tipo_codigo, descripcion)
+                    SELECT id_cuenta, ?, monto_final, ?, ?,
+                           printf('Cobro PF N°%d (Interés: $%d.%02d)', id_pf, interes / 100, interes % 100)
+                    FROM lote_vencimientos ORDER BY id_pf
+                """, (datetime.now(), CATALOGO_MOVIMIENTOS[MOV_ACREDITACION_PF][0], MOV_ACREDITACION_PF))
+                conexion.execute("UPDATE plazos_fijos SET estado = 'COBRADO' WHERE id IN (SELECT id_pf FROM lote_vencimientos)")
+                conexion.execute("DELETE FROM lote_vencimientos")
+            procesados += cantidad
+            total += monto
+            lotes += 1
+        if procesados: CACHE_OBJETOS.invalidar()  # Saldos cambiados por SQL, no por los objetos
+        segundos = time.perf_counter() - inicio
+        return {"procesados": procesados, "total": total, "lotes": lotes, "segundos": segundos,
+                "por_segundo": procesados / segundos if segundos else 0}
+
+    def abrir_cuenta(self, datos):
+        """
+        Alta de cliente (si no existe) + nueva cuenta, con las mismas reglas para todos:
+        datos obligatorios, cliente no dado de baja y una sola cuenta por tipo y categoría.
+        datos: dict con nombre, apellido, dni, email, categoria y tipo_cuenta ("Caja de Ahorro"/"Cuenta Corriente").
+        Devuelve (cuenta, None) si se creó, o (None, mensaje_de_error).
+        """
+        error = validar_datos_alta(datos)
+        if error: return None, error
+
+        cliente = Cliente.buscar_por_dni(datos["dni"])
+        if cliente:
+            if cliente.activo == 0:
+                return None, "Cliente dado de baja."
+        else:
+            cliente = Cliente(datos["nombre"], datos["apellido"], datos["dni"], datos.get("email", ""))
+            if not cliente.guardar():
+                cliente = Cliente.buscar_por_dni(datos["dni"])
+                if not cliente: return None, "Error crítico BD."
+
+        tipo_cuenta, categoria = datos["tipo_cuenta"], datos["categoria"]
+        clase_buscada = CajaAhorro if TIPOS_CUENTA[tipo_cuenta] == "CA" else CuentaCorriente
+        for c in CuentaBase.recuperar_por_cliente(cliente.id_bd):
+            if isinstance(c, clase_buscada) and c.categoria == categoria:
+                return None, mensaje_cuenta_duplicada(tipo_cuenta, categoria)
+
+        nro = str(self.generar_numero_cuenta())
+        if clase_buscada is CajaAhorro:
+            cuenta = CajaAhorro(nro, cliente, categoria)
+        else:
+            cuenta = CuentaCorriente(nro, cliente, categoria, 0, self.default_limite_descubierto_cc, self.default_costo_mantenimiento_cc)
+        cuenta.guardar()
+        return cuenta, None
     
     def obtener_datos_reporte_global(self):
         """Datos crudos para exportar a CSV."""
-        conexion = conectar_bd()
+        return list(self.iterar_datos_reporte_global())
+
+    def iterar_datos_reporte_global(self, tamanio_lote=1000):
+        """Igual que obtener_datos_reporte_global, pero entrega las filas de a lotes (memoria acotada)."""
         sql = """
             SELECT cuentas.numero, cuentas.tipo_cuenta, cuentas.categoria, cuentas.saldo, 
                    clientes.nombre, clientes.apellido, clientes.dni, clientes.email, clientes.activo 
             FROM cuentas JOIN clientes ON cuentas.id_cliente = clientes.id
+            ORDER BY cuentas.id
+        """
+        yield from _iterar_consulta(sql, (), tamanio_lote)
+
+    def comision_entre(self, origen, destino):
+        """Comisión de una transferencia: no se cobra entre cuentas del mismo titular."""
+        return self.comision_transferencia if origen.titular.dni != destino.titular.dni else 0
+
+    def obtener_saldo_total(self):
+        """Suma de los saldos de todas las cuentas (centavos)."""
+        conexion = conectar_bd()
+        total = conexion.execute("SELECT COALESCE(SUM(saldo), 0) FROM cuentas").fetchone()[0]
+        conexion.close()
+        return total
+
+    def tiene_cuentas(self):
+        conexion = conectar_bd()
+        return conexion.execute("SELECT EXISTS(SELECT 1 FROM cuentas)").fetchone()[0] == 1
+
+    def iterar_movimientos(self, ids_cuenta=None, desde=None, hasta=None, tipo="Todos", tamanio_lote=1000):
+        """
+        Movimientos (más nuevos primero), de a lotes.
+        - ids_cuenta: lista de id de cuentas (None = todas).
+        - desde / hasta: fechas (date) inclusive.
+        - tipo: "Todos" o parte del nombre del tipo (ej: "Depósito", "Transferencia", "Plazo Fijo").
+        """
+        where, p = _filtros_movimientos(ids_cuenta, desde, hasta, tipo)
+        yield from _iterar_consulta(f"SELECT * FROM movimientos{where} ORDER BY fecha DESC, id DESC", p, tamanio_lote)
+
+    def pagina_movimientos(self, ids_cuenta=None, desde=None, hasta=None, tipo="Todos", cursor=None,
+                           tamanio_pagina=TAMANIO_PAGINA_MOVIMIENTOS):
+        """
+        Una página del historial (más nuevos primero), con los mismos filtros que iterar_movimientos.
+        Paginación por clave (fecha, id): cada página sigue donde terminó la anterior usando el
+        índice, sin OFFSET, así la página 1000 cuesta lo mismo que la primera.
+        - cursor: None para la primera página, o el cursor devuelto por la página anterior.
+        Devuelve (filas, cursor_siguiente); cursor_siguiente es None si no hay más filas.
         """
-        filas = conexion.execute(sql).fetchall()
+        where, p = _filtros_movimientos(ids_cuenta, desde, hasta, tipo)
+        if cursor:
+            where += " AND (fecha, id) < (?, ?)"
+            p.extend(_leer_cursor(cursor))
+        p.append(tamanio_pagina + 1)  # Una fila de más para saber si hay otra página
+        conexion = conectar_bd()
+        filas = conexion.execute(f"SELECT * FROM movimientos{where} ORDER BY fecha DESC, id DESC LIMIT ?", p).fetchall()
         conexion.close()
-        return filas
+        if len(filas) <= tamanio_pagina: return filas, None
+        filas = filas[:tamanio_pagina]
+        return filas, _crear_cursor(filas[-1])
 
-    def buscar_cuentas_filtro(self, termino):
-        """Buscador en tiempo real por número, DNI o apellido."""
+    def buscar_cuentas_filtro(self, termino, limite=LIMITE_BUSQUEDA):
+        """
+        Buscador en tiempo real por número, DNI, nombre o apellido.
+        Usa el índice FTS5 (coincidencia por comienzo de palabra, mejores resultados primero);
+        si no está disponible, cae al LIKE de siempre.
+        """
         conexion = conectar_bd()
-        termino_like = f"%{termino}%"
         sql = """
             SELECT cuentas.*, clientes.nombre, clientes.apellido, clientes.dni, clientes.email, clientes.activo
             FROM cuentas JOIN clientes ON cuentas.id_cliente = clientes.id
-            WHERE cuentas.numero LIKE ? OR clientes.dni LIKE ? OR clientes.apellido LIKE ?
         """
-        filas = conexion.execute(sql, (termino_like, termino_like, termino_like)).fetchall()
+        consulta_fts = _consulta_fts(termino)
+        if not termino.strip():
+            filas = conexion.execute(sql + " ORDER BY cuentas.id LIMIT ?", (limite,)).fetchall()
+        elif consulta_fts and _hay_busqueda_fts(conexion):
+            filas = conexion.execute(sql + """
+                JOIN busqueda_cuentas ON busqueda_cuentas.rowid = cuentas.id
+                WHERE busqueda_cuentas MATCH ? ORDER BY busqueda_cuentas.rank LIMIT ?
+            """, (consulta_fts, limite)).fetchall()
+        else:
+            termino_like = f"%{termino}%"
+            filas = conexion.execute(sql + """
+                WHERE cuentas.numero LIKE ? OR clientes.dni LIKE ? OR clientes.nombre LIKE ? OR clientes.apellido LIKE ?
+                LIMIT ?
+            """, (termino_like, termino_like, termino_like, termino_like, limite)).fetchall()
         conexion.close()
         cuentas_encontradas = []
         for f in filas:
@@ -480,29 +1752,77 @@ class Banco:
             if obj: cuentas_encontradas.append(obj)
         return cuentas_encontradas
 
-    def buscar_clientes_filtro(self, termino):
-        """Buscador de clientes en tiempo real."""
+    def buscar_clientes_filtro(self, termino, limite=LIMITE_BUSQUEDA):
+        """Buscador de clientes en tiempo real (FTS5, igual que buscar_cuentas_filtro)."""
         conexion = conectar_bd()
-        termino_like = f"%{termino}%"
-        sql = """
-            SELECT * FROM clientes
-            WHERE dni LIKE ? OR nombre LIKE ? OR apellido LIKE ?
+        consulta_fts = _consulta_fts(termino)
+        if not termino.strip():
+            filas = conexion.execute("SELECT * FROM clientes ORDER BY id LIMIT ?", (limite,)).fetchall()
+        elif consulta_fts and _hay_busqueda_fts(conexion):
+            filas = conexion.execute("""
+                SELECT clientes.* FROM clientes
+                JOIN busqueda_clientes ON busqueda_clientes.rowid = clientes.id
+                WHERE busqueda_clientes MATCH ? ORDER BY busqueda_clientes.rank LIMIT ?
+            """, (consulta_fts, limite)).fetchall()
+        else:
+            termino_like = f"%{termino}%"
+            filas = conexion.execute("""
+                SELECT * FROM clientes
+                WHERE dni LIKE ? OR nombre LIKE ? OR apellido LIKE ?
+                LIMIT ?
+            """, (termino_like, termino_like, termino_like, limite)).fetchall()
+        conexion.close()
+        return [Cliente._desde_datos(f['id'], f['nombre'], f['apellido'], f['dni'], f['email'], f['activo'])
+                for f in filas]
+
+    def obtener_totales_analisis(self, filtros, agrupar_por=("clase",)):
+        """
+        Totales para el Panel de Análisis, calculados sobre la tabla resumen_diario
+        (puesta al día antes de consultar) en lugar de recorrer todos los movimientos.
+        - filtros: los mismos que obtener_movimientos_para_analisis.
+        - agrupar_por: combinación de "clase" (deposito/extraccion/transferencia/plazo_fijo/otro),
+          "categoria" (Persona/Empresa), "dia", "semana" o "mes".
+        Devuelve una lista de dicts con las claves pedidas + cantidad y total (centavos).
         """
-        filas = conexion.execute(sql, (termino_like, termino_like, termino_like)).fetchall()
+        invalidas = [g for g in agrupar_por if g not in AGRUPACIONES_ANALISIS]
+        if invalidas: raise ValueError(f"Agrupación no soportada: {', '.join(invalidas)}")
+        actualizar_resumen_diario()
+        where, params = _filtros_analisis(filtros, resumen=True)
+        columnas = "".join(f"{AGRUPACIONES_ANALISIS[g]} AS {g}, " for g in agrupar_por)
+        sql = (f"SELECT {columnas}COALESCE(SUM(r.cantidad), 0) AS cantidad, COALESCE(SUM(r.total), 0) AS total"
+               f" FROM resumen_diario r{where}")
+        if agrupar_por:
+            posiciones = ", ".join(str(i) for i in range(1, len(agrupar_por) + 1))
+            sql += f" GROUP BY {posiciones} ORDER BY {posiciones}"
+        conexion = conectar_bd()
+        filas = conexion.execute(sql, params).fetchall()
         conexion.close()
-        clientes_encontrados = []
-        for f in filas:
-            c = Cliente(f['nombre'], f['apellido'], f['dni'], f['email'], f['activo'])
-            c.id_bd = f['id']
-            clientes_encontrados.append(c)
-        return clientes_encontrados
+        return [dict(f) for f in filas]
 
-    def obtener_movimientos_para_analisis(self, filtros):
+    def obtener_movimientos_para_analisis(self, filtros, limite=None, desplazamiento=0):
         """
-        Recupera TODOS los datos detallados para el Panel de Análisis (Gráficos).
+        Recupera los datos detallados para el Panel de Análisis (tabla de movimientos).
         Realiza JOIN con Clientes y Cuentas para tener nombre, tipo, etc.
+        - limite / desplazamiento: para traer solo una página (None = todas).
+        Los totales se piden aparte con obtener_totales_analisis().
         """
+        sql, params = self._sql_movimientos_analisis(filtros)
+        if limite is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limite, desplazamiento])
+        
         conexion = conectar_bd()
+        filas = conexion.execute(sql, params).fetchall()
+        conexion.close()
+        return filas
+
+    def iterar_movimientos_para_analisis(self, filtros, tamanio_lote=1000):
+        """Lo mismo que obtener_movimientos_para_analisis() pero de a lotes, sin traer todo a memoria."""
+        sql, params = self._sql_movimientos_analisis(filtros)
+        yield from _iterar_consulta(sql, params, tamanio_lote)
+
+    @staticmethod
+    def _sql_movimientos_analisis(filtros):
         sql = """
             SELECT 
                 m.fecha, 
@@ -518,28 +1838,6 @@ class Banco:
             FROM movimientos m
             JOIN cuentas c ON m.id_cuenta = c.id
             JOIN clientes cl ON c.id_cliente = cl.id
-            WHERE m.fecha BETWEEN ? AND ?
         """
-        
-        f_desde = datetime.combine(filtros['desde'], datetime.min.time())
-        f_hasta = datetime.combine(filtros['hasta'], datetime.max.time())
-        params = [f_desde, f_hasta]
-        
-        # Filtro Categoria Cliente
-        if filtros['tipo_cliente'] != "Todos":
-            sql += " AND c.categoria = ?"
-            params.append(filtros['tipo_cliente'])
-            
-        # Filtro Tipo Movimiento
-        if filtros['tipo_movimiento'] != "Todos":
-            sql += " AND m.tipo LIKE ?"
-            params.append(f"%{filtros['tipo_movimiento']}%")
-            
-        sql += " ORDER BY m.fecha DESC"
-        
-        filas = conexion.execute(sql, params).fetchall()
-        conexion.close()
-        return filas
-
-# Inicializar BD al importar
-inicializar_bd()
\ No newline at end of file
+        where, params = _filtros_analisis(filtros)
+        return sql + where + " ORDER BY m.fecha DESC", params
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación de reportes e historial de movimientos a CSV, en streaming.
+
+Las filas se leen de la BD de a lotes (fetchmany) y se escriben a medida que llegan,
+así la memoria usada no depende del tamaño de la tabla. Si el archivo termina en .gz
+se escribe comprimido.
+
+Uso desde la línea de comandos (sin interfaz gráfica):
+    python exportacion_banco.py reporte reporte.csv
+    python exportacion_banco.py movimientos movs_2026.csv.gz --desde 2026-01-01 --hasta 2026-12-31
+    python exportacion_banco.py movimientos movs.csv --cuentas 12,15 --tipo Transferencia
+"""
+import sys
+import csv
+import gzip
+import time
+import argparse
+from datetime import date
+import codigo_banco as logica
+
+ENCABEZADOS_REPORTE = ["Nro", "Tipo", "Categoria", "Saldo", "Nombre", "Apellido", "DNI", "Email", "Activo"]
+ENCABEZADOS_MOVIMIENTOS = ["Fecha", "Tipo", "Monto", "Desc", "Orig", "Dest"]
+
+def abrir_salida(ruta, comprimir=None):
+    """Abre el archivo de salida; comprime con gzip si se pide o si termina en .gz."""
+    if comprimir is None: comprimir = ruta.endswith(".gz")
+    if comprimir: return gzip.open(ruta, "wt", newline="", encoding="utf-8")
+    return open(ruta, "w", newline="", encoding="utf-8")
+
+def escribir_csv(ruta, encabezados, filas, convertir, comprimir=None):
+    """Escribe el CSV fila por fila. Devuelve cuántas filas se escribieron."""
+    cantidad = 0
+    with abrir_salida(ruta, comprimir) as f:
+        w = csv.writer(f, delimiter=';')
+        w.writerow(encabezados)
+        for fila in filas:
+            w.writerow(convertir(fila))
+            cantidad += 1
+    return cantidad
+
+def _fila_reporte(fila):
+    return [fila['numero'], fila['tipo_cuenta'], fila['categoria'],
+            logica.centavos_a_texto(fila['saldo'], ','), fila['nombre'], fila['apellido'],
+            fila['dni'], fila['email'], fila['activo']]
+
+def _fila_movimiento(r):
+    return [r['fecha'].strftime('%Y-%m-%d %H:%M'), r['tipo'], logica.centavos_a_texto(r['monto'], ','),
+            r['descripcion'], r['nro_cuenta_origen'], r['nro_cuenta_destino']]
+
+def exportar_reporte_global(banco, ruta, comprimir=None, tamanio_lote=1000):
+    """Reporte de todas las cuentas con sus titulares."""
+    return escribir_csv(ruta, ENCABEZADOS_REPORTE, banco.iterar_datos_reporte_global(tamanio_lote),
+                        _fila_reporte, comprimir)
+
+def exportar_movimientos(banco, ruta, ids_cuenta=None, desde=None, hasta=None, tipo="Todos",
+                         comprimir=None, tamanio_lote=1000):
+    """Historial de movimientos (de algunas cuentas o de todo el banco) con los filtros indicados."""
+    filas = banco.iterar_movimientos(ids_cuenta, desde, hasta, tipo, tamanio_lote)
+    return escribir_csv(ruta, ENCABEZADOS_MOVIMIENTOS, filas, _fila_movimiento, comprimir)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportación de datos del Banco POO a CSV")
+    parser.add_argument("que", choices=["reporte", "movimientos"])
+    parser.add_argument("archivo", help="Archivo CSV de salida (.gz para comprimir)")
+    parser.add_argument("--bd", help="Archivo de base de datos (default: el de la aplicación)")
+    parser.add_argument("--desde", type=date.fromisoformat, help="AAAA-MM-DD")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="AAAA-MM-DD")
+    parser.add_argument("--cuentas", help="Números de cuenta separados por coma (default: todas)")
+    parser.add_argument("--tipo", default="Todos", help="Depósito, Extracción, Transferencia, ...")
+    parser.add_argument("--lote", type=int, default=1000, help="Filas leídas por vez (default 1000)")
+    args = parser.parse_args(argv)
+
+    if args.bd:
+        logica.RUTA_BD = args.bd
+        logica.inicializar_bd()
+    banco = logica.Banco(nombre="Banco POO")
+    inicio = time.perf_counter()
+    if args.que == "reporte":
+        cantidad = exportar_reporte_global(banco, args.archivo, tamanio_lote=args.lote)
+    else:
+        ids = None
+        if args.cuentas:
+            ids = []
+            for numero in args.cuentas.split(","):
+                cuenta = logica.CuentaBase.buscar_por_numero(numero.strip())
+                if not cuenta:
+                    print(f"Cuenta inexistente: {numero}", file=sys.stderr)
+                    return 1
+                ids.append(cuenta.id_bd)
+        cantidad = exportar_movimientos(banco, args.archivo, ids, args.desde, args.hasta, args.tipo,
+                                        tamanio_lote=args.lote)
+    print(f"{cantidad} filas exportadas a {args.archivo} en {time.perf_counter() - inicio:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Importación masiva de clientes, cuentas y movimientos históricos.
+
+Lee archivos CSV (separados por ';', como los que exporta el sistema) o JSONL (un objeto JSON
+por línea), opcionalmente comprimidos (.gz), SIN cargarlos enteros en memoria.
+Las filas se validan con las mismas reglas que "Crear Cuenta" y se insertan por lotes:
+un executemany y una sola transacción por lote.
+
+Uso desde la línea de comandos:
+    python importacion_banco.py clientes clientes.csv
+    python importacion_banco.py cuentas cuentas.jsonl --lote 5000
+    python importacion_banco.py movimientos historico.csv.gz --bd otra_base.sqlite
+
+Columnas esperadas:
+    clientes:    nombre, apellido, dni, email
+    cuentas:     dni, tipo_cuenta ("Caja de Ahorro"/"Cuenta Corriente"), categoria, [numero], [saldo]
+    movimientos: nro_cuenta, fecha (AAAA-MM-DD[ HH:MM[:SS]]), monto, tipo, [descripcion],
+                 [nro_cuenta_origen], [nro_cuenta_destino]
+Los importes vienen en pesos ("1234,56" o 1234.56) y se guardan en centavos.
+Los movimientos importados son historial: no modifican saldos (el saldo viene en el archivo de cuentas).
+Un número de cuenta numérico explícito tiene que ser mayor que los que ya entregó o reservó la
+numeración automática (tabla secuencias); vacío, se asigna el siguiente.
+"""
+import sys
+import csv
+import gzip
+import json
+import time
+import argparse
+from datetime import date, datetime
+from itertools import islice
+import codigo_banco as logica
+
+# Máximo de rechazos que se guardan con detalle (el resto solo se cuenta)
+MAX_RECHAZOS_DETALLADOS = 1000
+
+def abrir_texto(ruta):
+    """Abre un archivo de texto, descomprimiendo al vuelo si termina en .gz."""
+    if ruta.endswith(".gz"): return gzip.open(ruta, "rt", encoding="utf-8", newline="")
+    return open(ruta, "r", encoding="utf-8", newline="")
+
+def leer_filas(ruta, delimitador=";"):
+    """Generador de filas (dict) de un CSV o JSONL, leyendo el archivo de a poco."""
+    base = ruta[:-3] if ruta.endswith(".gz") else ruta
+    with abrir_texto(ruta) as f:
+        if base.endswith((".jsonl", ".json")):
+            for linea in f:
+                if linea.strip(): yield json.loads(linea)
+        else:
+            yield from csv.DictReader(f, delimiter=delimitador)
+
+def _texto(fila, campo):
+    valor = fila.get(campo)
+    return str(valor).strip() if valor is not None else ""
+
+def _parsear_fecha(texto):
+    fecha = datetime.fromisoformat(texto)
+    return fecha if isinstance(fecha, datetime) else datetime.combine(fecha, datetime.min.time())
+
+def _lista_parametros(n): return ",".join("?" * n)
+
+class ResultadoImportacion:
+    """Contadores de una importación."""
+    def __init__(self, entidad):
+        self.entidad = entidad
+        self.leidas = 0
+        self.insertadas = 0
+        self.rechazadas = 0
+        self.rechazos = []  # (nro_fila, motivo)
+        self.segundos = 0.0
+
+    def rechazar(self, nro_fila, motivo):
+        self.rechazadas += 1
+        if len(self.rechazos) < MAX_RECHAZOS_DETALLADOS:
+            self.rechazos.append((nro_fila, motivo))
+
+    def __str__(self):
+        velocidad = self.leidas / self.segundos if self.segundos else 0
+        return (f"{self.entidad}: {self.leidas} leídas, {self.insertadas} insertadas, "
+                f"{self.rechazadas} rechazadas en {self.segundos:.1f}s ({velocidad:,.0f} filas/s)")
+
+def progreso_consola(resultado):
+    """Reporte de progreso por defecto (a stderr, para no mezclarse con la salida)."""
+    print(f"\r  {resultado.entidad}: {resultado.leidas:,} filas procesadas...", end="", file=sys.stderr, flush=True)
+
+class ImportadorMasivo:
+    """
+    Carga masiva por lotes.
+    - tamanio_lote: filas por transacción.
+    - progreso: función que recibe el ResultadoImportacion parcial después de cada lote (o None).
+    - diferir_indices: al importar movimientos, borra los índices secundarios y los
+      reconstruye al final (crear un índice de una vez es mucho más rápido que mantenerlo fila a fila).
+    Durante la importación la conexión del importador usa el perfil 'bulk-load' (solo esa).
+    """
+    def __init__(self, banco, tamanio_lote=2000, progreso=progreso_consola, diferir_indices=True):
+        self.banco = banco
+        self.tamanio_lote = tamanio_lote
+        self.progreso = progreso
+        self.diferir_indices = diferir_indices
+
+    # --- INFRAESTRUCTURA COMÚN ---
+    def _importar(self, entidad, filas, procesar_lote):
+        resultado = ResultadoImportacion(entidad)
+        inicio = time.perf_counter()
+        try:
+            with logica.perfil_temporal("bulk-load"):
+                numeradas = enumerate(filas, start=1)
+                while True:
+                    lote = list(islice(numeradas, self.tamanio_lote))
+                    if not lote: break
+                    resultado.leidas += len(lote)
+                    with logica.transaccion() as conexion:
+                        procesar_lote(conexion, lote, resultado)
+                    if self.progreso: self.progreso(resultado)
+        finally:
+            logica.CACHE_OBJETOS.invalidar()  # Altas y saldos escritos por SQL
+            resultado.segundos = time.perf_counter() - inicio
+        if self.progreso: print(file=sys.stderr)
+        return resultado
+
+    # --- CLIENTES ---
+    def importar_clientes(self, filas):
+        """Inserta clientes nuevos. Los DNI que ya existen se ignoran (igual que Cliente.guardar)."""
+        def procesar(conexion, lote, resultado):
+            validas = []
+            for nro, fila in lote:
+                datos = {"nombre": _texto(fila, "nombre").title(), "apellido": _texto(fila, "apellido").title(),
+                         "dni": _texto(fila, "dni"), "email": _texto(fila, "email"),
+                         "tipo_cuenta": "Caja de Ahorro", "categoria": "Persona"}
+                error = logica.validar_datos_alta(datos)
+                if error: resultado.rechazar(nro, error)
+                else: validas.append((datos["nombre"], datos["apellido"], datos["dni"], datos["email"]))
+            # rowcount no cuenta las filas que escriben los triggers del índice de búsqueda
+            insertadas = conexion.executemany("""
+                INSERT INTO clientes (nombre, apellido, dni, email, activo) VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT(dni) DO NOTHING
+            """, validas).rowcount
+            resultado.insertadas += insertadas
+            resultado.rechazadas += len(validas) - insertadas  # DNI repetidos
+        return self._importar("clientes", filas, procesar)
+
+    # --- CUENTAS ---
+    def importar_cuentas(self, filas):
+        """Crea cuentas para clientes existentes, con las reglas de alta (sin duplicar tipo + categoría)."""
+        def procesar(conexion, lote, resultado):
+            dnis = {_texto(f, "dni") for _, f in lote}
+            clientes = {r["dni"]: r for r in conexion.execute(
+                f"SELECT id, dni, activo FROM clientes WHERE dni IN ({_lista_parametros(len(dnis))})", list(dnis))}
+            ids = [r["id"] for r in clientes.values()]
+            existentes = {(r["id_cliente"], r["tipo_cuenta"], r["categoria"]) for r in conexion.execute(
+                f"SELECT id_cliente, tipo_cuenta, categoria FROM cuentas WHERE id_cliente IN ({_lista_parametros(len(ids))})", ids)}
+            numeros_en_uso = set()
+            # El lote tiene la BD bloqueada para escribir: nadie reserva números mientras tanto.
+            # Hasta `reservado` la numeración automática ya los entregó o los tiene apartados en
+            # memoria (ReservaSecuencia, en este u otro programa): un número explícito ahí chocaría después.
+            reservado = ultimo_nro = conexion.execute("SELECT valor FROM secuencias WHERE nombre = 'cuentas'").fetchone()[0]
+            nuevas = []
+            for nro, fila in lote:
+                tipo_cuenta, categoria = _texto(fila, "tipo_cuenta"), _texto(fila, "categoria")
+                cliente = clientes.get(_texto(fila, "dni"))
+                if tipo_cuenta not in logica.TIPOS_CUENTA:
+                    resultado.rechazar(nro, f"Tipo de cuenta inválido: {tipo_cuenta}"); continue
+                if categoria not in logica.CATEGORIAS:
+                    resultado.rechazar(nro, f"Categoría inválida: {categoria}"); continue
+                if not cliente:
+                    resultado.rechazar(nro, "Cliente no encontrado."); continue
+                if cliente["activo"] == 0:
+                    resultado.rechazar(nro, "Cliente dado de baja."); continue
+                tipo = logica.TIPOS_CUENTA[tipo_cuenta]
+                clave = (cliente["id"], tipo, categoria)
+                if clave in existentes:
+                    resultado.rechazar(nro, logica.mensaje_cuenta_duplicada(tipo_cuenta, categoria)); continue
+                try: saldo = logica.a_centavos(_texto(fila, "saldo") or 0)
+                except ArithmeticError:
+                    resultado.rechazar(nro, "Saldo inválido."); continue
+                numero = _texto(fila, "numero")
+                if not numero:
+                    ultimo_nro += 1
+                    numero = str(ultimo_nro)
+                elif numero in numeros_en_uso:
+                    resultado.rechazar(nro, f"Número de cuenta repetido: {numero}"); continue
+                elif numero.isdigit() and int(numero) <= reservado:
+                    resultado.rechazar(nro, f"Número de cuenta {numero} dentro de la numeración automática "
+                                            f"(hasta {reservado}); dejarlo vacío para asignarlo solo."); continue
+                elif numero.isdigit():
+                    ultimo_nro = max(ultimo_nro, int(numero))  # Que la numeración automática no lo repita
+                numeros_en_uso.add(numero)
+                existentes.add(clave)
+                if tipo == "CC":
+                    limite, costo = self.banco.default_limite_descubierto_cc, self.banco.default_costo_mantenimiento_cc
+                else: limite, costo = None, None
+                nuevas.append((numero, saldo, tipo, categoria, cliente["id"], limite, costo, date.today()))
+            insertadas = conexion.executemany("""
+                INSERT INTO cuentas (numero, saldo, tipo_cuenta, categoria, id_cliente,
+                                     limite_descubierto, costo_mantenimiento, fecha_creacion)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(numero) DO NOTHING
+            """, nuevas).rowcount
+            resultado.insertadas += insertadas
+            resultado.rechazadas += len(nuevas) - insertadas  # Números ya existentes en la BD
+            conexion.execute("UPDATE secuencias SET valor = MAX(valor, ?) WHERE nombre = 'cuentas'", (ultimo_nro,))
+        return self._importar("cuentas", filas, procesar)
+
+    # --- MOVIMIENTOS HISTÓRICOS ---
+    def importar_movimientos(self, filas):
+        """Carga historial de movimientos de cuentas existentes (no modifica saldos)."""
+        def procesar(conexion, lote, resultado):
+            numeros = {_texto(f, "nro_cuenta") for _, f in lote}
+            ids_cuenta = {r["numero"]: r["id"] for r in conexion.execute(
+                f"SELECT id, numero FROM cuentas WHERE numero IN ({_lista_parametros(len(numeros))})", list(numeros))}
+            nuevos = []
+            for nro, fila in lote:
+                id_cuenta = ids_cuenta.get(_texto(fila, "nro_cuenta"))
+                tipo = _texto(fila, "tipo")
+                if not id_cuenta:
+                    resultado.rechazar(nro, "Cuenta no encontrada."); continue
+                if tipo not in logica.TIPOS_MOVIMIENTO:
+                    resultado.rechazar(nro, f"Tipo de movimiento inválido: {tipo}"); continue
+                try:
+                    fecha = _parsear_fecha(_texto(fila, "fecha"))
+                    monto = logica.a_centavos(_texto(fila, "monto"))
+                except (ValueError, ArithmeticError):
+                    resultado.rechazar(nro, "Fecha o monto inválido."); continue
+                if monto <= 0:
+                    resultado.rechazar(nro, "El monto debe ser positivo."); continue
+                nuevos.append((id_cuenta, fecha, monto, tipo, logica.CODIGOS_MOVIMIENTO[tipo], _texto(fila, "descripcion") or None,
+                               _texto(fila, "nro_cuenta_origen") or None, _texto(fila, "nro_cuenta_destino") or None))
+            conexion.executemany("""
+                INSERT INTO movimientos (id_cuenta, fecha, monto, tipo, tipo_codigo, descripcion, nro_cuenta_origen, nro_cuenta_destino)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, nuevos)
+            resultado.insertadas += len(nuevos)
+
+        indices = self._quitar_indices("movimientos") if self.diferir_indices else []
+        try:
+            return self._importar("movimientos", filas, procesar)
+        finally:
+            self._restaurar_indices(indices)
+
+    # --- ÍNDICES DIFERIDOS ---
+    def _quitar_indices(self, tabla):
+        """
+        Borra los índices secundarios de la tabla y devuelve sus nombres para recrearlos.
+        Solo los de logica.INDICES_SECUNDARIOS: si la importación se corta sin recrearlos,
+        inicializar_bd los vuelve a crear al iniciar el programa.
+        """
+        nombres = [n for n, (t, _) in logica.INDICES_SECUNDARIOS.items() if t == tabla]
+        with logica.transaccion() as conexion:
+            for nombre in nombres: conexion.execute(f"DROP INDEX IF EXISTS {nombre}")
+        return nombres
+
+    def _restaurar_indices(self, nombres):
+        if not nombres: return
+        with logica.transaccion() as conexion:
+            logica.crear_indices(conexion, nombres)
+        logica.conectar_bd().execute("PRAGMA optimize")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importación masiva de datos al Banco POO")
+    parser.add_argument("entidad", choices=["clientes", "cuentas", "movimientos"])
+    parser.add_argument("archivo", help="CSV (';') o JSONL, opcionalmente .gz")
+    parser.add_argument("--lote", type=int, default=2000, help="Filas por transacción (default 2000)")
+    parser.add_argument("--bd", help="Archivo de base de datos (default: el de la aplicación)")
+    parser.add_argument("--delimitador", default=";")
+    parser.add_argument("--silencioso", action="store_true", help="No mostrar el progreso")
+    args = parser.parse_args(argv)
+
+    if args.bd:
+        logica.RUTA_BD = args.bd
+        logica.inicializar_bd()
+    banco = logica.Banco(nombre="Banco POO")
+    importador = ImportadorMasivo(banco, args.lote, None if args.silencioso else progreso_consola)
+    filas = leer_filas(args.archivo, args.delimitador)
+    resultado = getattr(importador, f"importar_{args.entidad}")(filas)
+    print(resultado)
+    for nro, motivo in resultado.rechazos[:20]:
+        print(f"  fila {nro}: {motivo}")
+    return 0 if resultado.rechazadas == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,302 @@
 # -*- coding: utf-8 -*-
 
 import sys
-import csv
 import sqlite3
+from collections import OrderedDict
 from datetime import datetime, date, timedelta
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget, QLabel, QFrame,
     QTextEdit, QDialog, QLineEdit, QComboBox, QDialogButtonBox, QFormLayout,
     QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QDateEdit, QFileDialog,
-    QHBoxLayout, QGridLayout, QTabWidget, QAbstractItemView, QGroupBox
+    QHBoxLayout, QGridLayout, QTabWidget, QAbstractItemView, QGroupBox, QTableView
 )
-from PyQt6.QtCore import Qt, QDate, QRegularExpression
+from PyQt6.QtCore import (Qt, QDate, QRegularExpression, QTimer, QAbstractTableModel, QModelIndex,
+                          QObject, QRunnable, QThreadPool, pyqtSignal)
 from PyQt6.QtGui import QDoubleValidator, QIntValidator, QRegularExpressionValidator
 import codigo_banco as logica
+import exportacion_banco
 
-# --- SECCIÓN: IMPORTS PARA GRÁFICOS ---
-# Matplotlib tiene diferentes "backends" para conectarse con distintas interfaces.
-# Aquí intentamos importar el backend moderno de Qt6, y si falla, usamos el de Qt5 (compatible).
-import matplotlib.pyplot as plt
-try:
-    from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-except ImportError:
-    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import matplotlib.dates as mdates
+# --- SECCIÓN: GRÁFICOS ---
+# Matplotlib tarda en importarse y solo lo usa el Panel de Análisis: se carga recién la primera
+# vez que se abre el panel, así la ventana principal aparece antes.
+# Se usa Figure directamente (sin pyplot, que guarda cada figura en un registro global).
+
+def crear_grafico(ancho, alto):
+    """Devuelve (figura, ejes, widget de Qt) de un gráfico de matplotlib."""
+    from matplotlib.figure import Figure
+    # Matplotlib tiene diferentes "backends" para conectarse con distintas interfaces.
+    # Aquí intentamos importar el backend moderno de Qt6, y si falla, usamos el de Qt5 (compatible).
+    try:
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+    except ImportError:
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+    figura = Figure(figsize=(ancho, alto))
+    return figura, figura.add_subplot(), FigureCanvas(figura)
+
+# ==========================================
+# MODELO DE TABLA COMPARTIDO
+# ==========================================
+class ModeloTablaFilas(QAbstractTableModel):
+    """
+    Modelo de tabla genérico sobre una lista de tuplas (una por fila, un valor por columna).
+    - columnas: lista de (título, formato); formato convierte el valor en texto (None = str).
+    - Ordenar (clic en el encabezado) y filtrar solo cambian la lista de filas visibles:
+      no se crea ningún ítem por celda y los datos no se copian.
+    - datos: objeto asociado a cada fila (ej: la Cuenta) para recuperarlo al seleccionar.
+    """
+    def __init__(self, columnas, parent=None):
+        super().__init__(parent)
+        self.columnas = columnas
+        self.filas, self.datos = [], []
+        self.visibles = []          # Índices de self.filas en el orden en que se muestran
+        self.filtro = ""
+        self.orden = None           # (columna, Qt.SortOrder) o None
+        self._textos = None         # Texto de cada fila para filtrar (se arma al primer filtro)
+
+    def cargar(self, filas, datos=None):
+        """Reemplaza todas las filas (manteniendo el orden y el filtro elegidos)."""
+        self.beginResetModel()
+        self.filas = list(filas)
+        self.datos = list(datos) if datos is not None else []
+        self._textos = None
+        self._recalcular()
+        self.endResetModel()
+
+    def agregar(self, filas, datos=None):
+        """Agrega filas al final (carga por páginas)."""
+        filas = list(filas)
+        if not filas: return
+        if self.filtro or self.orden:
+            self.beginResetModel()
+            self.filas.extend(filas)
+            if datos is not None: self.datos.extend(datos)
+            self._textos = None
+            self._recalcular()
+            self.endResetModel()
+            return
+        inicio = len(self.filas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(filas) - 1)
+        self.filas.extend(filas)
+        if datos is not None: self.datos.extend(datos)
+        self.visibles.extend(range(inicio, len(self.filas)))
+        self.endInsertRows()
+
+    def filtrar(self, texto):
+        """Muestra solo las filas que contienen el texto en alguna columna."""
+        self.beginResetModel()
+        self.filtro = texto.strip().lower()
+        self._recalcular()
+        self.endResetModel()
+
+    def sort(self, columna, orden=Qt.SortOrder.AscendingOrder):
+        self.beginResetModel()
+        self.orden = (columna, orden)
+        self._recalcular()
+        self.endResetModel()
+
+    def _recalcular(self):
+        indices = range(len(self.filas))
+        if self.filtro:
+            if self._textos is None:
+                self._textos = [" ".join(self.texto(f, c) for c in range(len(self.columnas))).lower() for f in self.filas]
+            indices = [i for i in indices if self.filtro in self._textos[i]]
+        if self.orden:
+            col, orden = self.orden
+            # Los None van al final; se ordena por el valor original, no por el texto mostrado
+            indices = sorted(indices, key=lambda i: (self.filas[i][col] is None, self.filas[i][col]),
+                             reverse=orden == Qt.SortOrder.DescendingOrder)
+        self.visibles = list(indices)
+
+    def texto(self, fila, columna):
+        valor = fila[columna]
+        formato = self.columnas[columna][1]
+        if valor is None: return ""
+        return formato(valor) if formato else str(valor)
+
+    def fila(self, fila_visible): return self.filas[self.visibles[fila_visible]]
+    def dato(self, fila_visible): return self.datos[self.visibles[fila_visible]]
+
+    def rowCount(self, parent=QModelIndex()): return 0 if parent.isValid() else len(self.visibles)
+    def columnCount(self, parent=QModelIndex()): return 0 if parent.isValid() else len(self.columnas)
+
+    def headerData(self, seccion, orientacion, rol=Qt.ItemDataRole.DisplayRole):
+        if rol == Qt.ItemDataRole.DisplayRole and orientacion == Qt.Orientation.Horizontal:
+            return self.columnas[seccion][0]
+        return None
+
+    def data(self, indice, rol=Qt.ItemDataRole.DisplayRole):
+        if rol != Qt.ItemDataRole.DisplayRole or not indice.isValid(): return None
+        return self.texto(self.fila(indice.row()), indice.column())
+
+# ==========================================
+# CONSULTAS EN SEGUNDO PLANO
+# ==========================================
+class SenalesTrabajo(QObject):
+    """Señales de un TrabajoBD (un QRunnable no puede emitir señales por sí mismo)."""
+    terminado = pyqtSignal(object, int, object)  # canal, generación, resultado
+    fallo = pyqtSignal(object, int, object)      # canal, generación, excepción
+
+class TrabajoBD(QRunnable):
+    """Ejecuta una función de codigo_banco en un hilo del pool (cada hilo usa su propia conexión)."""
+    def __init__(self, canal, generacion, funcion, args, kwargs):
+        super().__init__()
+        self.canal, self.generacion = canal, generacion
+        self.funcion, self.args, self.kwargs = funcion, args, kwargs
+        self.senales = SenalesTrabajo()
+
+    def run(self):
+        try:
+            resultado = self.funcion(*self.args, **self.kwargs)
+        except Exception as e:
+            self.senales.fallo.emit(self.canal, self.generacion, e)
+        else:
+            self.senales.terminado.emit(self.canal, self.generacion, resultado)
+
+class EjecutorConsultas(QObject):
+    """
+    Corre consultas a la BD fuera del hilo de la interfaz y entrega el resultado por señal
+    (los callbacks se ejecutan en el hilo de la interfaz, pueden tocar widgets).
+    Cada "canal" (ej: la búsqueda de un diálogo) tiene un número de generación: al pedir una
+    consulta nueva en el mismo canal, la anterior se saca de la cola si todavía no empezó y,
+    si ya estaba corriendo, su resultado se descarta al llegar.
+    """
+    def __init__(self, max_hilos=2, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_hilos)
+        self.generaciones = {}  # canal -> última generación pedida
+        self.en_cola = {}       # canal -> TrabajoBD todavía no iniciado (para cancelarlo)
+        self.callbacks = {}     # (canal, generación) -> (al_terminar, al_fallar)
+
+    def ejecutar(self, canal, funcion, *args, al_terminar=None, al_fallar=None, **kwargs):
+        """Encola funcion(*args, **kwargs). Devuelve la generación asignada."""
+        self.cancelar(canal)
+        generacion = self.generaciones[canal] = self.generaciones.get(canal, 0) + 1
+        trabajo = TrabajoBD(canal, generacion, funcion, args, kwargs)
+        trabajo.setAutoDelete(False)  # Se mantiene vivo desde Python hasta entregar el resultado
+        trabajo.senales.terminado.connect(self._terminado)
+        trabajo.senales.fallo.connect(self._fallo)
+        self.callbacks[(canal, generacion)] = (al_terminar, al_fallar, trabajo)
+        self.en_cola[canal] = trabajo
+        self.pool.start(trabajo)
+        return generacion
+
+    def cancelar(self, canal):
+        """Descarta la consulta pendiente del canal (si no empezó, no llega a ejecutarse)."""
+        if canal not in self.generaciones: return
+        self.generaciones[canal] += 1
+        trabajo = self.en_cola.pop(canal, None)
+        if trabajo is not None and self.pool.tryTake(trabajo):
+            self.callbacks.pop((canal, trabajo.generacion), None)
+
+    def esperar(self, milisegundos=-1):
+        """Espera a que terminen las consultas en curso (al cerrar la aplicación)."""
+        return self.pool.waitForDone(milisegundos)
+
+    def _entregar(self, canal, generacion):
+        al_terminar, al_fallar, trabajo = self.callbacks.pop((canal, generacion), (None, None, None))
+        if self.en_cola.get(canal) is trabajo: self.en_cola.pop(canal, None)
+        if self.generaciones.get(canal) != generacion: return None, None  # Consulta reemplazada
+        return al_terminar, al_fallar
+
+    def _terminado(self, canal, generacion, resultado):
+        al_terminar, _ = self._entregar(canal, generacion)
+        if al_terminar: al_terminar(resultado)
+
+    def _fallo(self, canal, generacion, error):
+        _, al_fallar = self._entregar(canal, generacion)
+        if al_fallar: al_fallar(error)
+        elif self.generaciones.get(canal) == generacion: logica.log.error("Error en consulta (%s): %s", canal, error)
+
+_EJECUTOR = None
+
+def ejecutor_consultas():
+    """Ejecutor compartido por toda la interfaz (se crea la primera vez que se usa)."""
+    global _EJECUTOR
+    if _EJECUTOR is None: _EJECUTOR = EjecutorConsultas()
+    return _EJECUTOR
+
+class ControladorBusqueda(QObject):
+    """
+    Búsqueda en vivo sobre un QLineEdit:
+    - Espera DEMORA_MS sin teclear antes de consultar (no una consulta por letra).
+    - La consulta corre en segundo plano; si llega otra, la anterior se cancela.
+    - Guarda los últimos resultados por término (LRU de TAMANIO_CACHE términos).
+    - Si el término extiende uno ya buscado cuyo resultado vino completo (menos de `limite`
+      filas), filtra ese resultado en memoria en lugar de volver a la BD.
+    - buscar(termino) hace la consulta; campos(obj) devuelve los textos en los que se busca.
+    """
+    DEMORA_MS = 250
+    TAMANIO_CACHE = 64
+
+    def __init__(self, campo, buscar, campos, al_resultados, limite=logica.LIMITE_BUSQUEDA, parent=None):
+        super().__init__(parent)
+        self.campo, self.buscar, self.campos = campo, buscar, campos
+        self.al_resultados, self.limite = al_resultados, limite
+        self.cache = OrderedDict()  # término -> lista de resultados
+        self.consultas = 0          # Consultas que fueron a la BD (para medir)
+        self.fts = logica.busqueda_fts_disponible()
+        self.canal = f"busqueda-{id(self)}"
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEMORA_MS)
+        self.timer.timeout.connect(self.ejecutar)
+        campo.textChanged.connect(lambda _: self.timer.start())
+
+    def ejecutar(self):
+        """Busca ya el texto actual (desde la cache si se puede)."""
+        self.timer.stop()
+        termino = self.campo.text().strip()
+        resultado = self._desde_cache(termino)
+        if resultado is not None:
+            ejecutor_consultas().cancelar(self.canal)  # Una consulta anterior ya no sirve
+            self.al_resultados(resultado)
+            return
+        self.consultas += 1
+        ejecutor_consultas().ejecutar(self.canal, self.buscar, termino,
+                                      al_terminar=lambda r, t=termino: self._recibir(t, r))
+
+    def refrescar(self):
+        """Descarta la cache (los datos cambiaron) y vuelve a buscar."""
+        self.cache.clear()
+        self.ejecutar()
+
+    def cancelar(self):
+        self.timer.stop()
+        ejecutor_consultas().cancelar(self.canal)
+
+    def _recibir(self, termino, resultado):
+        self._guardar(termino, resultado)
+        self.al_resultados(resultado)
+
+    def _guardar(self, termino, resultado):
+        self.cache[termino] = resultado
+        self.cache.move_to_end(termino)
+        while len(self.cache) > self.TAMANIO_CACHE: self.cache.popitem(last=False)
+
+    def _desde_cache(self, termino):
+        if termino in self.cache:
+            self.cache.move_to_end(termino)
+            return self.cache[termino]
+        # Solo se refina en memoria con letras, números y espacios (mismo criterio que FTS5 y LIKE)
+        if not all(ch.isalnum() or ch.isspace() for ch in termino): return None
+        previos = [t for t, r in self.cache.items() if termino.startswith(t) and len(r) < self.limite]
+        if not previos: return None
+        base = self.cache[max(previos, key=len)]
+        resultado = [o for o in base if logica.coincide_busqueda(self.campos(o), termino, self.fts)]
+        self._guardar(termino, resultado)
+        return resultado
+
+def crear_vista_tabla(modelo, ordenable=True):
+    """QTableView de solo lectura, con selección por fila, para un ModeloTablaFilas."""
+    vista = QTableView()
+    vista.setModel(modelo)
+    vista.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+    vista.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    vista.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    vista.setSortingEnabled(ordenable)
+    if ordenable: vista.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)  # Sin orden inicial
+    return vista
 
 # ==========================================
 # VENTANA PRINCIPAL
@@ -171,6 +445,9 @@ class VentanaGestion(QDialog):
         btn_saldo = QPushButton("Ver Saldo Total Banco")
         btn_saldo.clicked.connect(self.ver_saldo_total)
         
+        btn_mantenimiento = QPushButton("Cobrar Mantenimiento Mensual (CC)")
+        btn_mantenimiento.clicked.connect(self.cobrar_mantenimiento)
+        
         btn_clientes = QPushButton("Gestión de Clientes (Baja)")
         btn_clientes.clicked.connect(self.gestionar_clientes)
         
@@ -184,7 +461,7 @@ class VentanaGestion(QDialog):
         btn_cerrar = QPushButton("Cerrar")
         btn_cerrar.clicked.connect(self.close)
         
-        for btn in [btn_params, btn_informe, btn_saldo, btn_clientes, btn_buscar, btn_graficos]:
+        for btn in [btn_params, btn_informe, btn_saldo, btn_mantenimiento, btn_clientes, btn_buscar, btn_graficos]:
             btn.setStyleSheet("padding: 10px; font-size: 13px; text-align: left;")
             layout.addWidget(btn)
         layout.addStretch()
@@ -193,6 +470,7 @@ class VentanaGestion(QDialog):
     def ajustar_parametros(self): self.controlador.ajustar_parametros(self)
     def generar_informe(self): self.controlador.generar_informe(self)
     def ver_saldo_total(self): self.controlador.ver_saldo_total(self)
+    def cobrar_mantenimiento(self): self.controlador.cobrar_mantenimiento(self)
     def gestionar_clientes(self):
         ventana = VentanaBajaCliente(self.banco, self)
         ventana.exec()
@@ -215,15 +493,10 @@ class VentanaBajaCliente(QDialog):
         
         self.txt_buscar = QLineEdit()
         self.txt_buscar.setPlaceholderText("Escriba DNI o Nombre para filtrar...")
-        self.txt_buscar.textChanged.connect(self.actualizar_lista)
         layout.addWidget(self.txt_buscar)
         
-        self.tabla = QTableWidget()
-        self.tabla.setColumnCount(4)
-        self.tabla.setHorizontalHeaderLabels(["DNI", "Nombre", "Apellido", "Estado"])
-        self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.tabla.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.tabla.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.modelo = ModeloTablaFilas([("DNI", None), ("Nombre", None), ("Apellido", None), ("Estado", None)], self)
+        self.tabla = crear_vista_tabla(self.modelo)
         self.tabla.clicked.connect(self.seleccionar_cliente)
         layout.addWidget(self.tabla)
         
@@ -248,24 +521,22 @@ class VentanaBajaCliente(QDialog):
         h_botones.addWidget(self.btn_reactivar)
         layout.addLayout(h_botones)
         self.cliente_seleccionado = None
-        self.actualizar_lista()
+        self.busqueda = ControladorBusqueda(self.txt_buscar, self.banco.buscar_clientes_filtro,
+                                            lambda c: (c.dni, c.nombre, c.apellido), self.mostrar_clientes, parent=self)
+        self.finished.connect(self.busqueda.cancelar)
+        self.busqueda.ejecutar()
 
     def actualizar_lista(self):
-        termino = self.txt_buscar.text().strip()
-        clientes = self.banco.buscar_clientes_filtro(termino)
-        self.tabla.setRowCount(len(clientes))
-        for i, c in enumerate(clientes):
-            estado = "ACTIVO" if c.activo == 1 else "BAJA"
-            self.tabla.setItem(i, 0, QTableWidgetItem(c.dni))
-            self.tabla.setItem(i, 1, QTableWidgetItem(c.nombre))
-            self.tabla.setItem(i, 2, QTableWidgetItem(c.apellido))
-            self.tabla.setItem(i, 3, QTableWidgetItem(estado))
-            self.tabla.item(i, 0).setData(Qt.ItemDataRole.UserRole, c)
+        """Vuelve a consultar (después de dar de baja o reactivar)."""
+        self.busqueda.refrescar()
+
+    def mostrar_clientes(self, clientes):
+        self.modelo.cargar([(c.dni, c.nombre, c.apellido, "ACTIVO" if c.activo == 1 else "BAJA") for c in clientes], clientes)
 
     def seleccionar_cliente(self):
-        fila = self.tabla.currentRow()
+        fila = self.tabla.currentIndex().row()
         if fila >= 0:
-            self.cliente_seleccionado = self.tabla.item(fila, 0).data(Qt.ItemDataRole.UserRole)
+            self.cliente_seleccionado = self.modelo.dato(fila)
             self.mostrar_detalles()
 
     def mostrar_detalles(self):
@@ -281,7 +552,7 @@ class VentanaBajaCliente(QDialog):
         if cuentas:
             for cta in cuentas:
                 tipo = "CA" if isinstance(cta, logica.CajaAhorro) else "CC"
-                info += f"• {tipo} ({cta.categoria}) - ${cta.saldo:.2f}<br>"
+                info += f"• {tipo} ({cta.categoria}) - {logica.formatear_pesos(cta.saldo)}<br>"
         else: info += "<i>Sin cuentas.</i>"
         self.lbl_detalles.setText(info)
         self.btn_baja.setEnabled(c.activo == 1)
@@ -311,9 +582,9 @@ class DialogoAjustarParametros(QDialog):
         self.setWindowTitle("Parámetros")
         layout = QFormLayout(self)
         self.pf = QLineEdit(str(banco.default_tasa_anual_pf))
-        self.cc_costo = QLineEdit(str(banco.default_costo_mantenimiento_cc))
-        self.cc_lim = QLineEdit(str(banco.default_limite_descubierto_cc))
-        self.com = QLineEdit(str(banco.comision_transferencia))
+        self.cc_costo = QLineEdit(logica.centavos_a_texto(banco.default_costo_mantenimiento_cc))
+        self.cc_lim = QLineEdit(logica.centavos_a_texto(banco.default_limite_descubierto_cc))
+        self.com = QLineEdit(logica.centavos_a_texto(banco.comision_transferencia))
         layout.addRow("Tasa PF:", self.pf)
         layout.addRow("Costo CC:", self.cc_costo)
         layout.addRow("Límite CC:", self.cc_lim)
@@ -333,9 +604,11 @@ class VentanaAnalisis(QDialog):
     """
     Ventana que integra:
     - Filtros superiores en vivo.
-    - Tabla de movimientos a la izquierda (incluye nombre Cliente).
-    - Resumen de totales y Gráfico de Torta a la derecha.
+    - Tabla de movimientos a la izquierda (incluye nombre Cliente), limitada a los más recientes.
+    - Resumen de totales y Gráfico de Torta a la derecha (calculados en la BD).
     """
+    LIMITE_DETALLE = 10000  # Filas máximas en la tabla de detalle
+
     def __init__(self, banco, parent=None):
         super().__init__(parent)
         self.banco = banco  # Necesitamos el banco para pedir datos
@@ -383,14 +656,19 @@ class VentanaAnalisis(QDialog):
         layout_izq = QVBoxLayout(frame_izq)
         layout_izq.addWidget(QLabel("<h3>Detalle de Movimientos</h3>"))
         
-        self.tabla = QTableWidget()
-        self.tabla.setColumnCount(6)
-        self.tabla.setHorizontalHeaderLabels(["Cliente", "Fecha", "Cta", "Tipo", "Monto", "Desc"])
+        self.txt_filtro_tabla = QLineEdit()
+        self.txt_filtro_tabla.setPlaceholderText("Filtrar la tabla (cliente, cuenta, descripción...)")
+        layout_izq.addWidget(self.txt_filtro_tabla)
+        
+        self.modelo = ModeloTablaFilas([
+            ("Cliente", None), ("Fecha", lambda f: f.strftime('%d/%m/%Y')), ("Cta", None), ("Tipo", None),
+            ("Monto", lambda m: logica.formatear_pesos(m, miles=True)), ("Desc", None)], self)
+        self.txt_filtro_tabla.textChanged.connect(self.modelo.filtrar)
+        self.tabla = crear_vista_tabla(self.modelo)
         self.tabla.setAlternatingRowColors(True)
-        self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.tabla.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.tabla.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         layout_izq.addWidget(self.tabla)
+        self.lbl_cantidad = QLabel("")
+        layout_izq.addWidget(self.lbl_cantidad)
         
         cuerpo_h.addWidget(frame_izq, 1) # Factor 1 (50% ancho)
 
@@ -420,8 +698,7 @@ class VentanaAnalisis(QDialog):
         # B2. Gráfico (Matplotlib)
         layout_der.addWidget(QLabel("<h3>Distribución de Volumen</h3>"))
         # Creamos la figura y el canvas
-        self.figura, self.ax = plt.subplots(figsize=(4, 3))
-        self.canvas = FigureCanvas(self.figura)
+        self.figura, self.ax, self.canvas = crear_grafico(4, 3)
         layout_der.addWidget(self.canvas)
         
         cuerpo_h.addWidget(frame_der, 1) # Factor 1 (50% ancho)
@@ -432,6 +709,8 @@ class VentanaAnalisis(QDialog):
         btn_cerrar.clicked.connect(self.accept)
         layout_main.addWidget(btn_cerrar)
 
+        self.canal = f"analisis-{id(self)}"
+        self.finished.connect(lambda: ejecutor_consultas().cancelar(self.canal))
         self.actualizar_datos() # Carga inicial
 
     def actualizar_datos(self):
@@ -442,46 +721,42 @@ class VentanaAnalisis(QDialog):
             "desde": self.date_desde.date().toPyDate(),
             "hasta": self.date_hasta.date().toPyDate()
         }
+        # 2. Consultar en segundo plano (la ventana sigue respondiendo); un nuevo clic reemplaza al anterior
+        self.lbl_cantidad.setText("Consultando...")
+        ejecutor_consultas().ejecutar(self.canal, self.consultar, filtros, al_terminar=self.mostrar_datos,
+                                      al_fallar=lambda e: self.lbl_cantidad.setText(f"Error: {e}"))
+
+    def consultar(self, filtros):
+        """Corre en un hilo del pool: totales por clase y detalle de los movimientos más recientes."""
+        totales = self.banco.obtener_totales_analisis(filtros)
+        filas = self.banco.obtener_movimientos_para_analisis(filtros, limite=self.LIMITE_DETALLE)
+        return totales, [(f"{f['nombre']} {f['apellido']}", f['fecha'], f['nro_cuenta'], f['tipo'],
+                          f['monto'], f['descripcion']) for f in filas]
+
+    def mostrar_datos(self, resultado):
+        totales, filas = resultado
+        # 3. Totales por clase (los agrega la BD, no se recorren todas las filas)
+        totales = {t['clase']: t for t in totales}
+        self.total_deposito = totales.get("deposito", {}).get("total", 0)  # Centavos
+        self.total_extraccion = totales.get("extraccion", {}).get("total", 0)
+        self.total_transferencia = totales.get("transferencia", {}).get("total", 0)
+        self.total_plazo_fijo = totales.get("plazo_fijo", {}).get("total", 0)
+        cantidad = sum(t['cantidad'] for t in totales.values())
         
-        # 2. Consultar BD
-        filas = self.banco.obtener_movimientos_para_analisis(filtros)
+        self.lbl_cantidad.setText(f"Mostrando {len(filas)} de {cantidad} movimientos")
         
-        # 3. Resetear acumuladores
-        self.total_deposito = 0.0
-        self.total_extraccion = 0.0
-        self.total_transferencia = 0.0
-        self.total_plazo_fijo = 0.0
+        # 4. Llenar Tabla (el modelo guarda tuplas; las celdas se formatean al dibujarse)
+        self.modelo.cargar(filas)
         
-        # 4. Llenar Tabla
-        self.tabla.setRowCount(len(filas))
-        for i, f in enumerate(filas):
-            nombre = f"{f['nombre']} {f['apellido']}"
-            fecha_str = f['fecha'].strftime('%d/%m/%Y')
-            monto = f['monto']
-            tipo = f['tipo']
-            
-            self.tabla.setItem(i, 0, QTableWidgetItem(nombre))
-            self.tabla.setItem(i, 1, QTableWidgetItem(fecha_str))
-            self.tabla.setItem(i, 2, QTableWidgetItem(f['nro_cuenta']))
-            self.tabla.setItem(i, 3, QTableWidgetItem(tipo))
-            self.tabla.setItem(i, 4, QTableWidgetItem(f"${monto:,.2f}"))
-            self.tabla.setItem(i, 5, QTableWidgetItem(f['descripcion'] or ""))
-            
-            # Clasificar para totales
-            if "Depósito" in tipo or "Acreditación" in tipo: self.total_deposito += monto
-            elif "Extracción" in tipo: self.total_extraccion += monto
-            elif "Transferencia" in tipo: self.total_transferencia += monto
-            elif "Plazo Fijo" in tipo: self.total_plazo_fijo += monto
-            
         # 5. Actualizar Resumen Visual
         estilo = "font-size: 14px; font-weight: bold;"
-        self.lbl_dep.setText(f"${self.total_deposito:,.2f}")
+        self.lbl_dep.setText(logica.formatear_pesos(self.total_deposito, miles=True))
         self.lbl_dep.setStyleSheet(f"color: green; {estilo}")
-        self.lbl_ext.setText(f"${self.total_extraccion:,.2f}")
+        self.lbl_ext.setText(logica.formatear_pesos(self.total_extraccion, miles=True))
         self.lbl_ext.setStyleSheet(f"color: red; {estilo}")
-        self.lbl_trans.setText(f"${self.total_transferencia:,.2f}")
+        self.lbl_trans.setText(logica.formatear_pesos(self.total_transferencia, miles=True))
         self.lbl_trans.setStyleSheet(f"color: blue; {estilo}")
-        self.lbl_pf.setText(f"${self.total_plazo_fijo:,.2f}")
+        self.lbl_pf.setText(logica.formatear_pesos(self.total_plazo_fijo, miles=True))
         self.lbl_pf.setStyleSheet(f"color: orange; {estilo}")
         
         # 6. Dibujar Gráfico
@@ -531,14 +806,9 @@ class DialogoBuscadorCuentas(QDialog):
         layout = QVBoxLayout(self)
         self.txt_buscar = QLineEdit()
         self.txt_buscar.setPlaceholderText("Escriba Número, DNI o Apellido...")
-        self.txt_buscar.textChanged.connect(self.buscar)
         layout.addWidget(self.txt_buscar)
-        self.tabla = QTableWidget()
-        self.tabla.setColumnCount(4)
-        self.tabla.setHorizontalHeaderLabels(["Nro Cuenta", "Titular", "Tipo", "DNI"])
-        self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.tabla.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.tabla.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.modelo = ModeloTablaFilas([("Nro Cuenta", None), ("Titular", None), ("Tipo", None), ("DNI", None)], self)
+        self.tabla = crear_vista_tabla(self.modelo)
         self.tabla.doubleClicked.connect(self.seleccionar)
         layout.addWidget(self.tabla)
         h = QHBoxLayout()
@@ -550,22 +820,20 @@ class DialogoBuscadorCuentas(QDialog):
         h.addWidget(btn_cancelar)
         layout.addLayout(h)
         self.cuenta_seleccionada = None
+        self.busqueda = ControladorBusqueda(
+            self.txt_buscar, self.banco.buscar_cuentas_filtro,
+            lambda c: (c.numero, c.titular.dni, c.titular.nombre, c.titular.apellido), self.mostrar_cuentas, parent=self)
+        self.finished.connect(self.busqueda.cancelar)
         self.buscar()
-    def buscar(self):
-        termino = self.txt_buscar.text().strip()
-        cuentas = self.banco.buscar_cuentas_filtro(termino)
-        self.tabla.setRowCount(len(cuentas))
-        for i, c in enumerate(cuentas):
-            tipo = "CA" if isinstance(c, logica.CajaAhorro) else "CC"
-            self.tabla.setItem(i, 0, QTableWidgetItem(c.numero))
-            self.tabla.setItem(i, 1, QTableWidgetItem(f"{c.titular.nombre} {c.titular.apellido}"))
-            self.tabla.setItem(i, 2, QTableWidgetItem(f"{tipo} ({c.categoria})"))
-            self.tabla.setItem(i, 3, QTableWidgetItem(c.titular.dni))
-            self.tabla.item(i, 0).setData(Qt.ItemDataRole.UserRole, c)
+    def buscar(self): self.busqueda.ejecutar()
+    def mostrar_cuentas(self, cuentas):
+        self.modelo.cargar([(c.numero, f"{c.titular.nombre} {c.titular.apellido}",
+                             f"{'CA' if isinstance(c, logica.CajaAhorro) else 'CC'} ({c.categoria})", c.titular.dni)
+                            for c in cuentas], cuentas)
     def seleccionar(self):
-        fila = self.tabla.currentRow()
+        fila = self.tabla.currentIndex().row()
         if fila >= 0:
-            self.cuenta_seleccionada = self.tabla.item(fila, 0).data(Qt.ItemDataRole.UserRole)
+            self.cuenta_seleccionada = self.modelo.dato(fila)
             self.accept()
 
 class DialogoPlazosFijos(QDialog):
@@ -579,7 +847,7 @@ class DialogoPlazosFijos(QDialog):
         tabs = QTabWidget()
         tab_nuevo = QWidget()
         layout_nuevo = QFormLayout(tab_nuevo)
-        self.lbl_saldo = QLabel(f"Saldo Disponible: ${cuenta.saldo:.2f}")
+        self.lbl_saldo = QLabel(f"Saldo Disponible: {logica.formatear_pesos(cuenta.saldo)}")
         self.lbl_saldo.setStyleSheet("font-weight: bold; color: green;")
         self.combo_dias = QComboBox()
         self.combo_dias.addItem("30 días", 30)
@@ -609,14 +877,14 @@ class DialogoPlazosFijos(QDialog):
         layout.addWidget(btn_cerrar)
         self.cargar_tabla()
     def constituir(self):
-        try: monto = float(self.campo_monto.text().replace(',', '.'))
+        try: monto = logica.a_centavos(self.campo_monto.text())
         except: 
             QMessageBox.warning(self, "Error", "Monto inválido")
             return
         dias = self.combo_dias.currentData()
         if self.cuenta.constituir_plazo_fijo(monto, dias, self.banco.default_tasa_anual_pf):
             QMessageBox.information(self, "Éxito", "Plazo Fijo constituido.")
-            self.lbl_saldo.setText(f"Saldo Disponible: ${self.cuenta.saldo:.2f}")
+            self.lbl_saldo.setText(f"Saldo Disponible: {logica.formatear_pesos(self.cuenta.saldo)}")
             self.campo_monto.clear()
             self.cargar_tabla()
         else: QMessageBox.warning(self, "Error", "Saldo insuficiente o inválido.")
@@ -626,7 +894,7 @@ class DialogoPlazosFijos(QDialog):
         self.tabla.setRowCount(len(pfs))
         for i, pf in enumerate(pfs):
             self.tabla.setItem(i, 0, QTableWidgetItem(str(pf['id'])))
-            self.tabla.setItem(i, 1, QTableWidgetItem(f"${pf['monto_final']:.2f}"))
+            self.tabla.setItem(i, 1, QTableWidgetItem(logica.formatear_pesos(pf['monto_final'])))
             venc = pf['fecha_vencimiento']
             self.tabla.setItem(i, 2, QTableWidgetItem(venc.strftime('%d-%m-%Y')))
             self.tabla.setItem(i, 3, QTableWidgetItem(pf['estado']))
@@ -645,7 +913,7 @@ class DialogoPlazosFijos(QDialog):
         res = self.cuenta.cobrar_plazo_fijo(id_pf)
         if res == "OK":
             QMessageBox.information(self, "Éxito", "Plazo Fijo acreditado.")
-            self.lbl_saldo.setText(f"Saldo Disponible: ${self.cuenta.saldo:.2f}")
+            self.lbl_saldo.setText(f"Saldo Disponible: {logica.formatear_pesos(self.cuenta.saldo)}")
             self.cargar_tabla()
         else: QMessageBox.warning(self, "Error", f"{res}")
 
@@ -689,7 +957,7 @@ class DialogoSeleccionarCuenta(QDialog):
         self.combo_cuentas = QComboBox()
         for cuenta in cuentas:
             tipo = "Caja Ahorro" if isinstance(cuenta, logica.CajaAhorro) else "Cta Corriente"
-            texto = f"N°: {cuenta.numero} | {tipo} ({cuenta.categoria}) | ${cuenta.saldo:.2f}"
+            texto = f"N°: {cuenta.numero} | {tipo} ({cuenta.categoria}) | {logica.formatear_pesos(cuenta.saldo)}"
             self.combo_cuentas.addItem(texto, userData=cuenta)
         layout.addWidget(self.combo_cuentas)
         botones = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel, self)
@@ -712,8 +980,9 @@ class DialogoInputMonto(QDialog):
         botones.rejected.connect(self.reject)
         layout.addWidget(botones)
     def obtener_monto(self):
-        try: return float(self.campo_monto.text().replace(',', '.'))
-        except: return 0.0
+        """Monto ingresado, en centavos."""
+        try: return logica.a_centavos(self.campo_monto.text())
+        except: return 0
 
 class DialogoTransferencia(QDialog):
     def __init__(self, parent=None):
@@ -744,10 +1013,10 @@ class DialogoTransferencia(QDialog):
         self.txt_destino.setText(f"N° {cuenta.numero} - {cuenta.titular.nombre}")
     def obtener_datos_transferencia(self):
         try:
-            monto = float(self.campo_monto.text().replace(',', '.'))
-            if not self.nro_destino_seleccionado: return None, 0.0
+            monto = logica.a_centavos(self.campo_monto.text())
+            if not self.nro_destino_seleccionado: return None, 0
             return self.nro_destino_seleccionado, monto
-        except: return None, 0.0
+        except: return None, 0
 
 class DialogoFiltrarMovimientos(QDialog):
     def __init__(self, parent=None):
@@ -770,15 +1039,53 @@ class DialogoFiltrarMovimientos(QDialog):
     def obtener_filtros(self):
         return {"tipo": self.combo.currentText(), "desde": self.desde.date().toPyDate(), "hasta": self.hasta.date().toPyDate()}
 
+class ModeloMovimientos(ModeloTablaFilas):
+    """
+    Historial de movimientos que se carga por páginas (Banco.pagina_movimientos).
+    La vista pide más filas (canFetchMore/fetchMore) a medida que se hace scroll,
+    así abrir el historial de una cuenta con miles de movimientos es inmediato.
+    Cada página se consulta en segundo plano (ejecutor_consultas) y se agrega al llegar.
+    """
+    COLUMNAS = [("Fecha", lambda f: f.strftime('%d-%m-%Y %H:%M')), ("Tipo", None), ("Monto", logica.formatear_pesos),
+                ("Descripción", None), ("Origen", None), ("Destino", None)]
+
+    def __init__(self, banco, ids_cuenta, filtros, parent=None):
+        super().__init__(self.COLUMNAS, parent)
+        self.banco = banco
+        self.ids_cuenta = ids_cuenta
+        self.filtros = filtros
+        self.cursor, self.hay_mas, self.cargando = None, True, False
+        self.fetchMore(QModelIndex())  # Primera página
+
+    def canFetchMore(self, parent=QModelIndex()): return not parent.isValid() and self.hay_mas and not self.cargando
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent): return
+        self.cargando = True  # Una página por vez: la siguiente sigue desde el cursor de esta
+        ejecutor_consultas().ejecutar(
+            ("movimientos", id(self)), self.banco.pagina_movimientos,
+            self.ids_cuenta, self.filtros['desde'], self.filtros['hasta'], self.filtros['tipo'], self.cursor,
+            al_terminar=self._agregar_pagina, al_fallar=self._fallo_pagina)
+
+    def _agregar_pagina(self, resultado):
+        nuevas, self.cursor = resultado
+        self.hay_mas, self.cargando = self.cursor is not None, False
+        self.agregar((f['fecha'], f['tipo'], f['monto'], f['descripcion'], f['nro_cuenta_origen'], f['nro_cuenta_destino'])
+                     for f in nuevas)
+
+    def _fallo_pagina(self, error):
+        self.hay_mas, self.cargando = False, False
+        QMessageBox.critical(None, "Error", f"No se pudieron cargar los movimientos: {error}")
+
 class DialogoMostrarMovimientosEnTabla(QDialog):
-    def __init__(self, titulo, filas, parent=None):
+    def __init__(self, titulo, modelo, parent=None):
         super().__init__(parent)
         self.setWindowTitle(titulo)
         self.resize(600, 400)
-        self.filas = filas
+        self.modelo = modelo
         layout = QVBoxLayout(self)
-        self.tabla = QTableWidget()
-        self.poblar_tabla()
+        # Sin ordenar por columna: el orden es el de la paginación (más nuevos primero)
+        self.tabla = crear_vista_tabla(modelo, ordenable=False)
         layout.addWidget(self.tabla)
         layout_botones = QHBoxLayout()
         self.btn_exportar = QPushButton("Exportar CSV")
@@ -787,28 +1094,14 @@ class DialogoMostrarMovimientosEnTabla(QDialog):
         layout_botones.addWidget(self.btn_cerrar)
         layout.addLayout(layout_botones)
         self.btn_cerrar.clicked.connect(self.accept)
-    def poblar_tabla(self):
-        self.tabla.setColumnCount(6)
-        self.tabla.setHorizontalHeaderLabels(["Fecha", "Tipo", "Monto", "Descripción", "Origen", "Destino"])
-        self.tabla.setRowCount(len(self.filas))
-        if not self.filas: return
-        for i, fila in enumerate(self.filas):
-            fecha_str = fila['fecha'].strftime('%d-%m-%Y %H:%M')
-            monto_str = f"${fila['monto']:.2f}"
-            self.tabla.setItem(i, 0, QTableWidgetItem(fecha_str))
-            self.tabla.setItem(i, 1, QTableWidgetItem(fila['tipo']))
-            self.tabla.setItem(i, 2, QTableWidgetItem(monto_str))
-            self.tabla.setItem(i, 3, QTableWidgetItem(fila['descripcion'] or ""))
-            self.tabla.setItem(i, 4, QTableWidgetItem(fila['nro_cuenta_origen'] or ""))
-            self.tabla.setItem(i, 5, QTableWidgetItem(fila['nro_cuenta_destino'] or ""))
-        self.tabla.resizeColumnsToContents()
-        self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.tabla.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
 
 # ==========================================
 # 6. CONTROLADOR PRINCIPAL
 # ==========================================
 
+# Cada cuánto se buscan plazos fijos vencidos para acreditarlos solos (1 hora)
+INTERVALO_VENCIMIENTOS_MS = 60 * 60 * 1000
+
 class ControladorApp:
     def __init__(self):
         logica.inicializar_bd()
@@ -817,6 +1110,10 @@ class ControladorApp:
         self.app.setStyle("Fusion")
         self.ventana = VentanaPrincipal()
         self.conectar_botones()
+        # Acreditación automática de plazos fijos vencidos (al iniciar y luego periódicamente)
+        self.timer_vencimientos = QTimer()
+        self.timer_vencimientos.timeout.connect(self.procesar_vencimientos)
+        self.timer_vencimientos.start(INTERVALO_VENCIMIENTOS_MS)
 
     def conectar_botones(self):
         self.ventana.btn_crear.clicked.connect(self.crear_cuenta)
@@ -825,6 +1122,7 @@ class ControladorApp:
         self.ventana.btn_salir.clicked.connect(self.salir)
 
     def iniciar(self):
+        self.procesar_vencimientos()
         self.ventana.show()
         sys.exit(self.app.exec())
 
@@ -834,53 +1132,11 @@ class ControladorApp:
             if not dialogo.exec(): return
 
             d = dialogo.obtener_datos()
-            if not d["nombre"] or not d["apellido"] or not d["dni"]:
-                QMessageBox.warning(self.ventana, "Error", "Faltan datos obligatorios.")
-                continue
-            
-            cliente = logica.Cliente.buscar_por_dni(d["dni"])
-            
-            if cliente:
-                if cliente.activo == 0:
-                    QMessageBox.warning(self.ventana, "Aviso", "Cliente dado de baja.")
-                    continue
-            else:
-                cliente = logica.Cliente(d["nombre"], d["apellido"], d["dni"], d["email"])
-                if not cliente.guardar():
-                    cliente = logica.Cliente.buscar_por_dni(d["dni"])
-                    if not cliente:
-                        QMessageBox.critical(self.ventana, "Error", "Error crítico BD.")
-                        continue
-
-            cuentas_existentes = logica.CuentaBase.recuperar_por_cliente(cliente.id_bd)
-            categoria_solicitada = d["categoria"]
-            tipo_solicitado = d["tipo_cuenta"]
-            
-            mapa_clases = {
-                "Caja de Ahorro": logica.CajaAhorro,
-                "Cuenta Corriente": logica.CuentaCorriente
-            }
-            clase_buscada = mapa_clases[tipo_solicitado]
-            
-            duplicada = False
-            for c in cuentas_existentes:
-                if isinstance(c, clase_buscada) and c.categoria == categoria_solicitada:
-                    duplicada = True
-                    break
-            
-            if duplicada:
-                QMessageBox.warning(self.ventana, "Aviso", f"Ya posee una {tipo_solicitado} ({categoria_solicitada}).")
+            cuenta, error = self.banco.abrir_cuenta(d)
+            if error:
+                QMessageBox.warning(self.ventana, "Aviso", error)
                 continue
-
-            nro = str(self.banco.generar_numero_cuenta())
-            
-            if tipo_solicitado == "Caja de Ahorro":
-                cuenta = logica.CajaAhorro(nro, cliente, categoria_solicitada)
-            else:
-                cuenta = logica.CuentaCorriente(nro, cliente, categoria_solicitada, 0, self.banco.default_limite_descubierto_cc, self.banco.default_costo_mantenimiento_cc)
-            
-            cuenta.guardar()
-            QMessageBox.information(self.ventana, "Éxito", f"Cuenta N°{nro} creada.")
+            QMessageBox.information(self.ventana, "Éxito", f"Cuenta N°{cuenta.numero} creada.")
             break
 
     def ingresar_a_cuenta(self):
@@ -920,7 +1176,7 @@ class ControladorApp:
         txt = ""
         for c in cuentas:
             tipo_c = "CA" if isinstance(c, logica.CajaAhorro) else "CC"
-            txt += f"{tipo_c} ({c.categoria}) N°{c.numero} | ${c.saldo:.2f}\n"
+            txt += f"{tipo_c} ({c.categoria}) N°{c.numero} | {logica.formatear_pesos(c.saldo)}\n"
         diag.resumen_cuentas_texto.setText(txt)
 
     def abrir_plazos_fijos(self, cuentas, diag_padre):
@@ -932,7 +1188,7 @@ class ControladorApp:
 
     def cons_saldo(self, cuentas):
         c = self.sel_cuenta(cuentas)
-        if c: QMessageBox.information(self.ventana, "Saldo", f"${c.saldo:.2f}")
+        if c: QMessageBox.information(self.ventana, "Saldo", logica.formatear_pesos(c.saldo))
 
     def sel_cuenta(self, cuentas):
         if not cuentas: return None
@@ -968,8 +1224,7 @@ class ControladorApp:
         if not c_dest:
             QMessageBox.critical(self.ventana, "Error", "Destino no existe.")
             return
-        comision = self.banco.comision_transferencia if c_orig.titular.dni != c_dest.titular.dni else 0
-        mov_orig, _ = c_orig.transferir(monto, c_dest, comision)
+        mov_orig, _ = c_orig.transferir(monto, c_dest, self.banco.comision_entre(c_orig, c_dest))
         if mov_orig:
             QMessageBox.information(self.ventana, "Éxito", "Transferencia OK.")
             self.actualizar_resumen(diag_padre, cuentas)
@@ -981,38 +1236,21 @@ class ControladorApp:
             dialogo_trans.set_cuenta_destino(d_bus.cuenta_seleccionada)
 
     def ver_movs(self, cuentas):
-        ids = [str(c.id_bd) for c in cuentas]
+        ids = [c.id_bd for c in cuentas]
         while True:
             df = DialogoFiltrarMovimientos(self.ventana)
             if not df.exec(): break
             filtros = df.obtener_filtros()
-            conn = logica.conectar_bd()
-            q = f"SELECT * FROM movimientos WHERE id_cuenta IN ({','.join(['?']*len(ids))})"
-            p = list(ids)
-            f_desde = datetime.combine(filtros['desde'], datetime.min.time())
-            f_hasta = datetime.combine(filtros['hasta'], datetime.max.time())
-            q += " AND fecha BETWEEN ? AND ?"
-            p.extend([f_desde, f_hasta])
-            if filtros['tipo'] != "Todos":
-                q += " AND tipo LIKE ?"
-                p.append(f"{filtros['tipo']}%")
-            q += " ORDER BY fecha DESC"
-            rows = conn.execute(q, p).fetchall()
-            conn.close()
-            d = DialogoMostrarMovimientosEnTabla(f"Movimientos ({filtros['tipo']})", rows, self.ventana)
-            d.btn_exportar.clicked.connect(lambda: self.exportar_movimientos_csv(rows))
+            modelo = ModeloMovimientos(self.banco, ids, filtros)
+            d = DialogoMostrarMovimientosEnTabla(f"Movimientos ({filtros['tipo']})", modelo, self.ventana)
+            d.btn_exportar.clicked.connect(lambda checked=False, f=filtros: self.exportar_movimientos_csv(ids, f))
             d.exec()
 
-    def exportar_movimientos_csv(self, filas):
-        nombre, _ = QFileDialog.getSaveFileName(self.ventana, "Guardar", "movs.csv", "CSV (*.csv)")
+    def exportar_movimientos_csv(self, ids, filtros):
+        nombre, _ = QFileDialog.getSaveFileName(self.ventana, "Guardar", "movs.csv", "CSV (*.csv);;CSV comprimido (*.csv.gz)")
         if nombre:
             try:
-                with open(nombre, 'w', newline='', encoding='utf-8') as f:
-                    w = csv.writer(f, delimiter=';')
-                    w.writerow(["Fecha", "Tipo", "Monto", "Desc", "Orig", "Dest"])
-                    for r in filas:
-                        fecha = r['fecha'].strftime('%Y-%m-%d %H:%M')
-                        w.writerow([fecha, r['tipo'], str(r['monto']).replace('.',','), r['descripcion'], r['nro_cuenta_origen'], r['nro_cuenta_destino']])
+                exportacion_banco.exportar_movimientos(self.banco, nombre, ids, filtros['desde'], filtros['hasta'], filtros['tipo'])
                 QMessageBox.information(self.ventana, "Éxito", "Guardado.")
             except Exception as e: QMessageBox.critical(self.ventana, "Error", str(e))
 
@@ -1029,40 +1267,75 @@ class ControladorApp:
             p = d.obtener_parametros()
             try:
                 self.banco.default_tasa_anual_pf = float(p["tasa_pf"])
-                self.banco.default_costo_mantenimiento_cc = float(p["costo_cc"])
-                self.banco.default_limite_descubierto_cc = float(p["descubierto_cc"])
-                self.banco.comision_transferencia = float(p["comision"])
+                self.banco.default_costo_mantenimiento_cc = logica.a_centavos(p["costo_cc"])
+                self.banco.default_limite_descubierto_cc = logica.a_centavos(p["descubierto_cc"])
+                self.banco.comision_transferencia = logica.a_centavos(p["comision"])
                 self.banco.guardar_configuracion_db()
                 QMessageBox.information(parent, "Éxito", "Parámetros actualizados.")
             except: QMessageBox.warning(parent, "Error", "Valores numéricos inválidos.")
 
     def generar_informe(self, ventana_padre=None):
         parent = ventana_padre if ventana_padre else self.ventana
-        filas = self.banco.obtener_datos_reporte_global()
-        if not filas:
+        if not self.banco.tiene_cuentas():
             QMessageBox.warning(parent, "Aviso", "Sin datos.")
             return
-        nombre, _ = QFileDialog.getSaveFileName(parent, "Reporte", f"reporte_{date.today()}.csv", "CSV (*.csv)")
+        nombre, _ = QFileDialog.getSaveFileName(parent, "Reporte", f"reporte_{date.today()}.csv", "CSV (*.csv);;CSV comprimido (*.csv.gz)")
         if nombre:
-            try:
-                with open(nombre, 'w', newline='', encoding='utf-8') as f:
-                    w = csv.writer(f, delimiter=';')
-                    w.writerow(["Nro", "Tipo", "Categoria", "Saldo", "Nombre", "Apellido", "DNI", "Email", "Activo"])
-                    for fila in filas:
-                        w.writerow([fila['numero'], fila['tipo_cuenta'], fila['categoria'], 
-                                    str(fila['saldo']).replace('.',','), fila['nombre'], fila['apellido'], 
-                                    fila['dni'], fila['email'], fila['activo']])
-                QMessageBox.information(parent, "Éxito", "Reporte generado.")
-            except Exception as e: QMessageBox.critical(parent, "Error", str(e))
+            ejecutor_consultas().ejecutar(
+                "informe", exportacion_banco.exportar_reporte_global, self.banco, nombre,
+                al_terminar=lambda cantidad: QMessageBox.information(parent, "Éxito", "Reporte generado."),
+                al_fallar=lambda e: QMessageBox.critical(parent, "Error", str(e)))
 
     def ver_saldo_total(self, ventana_padre=None):
         padre = ventana_padre if ventana_padre else self.ventana
-        conexion = logica.conectar_bd()
-        total = conexion.execute("SELECT SUM(saldo) as total FROM cuentas").fetchone()['total'] or 0.0
-        conexion.close()
-        QMessageBox.information(padre, "Total", f"Total Activos: ${total:.2f}")
+        ejecutor_consultas().ejecutar(
+            "saldo_total", self.banco.obtener_saldo_total,
+            al_terminar=lambda total: QMessageBox.information(padre, "Total", f"Total Activos: {logica.formatear_pesos(total)}"),
+            al_fallar=lambda e: QMessageBox.critical(padre, "Error", str(e)))
+
+    def cobrar_mantenimiento(self, ventana_padre=None):
+        padre = ventana_padre if ventana_padre else self.ventana
+        # Primero una simulación para que el administrador confirme (las dos pasadas, en segundo plano)
+        ejecutor_consultas().ejecutar(
+            "mantenimiento", self.banco.cobrar_mantenimiento_mensual, simular=True,
+            al_terminar=lambda previo: self._confirmar_mantenimiento(padre, previo),
+            al_fallar=lambda e: QMessageBox.critical(padre, "Error", str(e)))
+
+    def _confirmar_mantenimiento(self, padre, previo):
+        if previo["cuentas"] == 0:
+            QMessageBox.information(padre, "Mantenimiento", f"No hay cuentas pendientes de cobro en {previo['periodo']}.")
+            return
+        res = QMessageBox.question(padre, "Confirmar",
+                                   f"Se cobrará el mantenimiento {previo['periodo']} a {previo['cuentas']} cuentas "
+                                   f"por un total de {logica.formatear_pesos(previo['total'], miles=True)}. ¿Continuar?",
+                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if res != QMessageBox.StandardButton.Yes: return
+        ejecutor_consultas().ejecutar(
+            "mantenimiento", self.banco.cobrar_mantenimiento_mensual, previo["periodo"],
+            al_terminar=lambda r: QMessageBox.information(
+                padre, "Mantenimiento", f"Cobradas {r['cuentas']} cuentas ({logica.formatear_pesos(r['total'], miles=True)}) "
+                                        f"en {r['segundos']:.2f}s."),
+            al_fallar=lambda e: QMessageBox.critical(padre, "Error", str(e)))
+
+    def procesar_vencimientos(self):
+        ejecutor_consultas().ejecutar("vencimientos", self.banco.procesar_vencimientos_plazos_fijos,
+                                      al_terminar=self.informar_vencimientos,
+                                      al_fallar=self.fallo_vencimientos)
+
+    def informar_vencimientos(self, r):
+        # En la barra de estado: es un proceso automático, no debe interrumpir al cajero
+        if r["procesados"]:
+            self.ventana.statusBar().showMessage(
+                f"Vencimientos PF: {r['procesados']} acreditados ({logica.formatear_pesos(r['total'])}) "
+                f"en {r['segundos']:.2f}s.")
+
+    def fallo_vencimientos(self, error):
+        logica.log.error("Error al acreditar vencimientos de plazos fijos: %s", error)
+        self.ventana.statusBar().showMessage(f"Error al acreditar vencimientos de plazos fijos: {error}")
 
     def salir(self):
+        ejecutor_consultas().esperar()  # No cortar una escritura a mitad de camino
+        logica.cerrar_conexiones()
         self.app.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Ejecución de operaciones por lotes, sin interfaz gráfica (procesos nocturnos y pruebas de carga).
+
+Lee operaciones en JSONL (una por línea) de un archivo o de la entrada estándar y las ejecuta
+con las mismas clases que usa la interfaz (Banco, CuentaBase, ...), midiendo cuánto tarda cada una.
+Con --hilos N se reparten entre N hilos (cada uno usa su propia conexión del pool); con un solo
+hilo (default) se ejecutan en el orden del archivo.
+
+Operaciones (los importes van en pesos, como número o texto '1500,50'):
+    {"op": "abrir_cuenta", "nombre": "Ana", "apellido": "Paz", "dni": "30111222", "email": "",
+     "categoria": "Persona", "tipo_cuenta": "Caja de Ahorro"}
+    {"op": "depositar", "cuenta": "12", "monto": "1500,50"}
+    {"op": "extraer", "cuenta": "12", "monto": 200}
+    {"op": "transferir", "origen": "12", "destino": "15", "monto": 300}
+    {"op": "plazo_fijo", "cuenta": "12", "monto": 1000, "dias": 30}
+    {"op": "saldo", "cuenta": "12"}
+    {"op": "saldo_total"}
+    {"op": "reporte", "archivo": "reporte.csv"}
+    {"op": "mantenimiento", "periodo": "2026-10", "simular": false}
+    {"op": "vencimientos"}
+
+Uso:
+    python lotes_banco.py operaciones.jsonl
+    python lotes_banco.py operaciones.jsonl.gz --hilos 8 --resultados resultados.jsonl
+    echo '{"op": "saldo_total"}' | python lotes_banco.py - --bd prueba.sqlite --perfil bulk-load
+"""
+import sys
+import gzip
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import codigo_banco as logica
+import exportacion_banco
+
+# --- LECTURA ---
+def leer_operaciones(ruta):
+    """Genera (nro_linea, operación) desde un JSONL (.gz opcional) o desde stdin si ruta es '-'."""
+    if ruta == "-": f = sys.stdin
+    elif ruta.endswith(".gz"): f = gzip.open(ruta, "rt", encoding="utf-8")
+    else: f = open(ruta, encoding="utf-8")
+    try:
+        for nro, linea in enumerate(f, start=1):
+            linea = linea.strip()
+            if not linea or linea.startswith("#"): continue
+            try: datos = json.loads(linea)
+            except json.JSONDecodeError as e: datos = {"op": None, "error": f"JSON inválido: {e.msg}"}
+            if not isinstance(datos, dict):  # JSON válido pero no un objeto: [1], "x", 3
+                datos = {"op": None, "error": "La línea debe ser un objeto JSON con el campo 'op'."}
+            yield nro, datos
+    finally:
+        if f is not sys.stdin: f.close()
+
+# --- OPERACIONES ---
+# Cada operación recibe (banco, datos) y devuelve un texto con el resultado;
+# si no se pudo hacer lanza ValueError con el motivo.
+
+def _cuenta(datos, campo="cuenta"):
+    numero = str(datos.get(campo, "")).strip()
+    cuenta = logica.CuentaBase.buscar_por_numero(numero)
+    if not cuenta: raise ValueError(f"Cuenta inexistente: {numero}")
+    return cuenta
+
+def _monto(datos):
+    try: monto = logica.a_centavos(datos["monto"])
+    except (KeyError, ArithmeticError): raise ValueError("Monto inválido.")
+    if monto <= 0: raise ValueError("El monto debe ser positivo.")
+    return monto
+
+def op_abrir_cuenta(banco, datos):
+    cuenta, error = banco.abrir_cuenta(datos)
+    if error: raise ValueError(error)
+    return f"Cuenta {cuenta.numero}"
+
+def op_depositar(banco, datos):
+    cuenta = _cuenta(datos)
+    if not cuenta.depositar(_monto(datos)): raise ValueError("Depósito rechazado.")
+    return logica.formatear_pesos(cuenta.saldo)
+
+def op_extraer(banco, datos):
+    cuenta = _cuenta(datos)
+    if not cuenta.extraer(_monto(datos)): raise ValueError("Fondos insuficientes.")
+    return logica.formatear_pesos(cuenta.saldo)
+
+def op_transferir(banco, datos):
+    origen, destino = _cuenta(datos, "origen"), _cuenta(datos, "destino")
+    mov_origen, _ = origen.transferir(_monto(datos), destino, banco.comision_entre(origen, destino))
+    if not mov_origen: raise ValueError("Transferencia rechazada (misma cuenta o fondos insuficientes).")
+    return logica.formatear_pesos(origen.saldo)
+
+def op_plazo_fijo(banco, datos):
+    # La tasa es siempre la vigente del banco (como en la interfaz): el lote no puede elegirla
+    cuenta = _cuenta(datos)
+    dias = int(datos.get("dias", 30))
+    if dias <= 0: raise ValueError("Los días del plazo fijo deben ser positivos.")
+    if not cuenta.constituir_plazo_fijo(_monto(datos), dias, banco.default_tasa_anual_pf):
+        raise ValueError("Saldo insuficiente.")
+    return logica.formatear_pesos(cuenta.saldo)
+
+def op_saldo(banco, datos):
+    return logica.formatear_pesos(_cuenta(datos).saldo)
+
+def op_saldo_total(banco, datos):
+    return logica.formatear_pesos(banco.obtener_saldo_total())
+
+def op_reporte(banco, datos):
+    archivo = datos.get("archivo") or f"reporte_{date.today().isoformat()}.csv"
+    cantidad = exportacion_banco.exportar_reporte_global(banco, archivo)
+    return f"{cantidad} cuentas en {archivo}"
+
+def op_mantenimiento(banco, datos):
+    r = banco.cobrar_mantenimiento_mensual(datos.get("periodo"), simular=bool(datos.get("simular")))
+    return f"{r['periodo']}: {r['cuentas']} cuentas, {logica.formatear_pesos(r['total'])}"
+
+def op_vencimientos(banco, datos):
+    fecha = date.fromisoformat(datos["fecha"]) if datos.get("fecha") else None
+    r = banco.procesar_vencimientos_plazos_fijos(fecha)
+    return f"{r['procesados']} plazos fijos, {logica.formatear_pesos(r['total'])}"
+
+OPERACIONES = {
+    "abrir_cuenta": op_abrir_cuenta, "depositar": op_depositar, "extraer": op_extraer,
+    "transferir": op_transferir, "plazo_fijo": op_plazo_fijo, "saldo": op_saldo,
+    "saldo_total": op_saldo_total, "reporte": op_reporte, "mantenimiento": op_mantenimiento,
+    "vencimientos": op_vencimientos,
+}
+
+# --- ESTADÍSTICAS ---
+class EstadisticasLote:
+    """Tiempos por tipo de operación (para el resumen final); se puede usar desde varios hilos."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tiempos = {}   # op -> [segundos]
+        self.errores = {}   # op -> cantidad
+        self.inicio = time.perf_counter()
+
+    def registrar(self, op, segundos, ok):
+        with self._lock:
+            self.tiempos.setdefault(op, []).append(segundos)
+            if not ok: self.errores[op] = self.errores.get(op, 0) + 1
+
+    @property
+    def total(self): return sum(len(t) for t in self.tiempos.values())
+
+    @property
+    def total_errores(self): return sum(self.errores.values())
+
+    def resumen(self):
+        """Tabla de texto: cantidad, errores y latencias (ms) por operación."""
+        duracion = time.perf_counter() - self.inicio
+        lineas = [f"{'operación':<14}{'cant':>8}{'err':>6}{'media':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}"]
+        for op, tiempos in sorted(self.tiempos.items()):
+            t = sorted(tiempos)
+            p = lambda q: t[min(len(t) - 1, int(q * len(t)))] * 1000
+            lineas.append(f"{op:<14}{len(t):>8}{self.errores.get(op, 0):>6}{sum(t) / len(t) * 1000:>9.2f}"
+                          f"{p(0.50):>9.2f}{p(0.95):>9.2f}{p(0.99):>9.2f}{t[-1] * 1000:>9.2f}")
+        lineas.append(f"{self.total} operaciones, {self.total_errores} con error, en {duracion:.2f}s "
+                      f"({self.total / duracion if duracion else 0:,.0f} ops/s)")
+        return "\n".join(lineas)
+
+# --- EJECUCIÓN ---
+class EjecutorLotes:
+    """
+    Ejecuta operaciones contra un Banco y mide cada una.
+    Con hilos > 1 las reparte en un ThreadPoolExecutor, pero solo deja en vuelo unas pocas por hilo:
+    las operaciones se van leyendo a medida que se ejecutan (stdin o archivos de cualquier tamaño).
+    """
+    def __init__(self, banco, hilos=1, al_resultado=None):
+        self.banco = banco
+        self.hilos = max(1, hilos)
+        self.al_resultado = al_resultado  # Función(dict) para cada resultado (ej: escribir un JSONL)
+        self.estadisticas = EstadisticasLote()
+
+    def ejecutar_una(self, nro, datos):
+        op = datos.get("op")
+        funcion = OPERACIONES.get(op)
+        inicio = time.perf_counter()
+        try:
+            if funcion is None: raise ValueError(datos.get("error") or f"Operación desconocida: {op}")
+            detalle, ok = funcion(self.banco, datos), True
+        except (ValueError, TypeError, ArithmeticError) as e: detalle, ok = str(e), False
+        except sqlite3.Error as e: detalle, ok = f"Error de BD: {e}", False
+        segundos = time.perf_counter() - inicio
+        self.estadisticas.registrar(op if funcion else "(inválida)", segundos, ok)
+        resultado = {"linea": nro, "op": op, "ok": ok, "ms": round(segundos * 1000, 3), "detalle": detalle}
+        if self.al_resultado: self.al_resultado(resultado)
+        return resultado
+
+    def ejecutar(self, operaciones):
+        if self.hilos == 1:
+            for nro, datos in operaciones: self.ejecutar_una(nro, datos)
+            return self.estadisticas
+        with ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="lote") as pool:
+            pendientes = set()
+            for nro, datos in operaciones:
+                pendientes.add(pool.submit(self.ejecutar_una, nro, datos))
+                if len(pendientes) >= self.hilos * 4:
+                    hechas, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    for f in hechas: f.result()  # Un error inesperado no se pierde en el hilo
+            for f in wait(pendientes).done: f.result()
+        return self.estadisticas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ejecución de operaciones del Banco POO por lotes (sin interfaz)")
+    parser.add_argument("archivo", help="JSONL con una operación por línea (.gz opcional, '-' = stdin)")
+    parser.add_argument("--hilos", type=int, default=1, help="Operaciones en paralelo (default 1, en orden)")
+    parser.add_argument("--bd", help="Archivo de base de datos (default: el de la aplicación)")
+    parser.add_argument("--perfil", choices=sorted(logica.PERFILES_ALMACENAMIENTO), help="Perfil de almacenamiento")
+    parser.add_argument("--resultados", help="Escribir el resultado de cada operación en este JSONL")
+    parser.add_argument("--silencioso", action="store_true", help="No mostrar las operaciones con error")
+    args = parser.parse_args(argv)
+
+    if args.bd: logica.RUTA_BD = args.bd
+    banco = logica.Banco(nombre="Banco POO", perfil_bd=args.perfil)
+    salida = open(args.resultados, "w", encoding="utf-8") if args.resultados else None
+    lock_salida = threading.Lock()
+
+    def al_resultado(r):
+        with lock_salida:
+            if salida: salida.write(json.dumps(r, ensure_ascii=False) + "\n")
+            if not r["ok"] and not args.silencioso: print(f"  línea {r['linea']} ({r['op']}): {r['detalle']}")
+
+    try:
+        estadisticas = EjecutorLotes(banco, args.hilos, al_resultado).ejecutar(leer_operaciones(args.archivo))
+    finally:
+        if salida: salida.close()
+        logica.cerrar_conexiones()
+    print(estadisticas.resumen())
+    return 0 if estadisticas.total_errores == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Mide cuánto tarda en aparecer la ventana principal (cajero) y qué módulos pesan en el arranque.
+
+1. Importaciones: ejecuta `python -X importtime -c "import interfaz_banco"` y muestra los módulos
+   que más tardan (tiempo propio y acumulado), y si matplotlib se cargó al iniciar (no debería:
+   se carga recién al abrir el Panel de Análisis).
+2. Arranque: en procesos nuevos (sin nada en caché de Python) mide por etapas importar,
+   crear el controlador (BD, Banco, QApplication, ventana) y mostrar la ventana, y compara
+   la mediana con el objetivo.
+
+Uso:
+    python medir_arranque.py
+    python medir_arranque.py --bd copia_produccion.sqlite --repeticiones 10 --top 20
+Sin pantalla (servidores, CI) usa QT_QPA_PLATFORM=offscreen automáticamente.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+# Tiempo máximo aceptable hasta ver la ventana principal (segundos, desde que arranca Python)
+OBJETIVO_SEGUNDOS = 1.0
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+# Programa que corre en cada proceso medido: imprime los tiempos de cada etapa en JSON
+PROGRAMA_ARRANQUE = r"""
+import sys, time, json
+t0 = time.perf_counter()
+import interfaz_banco
+t1 = time.perf_counter()
+if sys.argv[1]: interfaz_banco.logica.RUTA_BD = sys.argv[1]
+controlador = interfaz_banco.ControladorApp()
+t2 = time.perf_counter()
+controlador.ventana.show()
+controlador.app.processEvents()
+t3 = time.perf_counter()
+print(json.dumps({"importar": t1 - t0, "controlador": t2 - t1, "mostrar": t3 - t2,
+                  "matplotlib_cargado": "matplotlib" in sys.modules}))
+interfaz_banco.logica.cerrar_conexiones()
+"""
+
+def _entorno():
+    entorno = dict(os.environ)
+    if sys.platform.startswith("linux") and not (entorno.get("DISPLAY") or entorno.get("WAYLAND_DISPLAY")):
+        entorno.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return entorno
+
+def medir_importaciones(top=15):
+    """Parsea el informe de -X importtime. Devuelve (total_us, [(propio_us, acumulado_us, módulo)])."""
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", "import interfaz_banco"],
+                             cwd=CARPETA, env=_entorno(), capture_output=True, text=True)
+    if proceso.returncode != 0: raise RuntimeError(proceso.stderr.strip().splitlines()[-1])
+    modulos = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea: continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        modulos.append((int(propio), int(acumulado), nombre.rstrip()))
+    total = next((a for _, a, n in modulos if n.strip() == "interfaz_banco"), sum(p for p, _, _ in modulos))
+    return total, modulos
+
+def medir_arranque(ruta_bd="", repeticiones=5):
+    """Corre el arranque en `repeticiones` procesos nuevos; devuelve la lista de mediciones (dicts)."""
+    mediciones = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        proceso = subprocess.run([sys.executable, "-c", PROGRAMA_ARRANQUE, ruta_bd or ""],
+                                 cwd=CARPETA, env=_entorno(), capture_output=True, text=True)
+        total = time.perf_counter() - inicio
+        if proceso.returncode != 0: raise RuntimeError(proceso.stderr.strip().splitlines()[-1])
+        medicion = json.loads(proceso.stdout.strip().splitlines()[-1])
+        medicion["proceso"] = total  # Incluye el arranque del intérprete y el cierre
+        mediciones.append(medicion)
+    return mediciones
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de la interfaz del Banco POO")
+    parser.add_argument("--bd", default="", help="Archivo de base de datos (default: el de la aplicación)")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Arranques a medir (default 5)")
+    parser.add_argument("--top", type=int, default=15, help="Módulos a mostrar (default 15)")
+    args = parser.parse_args(argv)
+
+    total, modulos = medir_importaciones()
+    print(f"Importar interfaz_banco: {total / 1000:.1f} ms (-X importtime)")
+    print(f"{'propio ms':>10}{'acum. ms':>10}  módulo")
+    for propio, acumulado, nombre in sorted(modulos, key=lambda m: m[1], reverse=True)[:args.top]:
+        print(f"{propio / 1000:>10.1f}{acumulado / 1000:>10.1f}  {nombre}")
+    cargado = any(n.strip() == "matplotlib" for _, _, n in modulos)
+    print(f"matplotlib al iniciar: {'SÍ (debería cargarse recién en el Panel de Análisis)' if cargado else 'no'}\n")
+
+    mediciones = medir_arranque(args.bd, args.repeticiones)
+    print(f"Arranque (mediana de {len(mediciones)} procesos):")
+    for etapa in ("importar", "controlador", "mostrar", "proceso"):
+        print(f"  {etapa:<12}{statistics.median(m[etapa] for m in mediciones) * 1000:>8.1f} ms")
+    hasta_ventana = statistics.median(m["importar"] + m["controlador"] + m["mostrar"] for m in mediciones)
+    ok = hasta_ventana < OBJETIVO_SEGUNDOS
+    print(f"Hasta ver la ventana: {hasta_ventana * 1000:.1f} ms "
+          f"({'OK' if ok else 'LENTO'}, objetivo < {OBJETIVO_SEGUNDOS * 1000:.0f} ms)")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
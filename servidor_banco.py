@@ -0,0 +1,444 @@
+# -*- coding: utf-8 -*-
+"""
+Servicio HTTP (JSON) para que otros sistemas usen la lógica del banco sin la interfaz gráfica.
+
+Solo usa la biblioteca estándar (http.server). Cada pedido lo atiende un hilo de un pool fijo
+y cada hilo reutiliza su conexión del pool de SQLite. Las conexiones HTTP se mantienen abiertas
+entre pedidos (HTTP/1.1 keep-alive) sin ocupar un hilo mientras esperan.
+Los importes se reciben en pesos (número o texto '1500,50') y se devuelven como texto exacto
+('1500.50'), igual que en los CSV.
+
+Rutas:
+    GET  /salud
+    GET  /metricas                                   latencias por ruta (histograma)
+    GET  /clientes/<dni>                             cliente y sus cuentas
+    GET  /cuentas/<numero>
+    GET  /cuentas/<numero>/movimientos?desde=&hasta=&tipo=&cursor=&tamanio=
+    POST /cuentas/<numero>/depositos                 {"monto": "100,50"}
+    POST /cuentas/<numero>/extracciones              {"monto": 100}
+    POST /transferencias                             {"origen": "12", "destino": "15", "monto": 300}
+    GET  /totales?desde=&hasta=&categoria=&tipo=&agrupar=clase,mes
+    GET  /saldo_total
+
+Uso:
+    python servidor_banco.py --puerto 8080 --hilos 16
+    curl localhost:8080/cuentas/12
+    curl -X POST localhost:8080/cuentas/12/depositos -d '{"monto": 500}'
+Con Ctrl+C o SIGTERM deja de aceptar pedidos, termina los que están en curso y cierra la BD.
+"""
+import re
+import sys
+import json
+import time
+import signal
+import socket
+import sqlite3
+import selectors
+import argparse
+import threading
+from datetime import date
+from http import HTTPStatus
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+from concurrent.futures import ThreadPoolExecutor
+import codigo_banco as logica
+
+# Segundos que una conexión keep-alive puede quedar sin pedidos antes de cerrarse
+TIEMPO_INACTIVIDAD = 5
+# Conexiones esperando un hilo libre; con más, se responde 503 en lugar de encolar sin límite
+COLA_MAXIMA = 256
+# Tamaño máximo del cuerpo JSON de un pedido (bytes)
+CUERPO_MAXIMO = 64 * 1024
+# Límites superiores (ms) de los intervalos del histograma de latencias
+LIMITES_HISTOGRAMA_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf"))
+
+class ErrorHttp(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+# --- MÉTRICAS ---
+class HistogramaLatencias:
+    """Cantidad de pedidos por intervalo de latencia (memoria fija, no guarda cada tiempo)."""
+    def __init__(self):
+        self.intervalos = [0] * len(LIMITES_HISTOGRAMA_MS)
+        self.cantidad = self.errores = 0
+        self.total_ms = self.maximo_ms = 0.0
+
+    def registrar(self, ms, error):
+        self.intervalos[next(i for i, limite in enumerate(LIMITES_HISTOGRAMA_MS) if ms <= limite)] += 1
+        self.cantidad += 1
+        self.errores += error
+        self.total_ms += ms
+        self.maximo_ms = max(self.maximo_ms, ms)
+
+    def percentil(self, q):
+        """Límite superior del intervalo donde cae el percentil q (estimación del histograma)."""
+        acumulado, objetivo = 0, q * self.cantidad
+        for limite, cantidad in zip(LIMITES_HISTOGRAMA_MS, self.intervalos):
+            acumulado += cantidad
+            if acumulado >= objetivo: return min(limite, self.maximo_ms)
+        return self.maximo_ms
+
+    def como_dict(self):
+        return {"cantidad": self.cantidad, "errores": self.errores,
+                "media_ms": round(self.total_ms / self.cantidad, 3) if self.cantidad else 0,
+                "p50_ms": self.percentil(0.50), "p95_ms": self.percentil(0.95), "p99_ms": self.percentil(0.99),
+                "max_ms": round(self.maximo_ms, 3),
+                "histograma": {("+inf" if limite == float("inf") else f"<={limite}ms"): cantidad
+                               for limite, cantidad in zip(LIMITES_HISTOGRAMA_MS, self.intervalos)}}
+
+class MetricasServidor:
+    """Un histograma por ruta ("GET /cuentas/<numero>"); se usa desde todos los hilos."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rutas = {}
+        self.inicio = time.time()
+
+    def registrar(self, ruta, ms, error):
+        with self._lock:
+            self.rutas.setdefault(ruta, HistogramaLatencias()).registrar(ms, error)
+
+    def como_dict(self):
+        with self._lock:
+            return {"segundos_activo": round(time.time() - self.inicio, 1),
+                    "rutas": {ruta: h.como_dict() for ruta, h in sorted(self.rutas.items())}}
+
+# --- CONVERSIÓN A JSON ---
+def _pesos(centavos): return logica.centavos_a_texto(centavos) if centavos is not None else None
+
+def _cliente_json(cliente):
+    return {"dni": cliente.dni, "nombre": cliente.nombre, "apellido": cliente.apellido,
+            "email": cliente.email, "activo": bool(cliente.activo)}
+
+def _cuenta_json(cuenta):
+    datos = {"numero": cuenta.numero, "tipo": "CC" if isinstance(cuenta, logica.CuentaCorriente) else "CA",
+             "categoria": cuenta.categoria, "saldo": _pesos(cuenta.saldo), "dni_titular": cuenta.titular.dni}
+    if isinstance(cuenta, logica.CuentaCorriente):
+        datos["limite_descubierto"] = _pesos(cuenta.limite_descubierto)
+    return datos
+
+def _movimiento_json(fila):
+    return {"id": fila["id"], "fecha": fila["fecha"].isoformat(" ", "seconds"), "tipo": fila["tipo"],
+            "monto": _pesos(fila["monto"]), "descripcion": fila["descripcion"],
+            "cuenta_origen": fila["nro_cuenta_origen"], "cuenta_destino": fila["nro_cuenta_destino"]}
+
+# --- LECTURA DE PARÁMETROS ---
+def _cuenta(numero):
+    cuenta = logica.CuentaBase.buscar_por_numero(numero)
+    if not cuenta: raise ErrorHttp(HTTPStatus.NOT_FOUND, f"Cuenta inexistente: {numero}")
+    return cuenta
+
+def _monto(cuerpo):
+    try: monto = logica.a_centavos(cuerpo["monto"])
+    except (KeyError, TypeError, ArithmeticError): raise ErrorHttp(HTTPStatus.BAD_REQUEST, "Monto inválido.")
+    if monto <= 0: raise ErrorHttp(HTTPStatus.BAD_REQUEST, "El monto debe ser positivo.")
+    return monto
+
+def _fecha(consulta, campo, defecto=None):
+    valor = consulta.get(campo)
+    if not valor: return defecto
+    try: return date.fromisoformat(valor)
+    except ValueError: raise ErrorHttp(HTTPStatus.BAD_REQUEST, f"Fecha inválida en '{campo}' (AAAA-MM-DD).")
+
+# --- RUTAS ---
+# Cada ruta recibe (banco, partes de la URL, parámetros de consulta, cuerpo JSON) y devuelve
+# (estado, dict); si no puede atender el pedido lanza ErrorHttp.
+
+def r_salud(banco, partes, consulta, cuerpo):
+    return HTTPStatus.OK, {"estado": "ok"}
+
+def r_cliente(banco, partes, consulta, cuerpo):
+    cliente = logica.Cliente.buscar_por_dni(partes[0])
+    if not cliente: raise ErrorHttp(HTTPStatus.NOT_FOUND, f"Cliente inexistente: {partes[0]}")
+    datos = _cliente_json(cliente)
+    datos["cuentas"] = [_cuenta_json(c) for c in logica.CuentaBase.recuperar_por_cliente(cliente.id_bd) if c]
+    return HTTPStatus.OK, datos
+
+def r_cuenta(banco, partes, consulta, cuerpo):
+    return HTTPStatus.OK, _cuenta_json(_cuenta(partes[0]))
+
+def r_movimientos(banco, partes, consulta, cuerpo):
+    cuenta = _cuenta(partes[0])
+    try: tamanio = min(int(consulta.get("tamanio", logica.TAMANIO_PAGINA_MOVIMIENTOS)), 1000)
+    except ValueError: raise ErrorHttp(HTTPStatus.BAD_REQUEST, "Tamaño de página inválido.")
+    try:
+        filas, siguiente = banco.pagina_movimientos([cuenta.id_bd], _fecha(consulta, "desde"), _fecha(consulta, "hasta"),
+                                                    consulta.get("tipo", "Todos"), consulta.get("cursor"), max(1, tamanio))
+    except ValueError as e: raise ErrorHttp(HTTPStatus.BAD_REQUEST, str(e))
+    return HTTPStatus.OK, {"movimientos": [_movimiento_json(f) for f in filas], "cursor_siguiente": siguiente}
+
+def r_deposito(banco, partes, consulta, cuerpo):
+    cuenta = _cuenta(partes[0])
+    if not cuenta.depositar(_monto(cuerpo)): raise ErrorHttp(HTTPStatus.BAD_REQUEST, "Depósito rechazado.")
+    return HTTPStatus.CREATED, _cuenta_json(cuenta)
+
+def r_extraccion(banco, partes, consulta, cuerpo):
+    cuenta = _cuenta(partes[0])
+    if not cuenta.extraer(_monto(cuerpo)): raise ErrorHttp(HTTPStatus.CONFLICT, "Fondos insuficientes.")
+    return HTTPStatus.CREATED, _cuenta_json(cuenta)
+
+def r_transferencia(banco, partes, consulta, cuerpo):
+    origen, destino = _cuenta(str(cuerpo.get("origen", ""))), _cuenta(str(cuerpo.get("destino", "")))
+    if origen.numero == destino.numero: raise ErrorHttp(HTTPStatus.BAD_REQUEST, "Origen y destino son la misma cuenta.")
+    comision = banco.comision_entre(origen, destino)
+    mov_origen, _ = origen.transferir(_monto(cuerpo), destino, comision)
+    if not mov_origen: raise ErrorHttp(HTTPStatus.CONFLICT, "Fondos insuficientes.")
+    return HTTPStatus.CREATED, {"origen": _cuenta_json(origen), "destino": _cuenta_json(destino),
+                                "comision": _pesos(comision)}
+
+def r_totales(banco, partes, consulta, cuerpo):
+    hoy = date.today()
+    filtros = {"desde": _fecha(consulta, "desde", hoy.replace(day=1)), "hasta": _fecha(consulta, "hasta", hoy),
+               "tipo_cliente": consulta.get("categoria", "Todos"), "tipo_movimiento": consulta.get("tipo", "Todos")}
+    agrupar = tuple(g for g in consulta.get("agrupar", "clase").split(",") if g)
+    try: filas = banco.obtener_totales_analisis(filtros, agrupar)
+    except ValueError as e: raise ErrorHttp(HTTPStatus.BAD_REQUEST, str(e))
+    for fila in filas: fila["total"] = _pesos(fila["total"])
+    return HTTPStatus.OK, {"desde": filtros["desde"].isoformat(), "hasta": filtros["hasta"].isoformat(), "totales": filas}
+
+def r_saldo_total(banco, partes, consulta, cuerpo):
+    return HTTPStatus.OK, {"saldo_total": _pesos(banco.obtener_saldo_total())}
+
+# (método, patrón de la ruta, nombre para las métricas, función)
+RUTAS = [
+    ("GET", r"/salud", "/salud", r_salud),
+    ("GET", r"/clientes/([^/]+)", "/clientes/<dni>", r_cliente),
+    ("GET", r"/cuentas/([^/]+)", "/cuentas/<numero>", r_cuenta),
+    ("GET", r"/cuentas/([^/]+)/movimientos", "/cuentas/<numero>/movimientos", r_movimientos),
+    ("POST", r"/cuentas/([^/]+)/depositos", "/cuentas/<numero>/depositos", r_deposito),
+    ("POST", r"/cuentas/([^/]+)/extracciones", "/cuentas/<numero>/extracciones", r_extraccion),
+    ("POST", r"/transferencias", "/transferencias", r_transferencia),
+    ("GET", r"/totales", "/totales", r_totales),
+    ("GET", r"/saldo_total", "/saldo_total", r_saldo_total),
+]
+RUTAS = [(metodo, re.compile(patron + "/?"), nombre, funcion) for metodo, patron, nombre, funcion in RUTAS]
+
+# --- SERVIDOR ---
+class ManejadorBanco(BaseHTTPRequestHandler):
+    """
+    Atiende los pedidos de UNA conexión. Si después de responder la conexión sigue abierta
+    (keep-alive) pero el cliente no mandó otro pedido, se "estaciona" en el servidor y el hilo
+    queda libre; cuando llega el próximo pedido se retoma en cualquier hilo del pool.
+    """
+    protocol_version = "HTTP/1.1"  # Keep-alive: el cliente reutiliza la conexión entre pedidos
+    timeout = TIEMPO_INACTIVIDAD
+    disable_nagle_algorithm = True  # Encabezados y cuerpo salen en dos envíos: sin esto cada respuesta espera ~40 ms
+    server_version = "BancoPOO/1.0"
+    estacionada = False
+
+    def handle(self):
+        self.estacionada = False
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and not self.server.cerrando:
+            if not self._hay_pedido_en_buffer():
+                self.estacionada = self.server.estacionar(self)
+                return
+            self.handle_one_request()
+
+    def finish(self):
+        if not self.estacionada: super().finish()
+
+    def _hay_pedido_en_buffer(self):
+        """True si el cliente ya mandó el próximo pedido (pipelining) y está en el buffer de lectura."""
+        self.connection.setblocking(False)
+        try: return bool(self.rfile.peek(1))
+        except OSError: return False
+        finally: self.connection.settimeout(self.timeout)
+
+    def do_GET(self): self._atender("GET")
+    def do_POST(self): self._atender("POST")
+
+    def _atender(self, metodo):
+        inicio = time.perf_counter()
+        url = urlsplit(self.path)
+        ruta, estado = f"{metodo} (desconocida)", HTTPStatus.INTERNAL_SERVER_ERROR
+        try:
+            if url.path.rstrip("/") == "/metricas":
+                ruta, estado, datos = None, HTTPStatus.OK, self.server.metricas.como_dict()
+            else:
+                funcion, partes, ruta = self._resolver(metodo, url.path)
+                consulta = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                estado, datos = funcion(self.server.banco, partes, consulta, self._leer_cuerpo())
+        except ErrorHttp as e: estado, datos = e.estado, {"error": str(e)}
+        except sqlite3.Error as e:
+            estado, datos = HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"Error de base de datos: {e}"}
+        except Exception as e:
+            self.log_error("Error atendiendo %s: %r", self.path, e)
+            datos = {"error": "Error interno."}
+        self._responder(estado, datos)
+        if ruta: self.server.metricas.registrar(ruta, (time.perf_counter() - inicio) * 1000, estado >= 500)
+
+    def _resolver(self, metodo, camino):
+        metodo_valido = False
+        for metodo_ruta, patron, nombre, funcion in RUTAS:
+            coincidencia = patron.fullmatch(camino)
+            if not coincidencia: continue
+            if metodo_ruta == metodo:
+                return funcion, [unquote(p) for p in coincidencia.groups()], f"{metodo} {nombre}"
+            metodo_valido = True
+        if metodo_valido: raise ErrorHttp(HTTPStatus.METHOD_NOT_ALLOWED, "Método no permitido.")
+        raise ErrorHttp(HTTPStatus.NOT_FOUND, "Ruta inexistente.")
+
+    def _leer_cuerpo(self):
+        texto = (self.headers.get("Content-Length") or "0").strip()
+        if not texto.isdigit():  # También descarta negativos: rfile.read(-1) esperaría hasta el EOF
+            self.close_connection = True  # El cuerpo no se leyó: la conexión ya no se puede reutilizar
+            raise ErrorHttp(HTTPStatus.BAD_REQUEST, "Content-Length inválido.")
+        largo = int(texto)
+        if largo > CUERPO_MAXIMO:
+            self.close_connection = True
+            raise ErrorHttp(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"El cuerpo supera {CUERPO_MAXIMO} bytes.")
+        if not largo: return {}
+        try: cuerpo = json.loads(self.rfile.read(largo))
+        except (json.JSONDecodeError, UnicodeDecodeError): raise ErrorHttp(HTTPStatus.BAD_REQUEST, "JSON inválido.")
+        if not isinstance(cuerpo, dict): raise ErrorHttp(HTTPStatus.BAD_REQUEST, "Se esperaba un objeto JSON.")
+        return cuerpo
+
+    def _responder(self, estado, datos):
+        contenido = json.dumps(datos, ensure_ascii=False, default=str).encode("utf-8")
+        if self.server.cerrando: self.close_connection = True
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(contenido)))
+        if self.close_connection: self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(contenido)
+
+    def log_message(self, formato, *args):
+        if self.server.registrar_pedidos: super().log_message(formato, *args)
+
+class ServidorBanco(HTTPServer):
+    """
+    HTTPServer con un pool fijo de hilos. Cada pedido ocupa un hilo solo mientras se atiende:
+    las conexiones keep-alive sin actividad esperan en un selector (un único hilo "vigía" las
+    mira todas) y vuelven al pool cuando llega su próximo pedido; si pasan TIEMPO_INACTIVIDAD
+    segundos sin pedidos se cierran. Con más de COLA_MAXIMA turnos esperando hilo responde 503.
+    """
+    def __init__(self, direccion, banco, hilos=8, registrar_pedidos=False):
+        super().__init__(direccion, ManejadorBanco)
+        self.banco = banco
+        self.metricas = MetricasServidor()
+        self.registrar_pedidos = registrar_pedidos
+        self.cerrando = False
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="http")
+        self._turnos = threading.BoundedSemaphore(hilos + COLA_MAXIMA)
+        self._estacionadas = selectors.DefaultSelector()
+        self._lock_estacionadas = threading.Lock()
+        # Par de sockets para despertar al vigía cuando se estaciona una conexión o al cerrar
+        self._despertar_lectura, self._despertar_escritura = socket.socketpair()
+        self._despertar_lectura.setblocking(False)
+        self._estacionadas.register(self._despertar_lectura, selectors.EVENT_READ)
+        self._vigia = threading.Thread(target=self._vigilar_estacionadas, name="http-vigia", daemon=True)
+        self._vigia.start()
+
+    def process_request(self, request, client_address):
+        self._encolar(request, client_address)
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def _encolar(self, request, client_address, manejador=None):
+        if not self._turnos.acquire(blocking=False):
+            if manejador is None:  # Conexión nueva: se le avisa que vuelva a intentar
+                try: request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                except OSError: pass
+            self.shutdown_request(request)
+            return
+        self.pool.submit(self._atender_turno, request, client_address, manejador)
+
+    def _atender_turno(self, request, client_address, manejador):
+        try:
+            if manejador is None: manejador = self.finish_request(request, client_address)
+            else:
+                manejador.handle()
+                manejador.finish()
+        except Exception:
+            manejador = None
+            self.handle_error(request, client_address)
+        finally:
+            if not (manejador and manejador.estacionada): self.shutdown_request(request)
+            self._turnos.release()
+
+    def estacionar(self, manejador):
+        """Deja la conexión esperando su próximo pedido sin ocupar un hilo. False si el servidor está cerrando."""
+        with self._lock_estacionadas:
+            if self.cerrando: return False
+            manejador.estacionada_desde = time.monotonic()
+            self._estacionadas.register(manejador.connection, selectors.EVENT_READ, manejador)
+        self._despertar_escritura.send(b"x")
+        return True
+
+    def _vigilar_estacionadas(self):
+        while not self.cerrando:
+            listos = self._estacionadas.select(timeout=1)
+            limite = time.monotonic() - TIEMPO_INACTIVIDAD
+            with self._lock_estacionadas:
+                for clave, _ in listos:
+                    if clave.fileobj is self._despertar_lectura:
+                        try: self._despertar_lectura.recv(4096)
+                        except BlockingIOError: pass
+                        continue
+                    self._estacionadas.unregister(clave.fileobj)
+                    self._encolar(clave.fileobj, clave.data.client_address, clave.data)
+                for clave in list(self._estacionadas.get_map().values()):
+                    if clave.data and clave.data.estacionada_desde < limite:
+                        self._estacionadas.unregister(clave.fileobj)
+                        self.shutdown_request(clave.fileobj)
+
+    def _cerrar_estacionadas(self):
+        with self._lock_estacionadas:
+            for clave in list(self._estacionadas.get_map().values()):
+                if clave.data:
+                    self._estacionadas.unregister(clave.fileobj)
+                    self.shutdown_request(clave.fileobj)
+
+    def cerrar(self):
+        """
+        Cierre ordenado: deja de aceptar conexiones, cierra las conexiones keep-alive inactivas,
+        espera los pedidos en curso (se responden con "Connection: close") y cierra la BD.
+        No llamar desde el hilo que ejecuta serve_forever().
+        """
+        with self._lock_estacionadas: self.cerrando = True
+        self.shutdown()
+        self._despertar_escritura.send(b"x")
+        self._vigia.join()
+        self._cerrar_estacionadas()
+        self.pool.shutdown(wait=True)
+        self._cerrar_estacionadas()
+        self._estacionadas.close()
+        self._despertar_lectura.close()
+        self._despertar_escritura.close()
+        self.server_close()
+        logica.cerrar_conexiones()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP (JSON) del Banco POO")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección (default 127.0.0.1, solo esta máquina)")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--hilos", type=int, default=8, help="Pedidos atendidos a la vez (default 8)")
+    parser.add_argument("--bd", help="Archivo de base de datos (default: el de la aplicación)")
+    parser.add_argument("--perfil", choices=sorted(logica.PERFILES_ALMACENAMIENTO), help="Perfil de almacenamiento")
+    parser.add_argument("--registrar", action="store_true", help="Mostrar cada pedido en la consola")
+    args = parser.parse_args(argv)
+
+    if args.bd: logica.RUTA_BD = args.bd
+    banco = logica.Banco(nombre="Banco POO", perfil_bd=args.perfil)
+    servidor = ServidorBanco((args.host, args.puerto), banco, args.hilos, args.registrar)
+
+    # shutdown() espera a que termine serve_forever(), así que se llama desde otro hilo
+    def al_recibir_senal(numero, marco):
+        threading.Thread(target=servidor.cerrar, name="cierre").start()
+    signal.signal(signal.SIGINT, al_recibir_senal)
+    signal.signal(signal.SIGTERM, al_recibir_senal)
+
+    print(f"Escuchando en http://{args.host}:{servidor.server_port} con {args.hilos} hilos (Ctrl+C para salir)")
+    servidor.serve_forever()
+    for hilo in threading.enumerate():
+        if hilo.name == "cierre": hilo.join()
+    print(json.dumps(servidor.metricas.como_dict()["rutas"], ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import codigo_banco as logica
+
+@pytest.fixture
+def bd(tmp_path, monkeypatch):
+    """BD vacía en un archivo temporal, con su propia cache de objetos. Devuelve la ruta."""
+    ruta = str(tmp_path / "banco.sqlite")
+    monkeypatch.setattr(logica, "RUTA_BD", ruta)
+    monkeypatch.setattr(logica, "CACHE_OBJETOS", logica.CacheObjetos())
+    yield ruta
+    logica.cerrar_conexiones()
+
+@pytest.fixture
+def banco(bd):
+    return logica.Banco(nombre="Banco de prueba")
+
+@pytest.fixture
+def nueva_cuenta(banco):
+    """Fábrica: alta de cliente + cuenta, con un depósito inicial opcional (en centavos)."""
+    def crear(dni, tipo_cuenta="Caja de Ahorro", categoria="Persona", saldo=0):
+        cuenta, error = banco.abrir_cuenta({"nombre": "Ana", "apellido": "Paz", "dni": dni, "email": "",
+                                            "categoria": categoria, "tipo_cuenta": tipo_cuenta})
+        assert error is None, error
+        if saldo: assert cuenta.depositar(saldo)
+        return cuenta
+    return crear
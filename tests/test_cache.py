@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+import codigo_banco as logica
+
+def test_misma_instancia_por_fila(nueva_cuenta):
+    cuenta = nueva_cuenta("30111222", saldo=1000)
+    assert logica.CuentaBase.buscar_por_numero(cuenta.numero) is cuenta
+    assert logica.CuentaBase.buscar_por_numero(cuenta.numero) is cuenta
+    titular = logica.Cliente.buscar_por_dni("30111222")
+    assert titular is cuenta.titular
+    assert logica.Cliente.buscar_por_dni("30111222") is titular
+
+def test_invalidar_relee_sobre_la_misma_instancia(bd, nueva_cuenta):
+    cuenta = nueva_cuenta("30111222", saldo=1000)
+    cache = logica.CACHE_OBJETOS
+    assert cache.obtener(logica.CuentaBase, cuenta.id_bd) is cuenta
+    cache.invalidar()
+    assert cache.obtener(logica.CuentaBase, cuenta.id_bd) is None
+    assert logica.CuentaBase.buscar_por_numero(cuenta.numero) is cuenta
+    assert cache.obtener(logica.CuentaBase, cuenta.id_bd) is cuenta
+
+def test_escritura_de_otro_programa_invalida(bd, nueva_cuenta):
+    cuenta = nueva_cuenta("30111222", saldo=1000)
+    epoca = logica.CACHE_OBJETOS.epoca
+    otro_programa = sqlite3.connect(bd)
+    otro_programa.execute("UPDATE cuentas SET saldo = 5000 WHERE id = ?", (cuenta.id_bd,))
+    otro_programa.commit()
+    otro_programa.close()
+    assert logica.CuentaBase.buscar_por_numero(cuenta.numero) is cuenta
+    assert logica.CACHE_OBJETOS.epoca > epoca
+    assert cuenta.saldo == 5000
+
+def test_escrituras_propias_no_invalidan(nueva_cuenta):
+    cuenta = nueva_cuenta("30111222")
+    logica.CuentaBase.buscar_por_numero(cuenta.numero)
+    epoca = logica.CACHE_OBJETOS.epoca
+    # Depósitos desde otros hilos: otras conexiones del pool, pero el mismo programa
+    hilos = [threading.Thread(target=cuenta.depositar, args=(100,)) for _ in range(4)]
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    assert logica.CuentaBase.buscar_por_numero(cuenta.numero) is cuenta
+    assert logica.CACHE_OBJETOS.epoca == epoca
+    assert cuenta.saldo == 400
+
+def test_claves_y_listas_acotadas(bd, monkeypatch, nueva_cuenta):
+    cache = logica.CacheObjetos(capacidad=3)
+    monkeypatch.setattr(logica, "CACHE_OBJETOS", cache)
+    cuentas = [nueva_cuenta(str(30111220 + i)) for i in range(6)]
+    for c in cuentas:
+        logica.CuentaBase.buscar_por_numero(c.numero)
+        logica.Cliente.buscar_por_dni(c.titular.dni)
+        logica.CuentaBase.recuperar_por_cliente(c.titular.id_bd)
+    assert len(cache._recientes) <= 3
+    assert len(cache._claves) <= 3
+    assert len(cache._listas) <= 3
+    # Lo más reciente sigue en la cache
+    assert logica.CuentaBase.buscar_por_numero(cuentas[-1].numero) is cuentas[-1]
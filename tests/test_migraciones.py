@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import codigo_banco as logica
+
+# Esquema de la versión original del programa (importes en pesos, REAL; sin version_esquema)
+ESQUEMA_ORIGINAL = """
+CREATE TABLE clientes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, apellido TEXT NOT NULL,
+    dni TEXT NOT NULL UNIQUE, email TEXT, activo INTEGER DEFAULT 1);
+CREATE TABLE cuentas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, numero TEXT NOT NULL UNIQUE, saldo REAL NOT NULL,
+    tipo_cuenta TEXT NOT NULL, categoria TEXT NOT NULL, id_cliente INTEGER NOT NULL,
+    limite_descubierto REAL, costo_mantenimiento REAL, fecha_creacion DATE,
+    FOREIGN KEY (id_cliente) REFERENCES clientes(id));
+CREATE TABLE plazos_fijos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, id_cuenta INTEGER NOT NULL, monto_inicial REAL NOT NULL,
+    dias INTEGER NOT NULL, tasa_interes REAL NOT NULL, monto_final REAL NOT NULL,
+    fecha_creacion DATE NOT NULL, fecha_vencimiento DATE NOT NULL, estado TEXT NOT NULL,
+    FOREIGN KEY (id_cuenta) REFERENCES cuentas(id));
+CREATE TABLE movimientos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, id_cuenta INTEGER NOT NULL, fecha TIMESTAMP NOT NULL,
+    monto REAL NOT NULL, tipo TEXT NOT NULL, descripcion TEXT, nro_cuenta_origen TEXT,
+    nro_cuenta_destino TEXT, FOREIGN KEY (id_cuenta) REFERENCES cuentas(id));
+CREATE TABLE parametros (
+    id INTEGER PRIMARY KEY CHECK (id = 1), comision_transferencia REAL, tasa_anual_pf REAL,
+    costo_mantenimiento_cc REAL, limite_descubierto_cc REAL, ultimo_nro_cuenta INTEGER);
+INSERT INTO parametros VALUES (1, 50.0, 0.45, 100.0, 10000, 2);
+
+INSERT INTO clientes (nombre, apellido, dni, email) VALUES ('Ana', 'Paz', '30111222', '');
+INSERT INTO cuentas (numero, saldo, tipo_cuenta, categoria, id_cliente, limite_descubierto, costo_mantenimiento, fecha_creacion)
+VALUES ('1', 1234.56, 'CA', 'Persona', 1, NULL, NULL, '2024-01-10'),
+       ('2', -50.1, 'CC', 'Empresa', 1, 10000.0, 100.0, '2024-01-10');
+INSERT INTO movimientos (id_cuenta, fecha, monto, tipo, descripcion) VALUES
+    (1, '2024-01-10 10:00:00', 1500.0, 'Depósito', NULL),
+    (1, '2024-01-11 10:00:00', 265.44, 'Extracción', NULL),
+    (2, '2024-01-12 10:00:00', 50.1, 'Extracción', NULL);
+INSERT INTO plazos_fijos (id_cuenta, monto_inicial, dias, tasa_interes, monto_final, fecha_creacion, fecha_vencimiento, estado)
+VALUES (1, 100.0, 30, 0.45, 103.7, '2024-01-10', '2024-02-09', 'ACTIVO');
+"""
+
+def test_actualiza_bd_original_en_pesos(bd):
+    original = sqlite3.connect(bd)
+    original.executescript(ESQUEMA_ORIGINAL)
+    original.close()
+
+    logica.inicializar_bd()
+    conexion = logica.conectar_bd()
+    assert logica.version_esquema(conexion) == logica.MIGRACIONES[-1][0]
+    assert logica.esquema_al_dia(conexion)
+    assert logica.indices_faltantes(conexion) == []
+
+    # Importes pasados a centavos enteros
+    cuentas = {f["numero"]: f for f in conexion.execute(
+        "SELECT numero, saldo, typeof(saldo) AS tipo, limite_descubierto, costo_mantenimiento FROM cuentas")}
+    assert (cuentas["1"]["saldo"], cuentas["1"]["tipo"]) == (123456, "integer")
+    assert (cuentas["2"]["saldo"], cuentas["2"]["limite_descubierto"], cuentas["2"]["costo_mantenimiento"]) == (-5010, 1000000, 10000)
+    assert [f[0] for f in conexion.execute("SELECT monto FROM movimientos ORDER BY id")] == [150000, 26544, 5010]
+    assert tuple(conexion.execute("SELECT monto_inicial, monto_final FROM plazos_fijos").fetchone()) == (10000, 10370)
+    assert tuple(conexion.execute(
+        "SELECT comision_transferencia, costo_mantenimiento_cc, limite_descubierto_cc FROM parametros").fetchone()) == (5000, 10000, 1000000)
+
+    # Movimientos con código de tipo, resumen diario al día y numeración después de las cuentas existentes
+    assert [f[0] for f in conexion.execute("SELECT tipo_codigo FROM movimientos ORDER BY id")] == \
+        [logica.MOV_DEPOSITO, logica.MOV_EXTRACCION, logica.MOV_EXTRACCION]
+    assert tuple(conexion.execute("SELECT SUM(cantidad), SUM(total) FROM resumen_diario").fetchone()) == (3, 181554)
+    assert conexion.execute("SELECT valor FROM secuencias WHERE nombre = 'cuentas'").fetchone()[0] >= 2
+
+    # El programa funciona sobre la BD actualizada
+    banco = logica.Banco(nombre="Banco de prueba")
+    cuenta = logica.CuentaBase.buscar_por_numero("1")
+    assert cuenta.saldo == 123456
+    assert int(banco.generar_numero_cuenta()) > 2
+
+def test_inicializar_recrea_indices_faltantes(bd):
+    logica.inicializar_bd()
+    conexion = logica.conectar_bd()
+    conexion.execute("DROP INDEX idx_movimientos_cuenta_fecha")  # Como una importación que se cortó
+    conexion.commit()
+    assert not logica.esquema_al_dia(conexion)
+    logica.inicializar_bd()
+    assert logica.indices_faltantes(conexion) == []
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+import codigo_banco as logica
+
+def _en_paralelo(funcion, hilos):
+    """Corre funcion(i) en `hilos` hilos que arrancan juntos; devuelve los resultados por índice."""
+    resultados, largada = [None] * hilos, threading.Barrier(hilos)
+    def correr(i):
+        largada.wait()
+        resultados[i] = funcion(i)
+    trabajos = [threading.Thread(target=correr, args=(i,)) for i in range(hilos)]
+    for t in trabajos: t.start()
+    for t in trabajos: t.join()
+    return resultados
+
+def _saldo_en_bd(cuenta):
+    return logica.conectar_bd().execute("SELECT saldo FROM cuentas WHERE id = ?", (cuenta.id_bd,)).fetchone()[0]
+
+# --- DÉBITOS CONCURRENTES ---
+def test_debitos_concurrentes_no_sobregiran(nueva_cuenta):
+    cuenta = nueva_cuenta("30111222", saldo=100000)
+    # Diez extracciones de $700 a la vez sobre $1000: la BD deja pasar una sola
+    resultados = _en_paralelo(lambda i: cuenta.extraer(70000), 10)
+    assert sum(1 for r in resultados if r) == 1
+    assert _saldo_en_bd(cuenta) == 30000
+    assert cuenta.saldo == 30000
+    extracciones = logica.conectar_bd().execute(
+        "SELECT COUNT(*) FROM movimientos WHERE id_cuenta = ? AND tipo_codigo = ?", (cuenta.id_bd, logica.MOV_EXTRACCION)).fetchone()[0]
+    assert extracciones == 1
+
+def test_debito_con_saldo_viejo_en_memoria(bd, nueva_cuenta):
+    cuenta = nueva_cuenta("30111222")
+    otro_programa = sqlite3.connect(bd)
+    otro_programa.execute("UPDATE cuentas SET saldo = saldo + 50000 WHERE id = ?", (cuenta.id_bd,))
+    otro_programa.commit()
+    otro_programa.close()
+    assert cuenta.saldo == 0              # La instancia no se enteró del depósito...
+    assert cuenta.extraer(20000)          # ...pero los fondos los controla la BD
+    assert cuenta.saldo == 30000
+    assert not cuenta.extraer(40000)
+    assert cuenta.saldo == 30000
+
+def test_transferencias_cruzadas_conservan_el_total(nueva_cuenta):
+    a = nueva_cuenta("30111222", saldo=50000)
+    b = nueva_cuenta("30111223", saldo=50000)
+    def transferir(i):
+        origen, destino = (a, b) if i % 2 else (b, a)
+        return origen.transferir(1000, destino, 0)
+    _en_paralelo(transferir, 8)
+    assert _saldo_en_bd(a) + _saldo_en_bd(b) == 100000
+
+# --- MANTENIMIENTO ---
+def test_mantenimiento_idempotente_por_periodo(banco, nueva_cuenta):
+    cuenta = nueva_cuenta("30111222", tipo_cuenta="Cuenta Corriente", saldo=100000)
+    costo = banco.default_costo_mantenimiento_cc
+
+    previo = banco.cobrar_mantenimiento_mensual("2026-01", simular=True)
+    assert (previo["cuentas"], previo["total"]) == (1, costo)
+    assert _saldo_en_bd(cuenta) == 100000   # Simular no cobra
+
+    assert banco.cobrar_mantenimiento_mensual("2026-01")["cuentas"] == 1
+    assert banco.cobrar_mantenimiento_mensual("2026-01")["cuentas"] == 0
+    assert banco.cobrar_mantenimiento_mensual("2026-01", simular=True)["cuentas"] == 0
+    assert _saldo_en_bd(cuenta) == 100000 - costo
+
+    assert banco.cobrar_mantenimiento_mensual("2026-02")["cuentas"] == 1
+    assert _saldo_en_bd(cuenta) == 100000 - 2 * costo
+    periodos = [f[0] for f in logica.conectar_bd().execute(
+        "SELECT periodo FROM cobros_mantenimiento WHERE id_cuenta = ? ORDER BY periodo", (cuenta.id_bd,))]
+    assert periodos == ["2026-01", "2026-02"]
+
+# --- NUMERACIÓN DE CUENTAS ---
+def test_reserva_secuencia_sin_repetidos_entre_conexiones(banco):
+    # Dos reservas independientes (como dos programas), cada una desde un hilo con su propia conexión
+    reservas = [logica.ReservaSecuencia("cuentas", 5), logica.ReservaSecuencia("cuentas", 7)]
+    numeros = _en_paralelo(lambda i: [reservas[i].siguiente() for _ in range(60)], 2)
+    todos = numeros[0] + numeros[1]
+    assert len(set(todos)) == len(todos) == 120
+    assert all(n == sorted(lista)[k] for lista in numeros for k, n in enumerate(lista))  # Crecientes en cada una
+    # La numeración del banco sigue después de todo lo reservado
+    assert banco.generar_numero_cuenta() > max(todos)
+
+def test_reserva_dentro_de_transaccion_deshecha_no_repite(banco):
+    reserva = logica.ReservaSecuencia("cuentas", 10)
+    try:
+        with logica.transaccion():
+            perdido = reserva.siguiente()
+            raise RuntimeError("se deshace")
+    except RuntimeError: pass
+    assert reserva.siguiente() == perdido  # La reserva se deshizo con la transacción: nadie lo recibió